@@ -0,0 +1,100 @@
+"""
+Management command to measure the cost of decoding split modulestore course structures.
+"""
+import copy
+import gc
+import resource
+import time
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.split_mongo.mongo_connection import structure_from_mongo
+
+
+def _resident_bytes():
+    """
+    Return the resident memory of this process in bytes.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except IOError:
+        # Not linux: fall back to the peak resident memory, in KB
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Command(BaseCommand):
+    """
+    Report how long it takes to decode the published structures of the given split
+    courses, and how much memory copies of them take, both when blocks are only decoded
+    as they're accessed and when every block is decoded.
+
+    Example:
+
+        ./manage.py cms benchmark_split_structures course-v1:edX+DemoX+Demo_Course --copies 20
+    """
+    help = __doc__
+
+    args = "<course_id course_id ...>"
+
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--copies',
+            type='int',
+            default=10,
+            help='Number of copies of each structure to decode'
+        ),
+    )
+
+    def handle(self, *args, **options):
+        if not args:
+            raise CommandError("benchmark_split_structures requires one or more course ids")
+
+        store = modulestore()._get_modulestore_by_type(ModuleStoreEnum.Type.split)  # pylint: disable=protected-access
+        copies = options['copies']
+        for course_id in args:
+            try:
+                course_key = CourseKey.from_string(course_id)
+            except InvalidKeyError:
+                raise CommandError("Invalid course key {}".format(course_id))
+
+            index = store.get_course_index_info(course_key)
+            if index is None:
+                raise CommandError("{} is not a split modulestore course".format(course_id))
+            version = index['versions'].get(ModuleStoreEnum.BranchName.published)
+            if version is None:
+                version = index['versions'][ModuleStoreEnum.BranchName.draft]
+            document = store.db_connection.structures.find_one({'_id': version})
+
+            self.stdout.write(u"{} ({} blocks, {} copies)\n".format(course_id, len(document['blocks']), copies))
+            self._report(u"lazy", document, copies, lambda structure: structure['blocks'][structure['root']])
+            self._report(u"all blocks", document, copies, lambda structure: structure['blocks'].values())
+
+    def _report(self, label, document, copies, access):
+        """
+        Decode `copies` copies of the structure `document`, calling `access` on each,
+        and report the time taken and the memory held by the decoded structures.
+        """
+        gc.collect()
+        resident_before = _resident_bytes()
+        documents = [copy.deepcopy(document) for __ in xrange(copies)]
+
+        start = time.time()
+        structures = []
+        for structure in documents:
+            structure = structure_from_mongo(structure)
+            access(structure)
+            structures.append(structure)
+        elapsed = time.time() - start
+
+        del documents
+        gc.collect()
+        resident = _resident_bytes() - resident_before
+        self.stdout.write(u"  {:<12} decode: {:8.2f} ms/structure  resident: {:8.2f} MB/structure\n".format(
+            label, elapsed * 1000 / copies, float(resident) / copies / 1024 / 1024
+        ))
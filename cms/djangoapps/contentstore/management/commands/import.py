@@ -2,6 +2,7 @@
 Script for importing courseware from XML format
 """
 
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError, make_option
 from django_comment_common.utils import (seed_permissions_roles,
                                          are_permissions_roles_seeded)
@@ -45,6 +46,7 @@ class Command(BaseCommand):
             static_content_store=contentstore(), verbose=True,
             do_import_static=do_import_static,
             create_if_not_present=True,
+            static_import_threads=settings.COURSE_IMPORT_STATIC_THREADS,
         )
 
         for course in course_items:
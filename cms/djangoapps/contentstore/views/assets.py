@@ -12,6 +12,7 @@ from django.conf import settings
 
 from edxmako.shortcuts import render_to_response
 from cache_toolbox.core import del_cached_content
+from static_replace import clear_static_url_cache
 
 from contentstore.utils import reverse_course_url
 from xmodule.contentstore.django import contentstore
@@ -281,6 +282,7 @@ def _upload_asset(request, course_key):
     # then commit the content
     contentstore().save(content)
     del_cached_content(content.location)
+    clear_static_url_cache(course_key)
 
     # readback the saved content - we need the database timestamp
     readback = contentstore().find(content.location)
@@ -364,6 +366,7 @@ def delete_asset(course_key, asset_key):
     contentstore().delete(content.get_id())
     # remove from cache
     del_cached_content(content.location)
+    clear_static_url_cache(course_key)
 
 
 def _get_asset_json(display_name, content_type, date, location, thumbnail_location, locked):
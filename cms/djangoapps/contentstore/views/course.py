@@ -2,10 +2,12 @@
 Views related to operations on course objects
 """
 from django.shortcuts import redirect
+from datetime import datetime
+import hashlib
 import json
 import random
 import string  # pylint: disable=deprecated-module
-from django.utils.translation import ugettext as _
+from django.utils.translation import ugettext as _, get_language
 import django.utils
 from django.contrib.auth.decorators import login_required
 from django.conf import settings
@@ -13,6 +15,8 @@ from django.views.decorators.http import require_http_methods, require_GET
 from django.core.exceptions import PermissionDenied
 from django.core.urlresolvers import reverse
 from django.http import HttpResponseBadRequest, HttpResponseNotFound, HttpResponse, Http404
+from pytz import UTC
+from util.cache import cache
 from util.json_request import JsonResponse, JsonResponseBadRequest
 from util.date_utils import get_default_time_display
 from util.db import generate_int_id, MYSQL_MAX_INT
@@ -23,11 +27,12 @@ from xmodule.error_module import ErrorDescriptor
 from xmodule.modulestore.django import modulestore
 from xmodule.contentstore.content import StaticContent
 from xmodule.tabs import PDFTextbookTabs
-from xmodule.modulestore import EdxJSONEncoder
+from xmodule.modulestore import EdxJSONEncoder, ModuleStoreEnum
 from xmodule.modulestore.exceptions import ItemNotFoundError, DuplicateCourseError
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.locations import Location
 from opaque_keys.edx.keys import CourseKey
+from xblock.fields import Date
 
 from django_future.csrf import ensure_csrf_cookie
 from contentstore.course_info_model import get_course_updates, update_course_updates, delete_course_update
@@ -244,8 +249,8 @@ def course_handler(request, course_key_string=None):
             if request.method == 'GET':
                 course_key = CourseKey.from_string(course_key_string)
                 with modulestore().bulk_operations(course_key):
-                    course_module = get_course_and_check_access(course_key, request.user, depth=None)
-                    return JsonResponse(_course_outline_json(request, course_module))
+                    __, course_structure = _get_course_and_outline(request, course_key)
+                    return JsonResponse(course_structure)
             elif request.method == 'POST':  # not sure if this is only post. If one will have ids, it goes after access
                 return _create_or_rerun_course(request)
             elif not has_studio_write_access(request.user, CourseKey.from_string(course_key_string)):
@@ -333,6 +338,72 @@ def _course_outline_json(request, course_module):
     )
 
 
+def _course_outline_cache_key(course_key):
+    """
+    Returns the key of the cached outline of the course, which identifies the course's current
+    draft and published versions, or None if the course's modulestore doesn't version courses.
+    """
+    store = modulestore()
+    if store.get_modulestore_type(course_key) != ModuleStoreEnum.Type.split:
+        return None
+    split_store = store._get_modulestore_by_type(ModuleStoreEnum.Type.split)  # pylint: disable=protected-access
+    index = split_store.get_course_index(course_key)
+    if index is None:
+        return None
+    versions = index['versions']
+    key = u'|'.join([
+        unicode(course_key),
+        unicode(versions.get(ModuleStoreEnum.BranchName.draft)),
+        unicode(versions.get(ModuleStoreEnum.BranchName.published)),
+        get_language() or u'',
+    ])
+    return u'contentstore.course_outline.{}'.format(hashlib.md5(key.encode('utf-8')).hexdigest())
+
+
+def _next_release(course_structure, now):
+    """
+    Returns the earliest start date after `now` of the blocks in the course outline `course_structure`,
+    which is when the outline's release and visibility states change, or None if every block is released.
+    """
+    next_release = None
+    pending = [course_structure]
+    while pending:
+        xblock_info = pending.pop()
+        start = Date().from_json(xblock_info.get('start'))
+        if start is not None and start > now and (next_release is None or start < next_release):
+            next_release = start
+        pending.extend(xblock_info.get('child_info', {}).get('children', []))
+    return next_release
+
+
+def _get_course_and_outline(request, course_key):
+    """
+    Returns the course, checking that the user has access to it, and the JSON representation of its
+    outline.
+
+    The outline only changes when the course's draft or published version does, or when one of its blocks
+    is released, so it's cached for split courses until either happens.
+    """
+    cache_key = _course_outline_cache_key(course_key) if settings.COURSE_OUTLINE_CACHE_TIMEOUT else None
+    if cache_key is not None:
+        cached = cache.get(cache_key)
+        if cached is not None and (cached['expires'] is None or cached['expires'] > datetime.now(UTC)):
+            # The outline doesn't need the whole course loaded
+            return get_course_and_check_access(course_key, request.user), cached['outline']
+
+    # A depth of None implies the whole course. The course outline needs this in order to compute has_changes.
+    # A unit may not have a draft version, but one of its components could, and hence the unit itself has changes.
+    course_module = get_course_and_check_access(course_key, request.user, depth=None)
+    course_structure = _course_outline_json(request, course_module)
+    if cache_key is not None:
+        cache.set(
+            cache_key,
+            {'outline': course_structure, 'expires': _next_release(course_structure, datetime.now(UTC))},
+            settings.COURSE_OUTLINE_CACHE_TIMEOUT
+        )
+    return course_module, course_structure
+
+
 def _accessible_courses_list(request):
     """
     List all courses available to the logged in user by iterating through all the courses
@@ -481,16 +552,13 @@ def course_index(request, course_key):
 
     org, course, name: Attributes of the Location for the item to edit
     """
-    # A depth of None implies the whole course. The course outline needs this in order to compute has_changes.
-    # A unit may not have a draft version, but one of its components could, and hence the unit itself has changes.
     with modulestore().bulk_operations(course_key):
-        course_module = get_course_and_check_access(course_key, request.user, depth=None)
+        course_module, course_structure = _get_course_and_outline(request, course_key)
         lms_link = get_lms_link_for_item(course_module.location)
         reindex_link = None
         if settings.FEATURES.get('ENABLE_COURSEWARE_INDEX', False):
             reindex_link = "/course/{course_id}/search_reindex".format(course_id=unicode(course_key))
         sections = course_module.get_children()
-        course_structure = _course_outline_json(request, course_module)
         locator_to_show = request.REQUEST.get('show', None)
         course_release_date = get_default_time_display(course_module.start) if course_module.start != DEFAULT_START_DATE else _("Unscheduled")
         settings_url = reverse_course_url('settings_handler', course_key)
@@ -9,7 +9,9 @@ import mock
 import pytz
 
 from django.conf import settings
+from django.core.cache import get_cache
 from django.core.exceptions import PermissionDenied
+from django.test.utils import override_settings
 from django.utils.translation import ugettext as _
 
 from contentstore.courseware_index import CoursewareSearchIndexer, SearchIndexingError
@@ -212,6 +214,28 @@ class TestCourseIndex(CourseTestCase):
 
         self.assertFalse(has_course_author_access(user2, rerun_course_key))
 
+    @override_settings(COURSE_OUTLINE_CACHE_TIMEOUT=60)
+    @mock.patch('contentstore.views.course.cache', get_cache(backend='default', LOCATION='course_outline_cache'))
+    def test_cached_json_responses(self):
+        """
+        Verify that the outline of a split course is only built again once the course changes.
+        """
+        course = CourseFactory.create(default_store=ModuleStoreEnum.Type.split)
+        chapter = ItemFactory.create(parent_location=course.location, category='chapter', display_name="Week 1")
+        outline_url = reverse_course_url('course_handler', course.id)
+
+        with mock.patch('contentstore.views.course.create_xblock_info', wraps=create_xblock_info) as mock_info:
+            json_response = json.loads(self.client.get(outline_url, HTTP_ACCEPT='application/json').content)
+            cached_response = json.loads(self.client.get(outline_url, HTTP_ACCEPT='application/json').content)
+            self.assertEqual(cached_response, json_response)
+            self.assertEqual(mock_info.call_count, 1)
+
+            chapter.display_name = "Week 2"
+            modulestore().update_item(chapter, self.user.id)
+            json_response = json.loads(self.client.get(outline_url, HTTP_ACCEPT='application/json').content)
+            self.assertEqual(json_response['child_info']['children'][0]['display_name'], "Week 2")
+            self.assertEqual(mock_info.call_count, 2)
+
     def assert_correct_json_response(self, json_response):
         """
         Asserts that the JSON response is syntactically consistent
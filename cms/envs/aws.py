@@ -255,6 +255,15 @@ DATABASES = AUTH_TOKENS['DATABASES']
 MODULESTORE = convert_module_store_setting_if_needed(AUTH_TOKENS.get('MODULESTORE', MODULESTORE))
 CONTENTSTORE = AUTH_TOKENS['CONTENTSTORE']
 DOC_STORE_CONFIG = AUTH_TOKENS['DOC_STORE_CONFIG']
+SPLIT_STRUCTURE_CACHE_SIZE = ENV_TOKENS.get('SPLIT_STRUCTURE_CACHE_SIZE', SPLIT_STRUCTURE_CACHE_SIZE)
+SPLIT_DEFINITION_CACHE_SIZE = ENV_TOKENS.get('SPLIT_DEFINITION_CACHE_SIZE', SPLIT_DEFINITION_CACHE_SIZE)
+STATIC_CONTENT_DISK_CACHE = ENV_TOKENS.get('STATIC_CONTENT_DISK_CACHE', STATIC_CONTENT_DISK_CACHE)
+STATIC_URL_CACHE_SIZE = ENV_TOKENS.get('STATIC_URL_CACHE_SIZE', STATIC_URL_CACHE_SIZE)
+COURSE_OUTLINE_CACHE_TIMEOUT = ENV_TOKENS.get('COURSE_OUTLINE_CACHE_TIMEOUT', COURSE_OUTLINE_CACHE_TIMEOUT)
+COURSE_IMPORT_STATIC_THREADS = ENV_TOKENS.get('COURSE_IMPORT_STATIC_THREADS', COURSE_IMPORT_STATIC_THREADS)
+CONFIGURATION_PROCESS_CACHE_TIMEOUT = ENV_TOKENS.get(
+    'CONFIGURATION_PROCESS_CACHE_TIMEOUT', CONFIGURATION_PROCESS_CACHE_TIMEOUT
+)
 # Datadog for events!
 DATADOG = AUTH_TOKENS.get("DATADOG", {})
 DATADOG.update(ENV_TOKENS.get("DATADOG", {}))
@@ -194,6 +194,8 @@ sys.path.append(COMMON_ROOT / 'djangoapps')
 # For geolocation ip database
 GEOIP_PATH = REPO_ROOT / "common/static/data/geoip/GeoIP.dat"
 GEOIPV6_PATH = REPO_ROOT / "common/static/data/geoip/GeoIPv6.dat"
+# Number of recent IP address to country lookups kept in each process. 0 disables the cache.
+GEOIP_LOOKUP_CACHE_SIZE = 10000
 
 ############################# WEB CONFIGURATION #############################
 # This is where we stick our compiled template files.
@@ -376,6 +378,30 @@ MODULESTORE = {
     }
 }
 
+# Budget, in bytes of compressed data, of the per-process LRU cache of split modulestore course
+# structures. Structures are immutable so the cache never needs invalidating. 0 disables it.
+# Define a 'course_structure_cache' in CACHES to share structures between processes.
+SPLIT_STRUCTURE_CACHE_SIZE = 64 * 1024 * 1024
+# Likewise for the immutable definitions (content fields) of split modulestore blocks.
+SPLIT_DEFINITION_CACHE_SIZE = 64 * 1024 * 1024
+
+# Seconds to cache the outlines of split courses, which are keyed by the courses' draft and
+# published versions, until the next release of one of their blocks. 0 disables the cache.
+COURSE_OUTLINE_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Number of threads which import the static files of a course, in the background while its blocks
+# are imported. 0 imports them one at a time before the blocks.
+COURSE_IMPORT_STATIC_THREADS = 4
+
+# Local on-disk tier used by StaticContentServer for assets too large for memcache, e.g.
+# {'ROOT': '/var/tmp/edx-asset-cache', 'MAX_BYTES': 2 * 1024 ** 3, 'MIN_SIZE': 1024 ** 2}.
+# None disables it, in which case such assets are streamed from the contentstore on every request.
+STATIC_CONTENT_DISK_CACHE = None
+
+# Number of seconds a ConfigurationModel's current entry is cached in each process, on top of the
+# 'configuration' cache. A save is seen at once by the process making it and by others within this time.
+CONFIGURATION_PROCESS_CACHE_TIMEOUT = 5
+
 ############################ DJANGO_BUILTINS ################################
 # Change DEBUG/TEMPLATE_DEBUG in your environment settings files, not here
 DEBUG = False
@@ -414,6 +440,8 @@ if not EDX_PLATFORM_REVISION:
 # Static content
 STATIC_URL = '/static/' + EDX_PLATFORM_REVISION + "/"
 STATIC_ROOT = ENV_ROOT / "staticfiles" / EDX_PLATFORM_REVISION
+# Number of resolved static urls of courses kept in each process. 0 disables the cache.
+STATIC_URL_CACHE_SIZE = 10000
 
 STATICFILES_DIRS = [
     COMMON_ROOT / "static",
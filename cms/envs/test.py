@@ -108,6 +108,22 @@ update_module_store_settings(
     },
 )
 
+# Keep split modulestore query counts deterministic in tests
+SPLIT_STRUCTURE_CACHE_SIZE = 0
+SPLIT_DEFINITION_CACHE_SIZE = 0
+
+# Tests reset configuration by clearing the Django caches, which the process-local tier would outlive
+CONFIGURATION_PROCESS_CACHE_TIMEOUT = 0
+
+# Tests mock the country of the same IP addresses differently
+GEOIP_LOOKUP_CACHE_SIZE = 0
+
+# Tests mock the modulestore and static files storage differently for the same urls
+STATIC_URL_CACHE_SIZE = 0
+
+# Tests count the queries made to build course outlines
+COURSE_OUTLINE_CACHE_TIMEOUT = 0
+
 CONTENTSTORE = {
     'ENGINE': 'xmodule.contentstore.mongo.MongoContentStore',
     'DOC_STORE_CONFIG': {
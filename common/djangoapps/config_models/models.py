@@ -1,15 +1,52 @@
 """
 Django Model baseclass for database-backed configuration.
+
+The current configuration is looked up in three tiers before the database:
+
+* a per-request memo, so that a request sees one consistent configuration
+  and repeated lookups cost a dict access,
+* a process-local cache, whose entries live for CONFIGURATION_PROCESS_CACHE_TIMEOUT
+  seconds and are invalidated in this process as soon as a new entry is saved,
+* the 'configuration' Django cache, shared between processes.
 """
+import time
+from collections import Counter
+
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.cache import get_cache, InvalidCacheBackendError
 
+from request_cache.middleware import RequestCache
+
 try:
     cache = get_cache('configuration')  # pylint: disable=invalid-name
 except InvalidCacheBackendError:
     from django.core.cache import cache
 
+# cache key name -> (expiry time, version, configuration entry)
+_process_cache = {}  # pylint: disable=invalid-name
+# cache key name -> version, bumped by every save so stale process-local entries are ignored
+_versions = Counter()  # pylint: disable=invalid-name
+# (model name, tier) -> number of lookups served by that tier
+_lookups = Counter()  # pylint: disable=invalid-name
+
+REQUEST_TIER = 'request'
+PROCESS_TIER = 'process'
+SHARED_TIER = 'shared'
+DATABASE_TIER = 'database'
+TIERS = (REQUEST_TIER, PROCESS_TIER, SHARED_TIER, DATABASE_TIER)
+
+
+def _request_memo():
+    """
+    Return the dict in which to memoize configuration for the current request, or None outside of a request.
+    """
+    request_cache = RequestCache.get_request_cache()
+    if getattr(request_cache, 'request', None) is None:
+        return None
+    return request_cache.data
+
 
 class ConfigurationModel(models.Model):
     """
@@ -35,7 +72,13 @@ class ConfigurationModel(models.Model):
         Clear the cached value when saving a new configuration entry
         """
         super(ConfigurationModel, self).save(*args, **kwargs)
-        cache.delete(self.cache_key_name())
+        key_name = self.cache_key_name()
+        _versions[key_name] += 1
+        _process_cache.pop(key_name, None)
+        memo = _request_memo()
+        if memo is not None:
+            memo.pop(key_name, None)
+        cache.delete(key_name)
 
     @classmethod
     def cache_key_name(cls):
@@ -49,18 +92,61 @@ class ConfigurationModel(models.Model):
         from the database, or by creating a new empty entry (which is not
         persisted).
         """
-        cached = cache.get(cls.cache_key_name())
-        if cached is not None:
-            return cached
+        key_name = cls.cache_key_name()
+        memo = _request_memo()
+        if memo is not None and key_name in memo:
+            _lookups[(cls.__name__, REQUEST_TIER)] += 1
+            return memo[key_name]
+
+        current = cls._current_from_process_cache(key_name)
+        if current is not None:
+            _lookups[(cls.__name__, PROCESS_TIER)] += 1
+        else:
+            # Read the version before going to the shared cache, so that a save
+            # made meanwhile leaves the process-local entry stale
+            version = _versions[key_name]
+            current = cache.get(key_name)
+            if current is not None:
+                _lookups[(cls.__name__, SHARED_TIER)] += 1
+            else:
+                _lookups[(cls.__name__, DATABASE_TIER)] += 1
+                try:
+                    current = cls.objects.order_by('-change_date')[0]
+                except IndexError:
+                    current = cls()
 
-        try:
-            current = cls.objects.order_by('-change_date')[0]
-        except IndexError:
-            current = cls()
+                cache.set(key_name, current, cls.cache_timeout)
 
-        cache.set(cls.cache_key_name(), current, cls.cache_timeout)
+            timeout = getattr(settings, 'CONFIGURATION_PROCESS_CACHE_TIMEOUT', 0)
+            if timeout:
+                _process_cache[key_name] = (time.time() + timeout, version, current)
+
+        if memo is not None:
+            memo[key_name] = current
+        return current
+
+    @classmethod
+    def _current_from_process_cache(cls, key_name):
+        """
+        Return the configuration entry cached in this process, or None if there isn't a fresh one.
+        """
+        entry = _process_cache.get(key_name)
+        if entry is None:
+            return None
+        expires, version, current = entry
+        if expires < time.time() or version != _versions[key_name]:
+            return None
         return current
 
+    @classmethod
+    def lookup_counts(cls):
+        """
+        Return a dict of the number of lookups of the current configuration
+        served by each tier ('request', 'process', 'shared' and 'database')
+        since this process started.
+        """
+        return {tier: _lookups[(cls.__name__, tier)] for tier in TIERS}
+
     @classmethod
     def is_enabled(cls):
         """Returns True if this feature is configured as enabled, else False."""
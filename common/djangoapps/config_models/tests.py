@@ -5,11 +5,14 @@ Tests of ConfigurationModel
 from django.contrib.auth.models import User
 from django.db import models
 from django.test import TestCase
+from django.test.utils import override_settings
 
 from freezegun import freeze_time
 
-from mock import patch
+from mock import Mock, patch
+from config_models import models as config_models
 from config_models.models import ConfigurationModel
+from request_cache.middleware import RequestCache
 
 
 class ExampleConfig(ConfigurationModel):
@@ -75,3 +78,79 @@ class ConfigurationModelTests(TestCase):
         ExampleConfig.current()
 
         mock_cache.set.assert_called_with(ExampleConfig.cache_key_name(), first, 300)
+
+
+@override_settings(CONFIGURATION_PROCESS_CACHE_TIMEOUT=60)
+@patch('config_models.models.cache')
+class ConfigurationModelLocalCacheTests(TestCase):
+    """
+    Tests of the per-request and process-local tiers in front of the configuration cache
+    """
+    def setUp(self):
+        super(ConfigurationModelLocalCacheTests, self).setUp()
+        self.user = User()
+        self.user.save()
+        config_models._process_cache.clear()  # pylint: disable=protected-access
+        self.addCleanup(config_models._process_cache.clear)  # pylint: disable=protected-access
+        self.addCleanup(RequestCache().clear_request_cache)
+
+    def _lookups(self, tier):
+        """The number of lookups of ExampleConfig served by `tier`"""
+        return ExampleConfig.lookup_counts()[tier]
+
+    def test_process_cache(self, mock_cache):
+        mock_cache.get.return_value = None
+        ExampleConfig(changed_by=self.user, string_field='first').save()
+
+        database_lookups = self._lookups('database')
+        process_lookups = self._lookups('process')
+        self.assertEquals(ExampleConfig.current().string_field, 'first')
+        with self.assertNumQueries(0):
+            self.assertEquals(ExampleConfig.current().string_field, 'first')
+        self.assertEquals(mock_cache.get.call_count, 1)
+        self.assertEquals(self._lookups('database'), database_lookups + 1)
+        self.assertEquals(self._lookups('process'), process_lookups + 1)
+
+    def test_process_cache_expires(self, mock_cache):
+        mock_cache.get.return_value = None
+        with freeze_time('2012-01-01 00:00:00'):
+            ExampleConfig.current()
+        with freeze_time('2012-01-01 00:00:30'):
+            ExampleConfig.current()
+        self.assertEquals(mock_cache.get.call_count, 1)
+        with freeze_time('2012-01-01 00:01:01'):
+            ExampleConfig.current()
+        self.assertEquals(mock_cache.get.call_count, 2)
+
+    def test_save_invalidates_process_cache(self, mock_cache):
+        mock_cache.get.return_value = None
+        ExampleConfig(changed_by=self.user, string_field='first').save()
+        self.assertEquals(ExampleConfig.current().string_field, 'first')
+
+        ExampleConfig(changed_by=self.user, string_field='second').save()
+        self.assertEquals(ExampleConfig.current().string_field, 'second')
+
+    @override_settings(CONFIGURATION_PROCESS_CACHE_TIMEOUT=0)
+    def test_process_cache_disabled(self, mock_cache):
+        ExampleConfig.current()
+        ExampleConfig.current()
+        self.assertEquals(mock_cache.get.call_count, 2)
+
+    @override_settings(CONFIGURATION_PROCESS_CACHE_TIMEOUT=0)
+    def test_request_memo(self, mock_cache):
+        RequestCache().process_request(Mock())
+        request_lookups = self._lookups('request')
+        first = ExampleConfig.current()
+        self.assertIs(ExampleConfig.current(), first)
+        self.assertEquals(mock_cache.get.call_count, 1)
+        self.assertEquals(self._lookups('request'), request_lookups + 1)
+
+        # A save during the request is seen by the rest of the request
+        mock_cache.get.return_value = None
+        ExampleConfig(changed_by=self.user, string_field='second').save()
+        self.assertEquals(ExampleConfig.current().string_field, 'second')
+
+        # The memo doesn't outlive the request
+        RequestCache().process_response(Mock(), Mock())
+        ExampleConfig.current()
+        self.assertEquals(mock_cache.get.call_count, 3)
@@ -0,0 +1,154 @@
+"""
+Local on-disk tier for assets served by StaticContentServer.
+
+Assets too large for memcache used to be streamed out of GridFS on every request. Instead, the
+first request for such an asset copies it to a file on local disk, and every later request is
+streamed from that file in fixed size chunks, so neither Mongo nor the worker's memory is hit
+in proportion to the asset's size.
+
+Files are keyed by the asset's location and its ``last_modified_at``, so re-uploading an asset
+naturally misses the stale copy, which then ages out. The tier is bounded in bytes: whenever a
+file is added the least recently served files are removed until the budget is met.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+
+from django.conf import settings
+
+from xmodule.contentstore.content import StaticContentStream
+
+log = logging.getLogger(__name__)
+
+# Size of the chunks read from disk when streaming an asset
+DISK_CACHE_CHUNK_SIZE = 64 * 1024
+
+_DISK_CACHES = {}
+
+
+def get_asset_disk_cache():
+    """
+    Return the AssetDiskCache configured by settings.STATIC_CONTENT_DISK_CACHE, or None if
+    the tier is disabled.
+    """
+    config = getattr(settings, 'STATIC_CONTENT_DISK_CACHE', None)
+    if not config:
+        return None
+    root = config['ROOT']
+    if root not in _DISK_CACHES:
+        _DISK_CACHES[root] = AssetDiskCache(
+            root, config.get('MAX_BYTES', 1024 ** 3), min_size=config.get('MIN_SIZE', 1024 ** 2)
+        )
+    return _DISK_CACHES[root]
+
+
+class AssetDiskCache(object):
+    """
+    A directory of asset files bounded to `max_bytes`, holding assets of at least `min_size` bytes.
+    """
+    def __init__(self, root, max_bytes, min_size=0):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.min_size = min_size
+
+    def accepts(self, content):
+        """
+        Whether `content` should be served from this tier.
+        """
+        return (
+            content.length is not None and
+            content.last_modified_at is not None and
+            self.min_size <= content.length <= self.max_bytes
+        )
+
+    def path_for(self, content):
+        """
+        The file which holds the data of this version of `content`.
+        """
+        digest = hashlib.sha1(
+            u'{}|{}'.format(content.location, content.last_modified_at.isoformat()).encode('utf-8')
+        ).hexdigest()
+        return os.path.join(self.root, digest[:2], digest)
+
+    def get(self, content):
+        """
+        Return a StaticContentStream reading `content`'s data from disk, or None if it isn't cached.
+        """
+        path = self.path_for(content)
+        try:
+            stream = open(path, 'rb')
+        except IOError:
+            return None
+        try:
+            # record the access, which is what pruning orders by
+            os.utime(path, None)
+        except OSError:
+            pass
+        return StaticContentStream(
+            content.location, content.name, content.content_type, stream,
+            last_modified_at=content.last_modified_at, thumbnail_location=content.thumbnail_location,
+            import_path=content.import_path, length=content.length, locked=content.locked,
+            chunk_size=DISK_CACHE_CHUNK_SIZE,
+        )
+
+    def get_or_add(self, content):
+        """
+        Return `content` served from disk, first copying its data there if necessary.
+
+        `content` must be a StaticContentStream positioned at the start of its data, which is
+        consumed. Returns None if the data couldn't be cached.
+        """
+        cached = self.get(content)
+        if cached is not None:
+            content.close()
+            return cached
+
+        path = self.path_for(content)
+        directory = os.path.dirname(path)
+        temp_path = None
+        try:
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            # write to a temporary file and rename it into place so that concurrent readers
+            # (in this or other processes) never see a partially written asset
+            handle, temp_path = tempfile.mkstemp(dir=directory)
+            with os.fdopen(handle, 'wb') as temp_file:
+                for chunk in content.stream_data():
+                    temp_file.write(chunk)
+            os.rename(temp_path, path)
+        except (IOError, OSError):
+            log.exception(u"Unable to cache asset %s on local disk", content.location)
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None
+
+        content.close()
+        self.prune()
+        return self.get(content)
+
+    def prune(self):
+        """
+        Remove the least recently served files until the tier is within its budget.
+        """
+        files = []
+        total = 0
+        for directory, __, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        files.sort()
+        for __, size, path in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
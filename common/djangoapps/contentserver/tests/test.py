@@ -4,6 +4,9 @@ Tests for StaticContentServer
 import copy
 import ddt
 import logging
+import os
+import shutil
+import tempfile
 import unittest
 from uuid import uuid4
 
@@ -17,6 +20,7 @@ from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.xml_importer import import_course_from_xml
 
+from cache_toolbox.core import del_cached_content
 from contentserver.middleware import parse_range_header
 from student.models import CourseEnrollment
 
@@ -146,7 +150,7 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
 
     def test_range_request_multiple_ranges(self):
         """
-        Test that multiple ranges in request outputs the full content.
+        Test that multiple ranges in request outputs a multipart/byteranges message.
         """
         first_byte = self.length_unlocked / 4
         last_byte = self.length_unlocked / 2
@@ -154,10 +158,60 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
             first=first_byte, last=last_byte)
         )
 
-        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.status_code, 206)  # HTTP_206_PARTIAL_CONTENT
         self.assertNotIn('Content-Range', resp)
+        self.assertTrue(resp['Content-Type'].startswith('multipart/byteranges; boundary='))
+        self.assertEqual(resp['Content-Length'], str(len(resp.content)))
+        self.assertIn('Content-Range: bytes {first}-{last}/{length}'.format(
+            first=first_byte, last=last_byte, length=self.length_unlocked), resp.content)
+        self.assertIn('Content-Range: bytes {first}-{last}/{length}'.format(
+            first=self.length_unlocked - 100, last=self.length_unlocked - 1, length=self.length_unlocked), resp.content)
+
+    def test_etag(self):
+        """
+        Test that a request with a matching If-None-Match outputs 304 Not Modified.
+        """
+        resp = self.client.get(self.url_unlocked)
+        etag = resp['ETag']
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp['ETag'], etag)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(resp.status_code, 200)
+
+    def test_if_range_mismatch(self):
+        """
+        Test that a Range conditioned on an out of date ETag returns the full content.
+        """
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(resp.status_code, 200)
         self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
 
+    def test_disk_cache(self):
+        """
+        Test that assets are served from the local disk tier when it's enabled.
+        """
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        full_content = self.client.get(self.url_unlocked).content
+        # the asset is small enough to have been put in memcache, which is consulted first
+        del_cached_content(self.unlocked_asset)
+
+        with override_settings(STATIC_CONTENT_DISK_CACHE={'ROOT': root, 'MAX_BYTES': 1024 ** 2, 'MIN_SIZE': 0}):
+            for __ in range(2):
+                resp = self.client.get(self.url_unlocked)
+                self.assertEqual(resp.status_code, 200)
+                self.assertEqual(resp.content, full_content)
+
+            resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=1-2')
+            self.assertEqual(resp.status_code, 206)
+            self.assertEqual(resp.content, full_content[1:3])
+
+        cached_files = [name for __, __, names in os.walk(root) for name in names]
+        self.assertEqual(len(cached_files), 1)
+
     @ddt.data(
         'bytes 0-',
         'bits=0-',
@@ -11,6 +11,7 @@ file and check it in at the same time as your model changes. To do that,
 3. Add the migration file created in edx-platform/common/djangoapps/embargo/migrations/
 """
 
+import bisect
 import ipaddr
 import json
 import logging
@@ -675,10 +676,29 @@ class IPFilter(ConfigurationModel):
     class IPFilterList(object):
         """
         Represent a list of IP addresses with support of networks.
+
+        The networks are compiled into sorted, non-overlapping intervals of
+        addresses for each IP version, so membership is a binary search
+        rather than a scan of every network.
         """
 
         def __init__(self, ips):
             self.networks = [ipaddr.IPNetwork(ip) for ip in ips]
+            # IP version -> (interval start addresses, interval end addresses)
+            self._intervals = {}
+            for version in set(network.version for network in self.networks):
+                starts, ends = [], []
+                for network in sorted(
+                        (int(network.network), int(network.broadcast))
+                        for network in self.networks if network.version == version
+                ):
+                    start, end = network
+                    if starts and start <= ends[-1] + 1:
+                        ends[-1] = max(ends[-1], end)
+                    else:
+                        starts.append(start)
+                        ends.append(end)
+                self._intervals[version] = (starts, ends)
 
         def __iter__(self):
             for network in self.networks:
@@ -690,11 +710,31 @@ class IPFilter(ConfigurationModel):
             except ValueError:
                 return False
 
-            for network in self.networks:
-                if network.Contains(ip):
-                    return True
+            if ip.version not in self._intervals:
+                return False
+            starts, ends = self._intervals[ip.version]
+            ip = int(ip)
+            index = bisect.bisect_right(starts, ip) - 1
+            return index >= 0 and ip <= ends[index]
 
-            return False
+    # comma-separated list of IP addresses -> compiled IPFilterList
+    _compiled_lists = {}
+    # The most lists kept compiled, which allows for a handful of versions of the filter
+    _max_compiled_lists = 16
+
+    @classmethod
+    def _ip_filter_list(cls, ips):
+        """
+        Return the IPFilterList of the comma-separated list of IP addresses `ips`,
+        compiling it only the first time this version of the list is seen.
+        """
+        compiled = cls._compiled_lists.get(ips)
+        if compiled is None:
+            compiled = cls.IPFilterList([addr.strip() for addr in ips.split(',')])
+            if len(cls._compiled_lists) >= cls._max_compiled_lists:
+                cls._compiled_lists.clear()
+            cls._compiled_lists[ips] = compiled
+        return compiled
 
     @property
     def whitelist_ips(self):
@@ -703,7 +743,7 @@ class IPFilter(ConfigurationModel):
         """
         if self.whitelist == '':
             return []
-        return self.IPFilterList([addr.strip() for addr in self.whitelist.split(',')])  # pylint: disable=no-member
+        return self._ip_filter_list(self.whitelist)
 
     @property
     def blacklist_ips(self):
@@ -712,4 +752,4 @@ class IPFilter(ConfigurationModel):
         """
         if self.blacklist == '':
             return []
-        return self.IPFilterList([addr.strip() for addr in self.blacklist.split(',')])  # pylint: disable=no-member
+        return self._ip_filter_list(self.blacklist)
@@ -100,6 +100,26 @@ class EmbargoModelsTest(TestCase):
         self.assertTrue('1.1.1.0' in cblacklist)
         self.assertFalse('1.2.0.0' in cblacklist)
 
+    def test_ip_overlapping_networks(self):
+        whitelist = '1.0.0.0/16, 1.0.1.0/24, 1.1.0.0/16, 10.0.0.5, 2001:db8::/32'
+
+        IPFilter(whitelist=whitelist).save()
+
+        cwhitelist = IPFilter.current().whitelist_ips
+        self.assertTrue('1.0.1.1' in cwhitelist)
+        self.assertTrue('1.1.255.255' in cwhitelist)
+        self.assertFalse('1.2.0.0' in cwhitelist)
+        self.assertTrue('10.0.0.5' in cwhitelist)
+        self.assertFalse('10.0.0.4' in cwhitelist)
+        self.assertFalse('0.255.255.255' in cwhitelist)
+        self.assertTrue('2001:db8::1' in cwhitelist)
+        self.assertFalse('2001:db9::1' in cwhitelist)
+        self.assertFalse('not an ip' in cwhitelist)
+        self.assertEqual(len(list(cwhitelist)), 5)
+
+        # The compiled list is reused for the same version of the filter
+        self.assertIs(IPFilter.current().whitelist_ips, cwhitelist)
+
 
 class RestrictedCourseTest(TestCase):
     """Test RestrictedCourse model. """
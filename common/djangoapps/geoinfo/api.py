@@ -0,0 +1,73 @@
+"""
+Look up the country of origin of IP addresses.
+
+The GeoIP databases are opened once per process and memory-mapped, rather than
+re-read for every lookup, and the results of recent lookups are kept in a small
+LRU cache of GEOIP_LOOKUP_CACHE_SIZE entries.
+"""
+import threading
+from collections import OrderedDict
+
+import pygeoip
+from django.conf import settings
+
+_READERS = {}
+_READERS_LOCK = threading.Lock()
+
+_LOOKUPS = OrderedDict()
+_LOOKUPS_LOCK = threading.Lock()
+
+
+def get_geoip_reader(path):
+    """
+    Return the process-wide GeoIP reader of the database at `path`.
+    """
+    reader = _READERS.get(path)
+    if reader is None:
+        with _READERS_LOCK:
+            reader = _READERS.get(path)
+            if reader is None:
+                reader = _READERS[path] = pygeoip.GeoIP(path, pygeoip.MMAP_CACHE)
+    return reader
+
+
+def country_code_from_ip(ip_addr):
+    """
+    Return the country code associated with an IP address.
+    Handles both IPv4 and IPv6 addresses.
+
+    Args:
+        ip_addr (str): The IP address to look up.
+
+    Returns:
+        str: A 2-letter country code.
+
+    """
+    max_size = getattr(settings, 'GEOIP_LOOKUP_CACHE_SIZE', 0)
+    if max_size:
+        with _LOOKUPS_LOCK:
+            country_code = _LOOKUPS.pop(ip_addr, None)
+            if country_code is not None:
+                # re-insert to mark as most recently used
+                _LOOKUPS[ip_addr] = country_code
+                return country_code
+
+    if ip_addr.find(':') >= 0:
+        country_code = get_geoip_reader(settings.GEOIPV6_PATH).country_code_by_addr(ip_addr)
+    else:
+        country_code = get_geoip_reader(settings.GEOIP_PATH).country_code_by_addr(ip_addr)
+
+    if max_size and country_code is not None:
+        with _LOOKUPS_LOCK:
+            _LOOKUPS[ip_addr] = country_code
+            while len(_LOOKUPS) > max_size:
+                _LOOKUPS.popitem(last=False)
+    return country_code
+
+
+def clear_lookup_cache():
+    """
+    Forget the results of recent lookups.
+    """
+    with _LOOKUPS_LOCK:
+        _LOOKUPS.clear()
@@ -0,0 +1,52 @@
+"""
+Tests for the geoinfo API.
+"""
+from mock import patch
+import pygeoip
+
+from django.conf import settings
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from geoinfo.api import clear_lookup_cache, country_code_from_ip, get_geoip_reader
+
+
+class CountryCodeFromIpTests(TestCase):
+    """
+    Tests of country_code_from_ip.
+    """
+    def setUp(self):
+        super(CountryCodeFromIpTests, self).setUp()
+        clear_lookup_cache()
+        self.addCleanup(clear_lookup_cache)
+        self.patcher = patch.object(pygeoip.GeoIP, 'country_code_by_addr', return_value='CN')
+        self.mock_country_code_by_addr = self.patcher.start()
+        self.addCleanup(self.patcher.stop)
+
+    def test_reader_is_shared(self):
+        self.assertIs(get_geoip_reader(settings.GEOIP_PATH), get_geoip_reader(settings.GEOIP_PATH))
+        self.assertIsNot(get_geoip_reader(settings.GEOIP_PATH), get_geoip_reader(settings.GEOIPV6_PATH))
+
+    def test_lookup(self):
+        self.assertEqual(country_code_from_ip('117.79.83.1'), 'CN')
+        self.assertEqual(country_code_from_ip('2001:da8:20f:1502:edcf:550b:4a9c:207d'), 'CN')
+
+    @override_settings(GEOIP_LOOKUP_CACHE_SIZE=2)
+    def test_lookup_cache(self):
+        country_code_from_ip('117.79.83.1')
+        country_code_from_ip('117.79.83.2')
+        country_code_from_ip('117.79.83.1')
+        self.assertEqual(self.mock_country_code_by_addr.call_count, 2)
+
+        # The least recently used address is evicted
+        country_code_from_ip('117.79.83.3')
+        country_code_from_ip('117.79.83.2')
+        self.assertEqual(self.mock_country_code_by_addr.call_count, 4)
+        country_code_from_ip('117.79.83.3')
+        self.assertEqual(self.mock_country_code_by_addr.call_count, 4)
+
+    @override_settings(GEOIP_LOOKUP_CACHE_SIZE=0)
+    def test_lookup_cache_disabled(self):
+        country_code_from_ip('117.79.83.1')
+        country_code_from_ip('117.79.83.1')
+        self.assertEqual(self.mock_country_code_by_addr.call_count, 2)
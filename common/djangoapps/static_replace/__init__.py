@@ -1,5 +1,7 @@
 import logging
 import re
+import threading
+from collections import OrderedDict
 
 from staticfiles.storage import staticfiles_storage
 from staticfiles import finders
@@ -13,6 +15,15 @@ from opaque_keys.edx.locator import AssetLocator
 
 log = logging.getLogger(__name__)
 
+# The urls which static urls of courses most recently resolved to, keyed by
+# (course_id, data_directory, static_asset_path, prefix, rest). At most STATIC_URL_CACHE_SIZE
+# are kept, least recently used first.
+_STATIC_URLS = OrderedDict()
+_STATIC_URLS_LOCK = threading.Lock()
+
+# Compiled regexes of replace_urls, keyed by the prefixes they match
+_URL_REGEXES = {}
+
 
 def _url_replace_regex(prefix):
     """
@@ -137,6 +148,98 @@ def make_static_urls_absolute(request, html):
     )
 
 
+def _resolve_static_url(prefix, rest, data_directory, course_id, static_asset_path):
+    """
+    Return the url which the static url `prefix` + `rest` of the course refers to.
+    """
+    # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
+    if (not static_asset_path) \
+            and course_id \
+            and modulestore().get_modulestore_type(course_id) != ModuleStoreEnum.Type.xml:
+        # first look in the static file pipeline and see if we are trying to reference
+        # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
+
+        exists_in_staticfiles_storage = False
+        try:
+            exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
+        except Exception as err:
+            log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
+                rest, str(err)))
+
+        if exists_in_staticfiles_storage:
+            url = staticfiles_storage.url(rest)
+        else:
+            # if not, then assume it's courseware specific content and then look in the
+            # Mongo-backed database
+            url = StaticContent.convert_legacy_static_url_with_course_id(rest, course_id)
+
+            if AssetLocator.CANONICAL_NAMESPACE in url:
+                url = url.replace('block@', 'block/', 1)
+
+    # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
+    else:
+        course_path = "/".join((static_asset_path or data_directory, rest))
+
+        try:
+            if staticfiles_storage.exists(rest):
+                url = staticfiles_storage.url(rest)
+            else:
+                url = staticfiles_storage.url(course_path)
+        # And if that fails, assume that it's course content, and add manually data directory
+        except Exception as err:
+            log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
+                rest, str(err)))
+            url = "".join([prefix, course_path])
+
+    return url
+
+
+def _replace_static_url(original, prefix, quote, rest, data_directory, course_id, static_asset_path):
+    """
+    Replace a single matched static url.
+
+    The urls of a course's static urls depend only on the course's modulestore and the
+    static files deployed with this process, so they are resolved once and then cached.
+    """
+    # Don't mess with things that end in '?raw'
+    if rest.endswith('?raw'):
+        return original
+
+    # In debug mode, if we can find the url as is,
+    if settings.DEBUG and finders.find(rest, True):
+        return original
+
+    cache_size = getattr(settings, 'STATIC_URL_CACHE_SIZE', 0) if course_id else 0
+    if not cache_size:
+        return "".join([quote, _resolve_static_url(prefix, rest, data_directory, course_id, static_asset_path), quote])
+
+    key = (course_id, data_directory, static_asset_path, prefix, rest)
+    with _STATIC_URLS_LOCK:
+        url = _STATIC_URLS.pop(key, None)
+        if url is not None:
+            # re-insert to mark as most recently used
+            _STATIC_URLS[key] = url
+    if url is None:
+        url = _resolve_static_url(prefix, rest, data_directory, course_id, static_asset_path)
+        with _STATIC_URLS_LOCK:
+            _STATIC_URLS[key] = url
+            while len(_STATIC_URLS) > cache_size:
+                _STATIC_URLS.popitem(last=False)
+    return "".join([quote, url, quote])
+
+
+def clear_static_url_cache(course_id=None):
+    """
+    Forget the cached urls of the static urls of the course `course_id`, or of every course.
+    """
+    with _STATIC_URLS_LOCK:
+        if course_id is None:
+            _STATIC_URLS.clear()
+        else:
+            for key in [key for key in _STATIC_URLS if key[0] == course_id]:
+                del _STATIC_URLS[key]
+
+
 def replace_static_urls(text, data_directory=None, course_id=None, static_asset_path=''):
     """
     Replace /static/$stuff urls either with their correct url as generated by collectstatic,
@@ -154,52 +257,81 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
         """
         Replace a single matched url.
         """
-        # Don't mess with things that end in '?raw'
-        if rest.endswith('?raw'):
-            return original
+        return _replace_static_url(original, prefix, quote, rest, data_directory, course_id, static_asset_path)
 
-        # In debug mode, if we can find the url as is,
-        if settings.DEBUG and finders.find(rest, True):
-            return original
-        # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
-        elif (not static_asset_path) \
-                and course_id \
-                and modulestore().get_modulestore_type(course_id) != ModuleStoreEnum.Type.xml:
-            # first look in the static file pipeline and see if we are trying to reference
-            # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
-
-            exists_in_staticfiles_storage = False
-            try:
-                exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
-            except Exception as err:
-                log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
-                    rest, str(err)))
-
-            if exists_in_staticfiles_storage:
-                url = staticfiles_storage.url(rest)
-            else:
-                # if not, then assume it's courseware specific content and then look in the
-                # Mongo-backed database
-                url = StaticContent.convert_legacy_static_url_with_course_id(rest, course_id)
+    return process_static_urls(text, replace_static_url, data_dir=static_asset_path or data_directory)
 
-                if AssetLocator.CANONICAL_NAMESPACE in url:
-                    url = url.replace('block@', 'block/', 1)
 
-        # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
-        else:
-            course_path = "/".join((static_asset_path or data_directory, rest))
+def _url_regex(data_dir, jump_to_id):
+    """
+    Return the compiled regex matching the static, course, and (if `jump_to_id`)
+    jump_to_id urls replaced by replace_urls, in one alternation, and the compiled
+    regex matching the prefixes of those urls.
+    """
+    key = (settings.STATIC_URL, data_dir, jump_to_id)
+    regexes = _URL_REGEXES.get(key)
+    if regexes is None:
+        prefixes = [
+            u'(?P<static>(?:{static_url}|/static/)(?!{data_dir}))'.format(
+                static_url=settings.STATIC_URL,
+                data_dir=data_dir
+            ),
+            u'(?P<course>/course/)',
+        ]
+        if jump_to_id:
+            prefixes.append(u'(?P<jump_to_id>/jump_to_id/)')
+        prefix = u'|'.join(prefixes)
+        regexes = _URL_REGEXES[key] = (re.compile(_url_replace_regex(prefix)), re.compile(prefix))
+    return regexes
+
+
+def replace_urls(text, course_id, jump_to_id_base_url=None, data_directory=None, static_asset_path=''):
+    """
+    Apply replace_static_urls, replace_course_urls and, if `jump_to_id_base_url` is
+    given, replace_jump_to_id_urls to `text`, in a single pass over it.
+
+    text: The content over which to perform the subtitutions
+    course_id: The course_id in which this rewrite happens
+    jump_to_id_base_url: The base url of jump_to_id urls, see replace_jump_to_id_urls
+    data_directory, static_asset_path: see replace_static_urls
+
+    output: <text> after the link rewriting rules are applied
+    """
+    def replace_in_order(text):
+        """
+        Apply the replacements to `text` in separate passes.
+        """
+        text = replace_static_urls(text, data_directory, course_id, static_asset_path=static_asset_path)
+        text = replace_course_urls(text, course_id)
+        if jump_to_id_base_url is not None:
+            text = replace_jump_to_id_urls(text, course_id, jump_to_id_base_url)
+        return text
 
-            try:
-                if staticfiles_storage.exists(rest):
-                    url = staticfiles_storage.url(rest)
-                else:
-                    url = staticfiles_storage.url(course_path)
-            # And if that fails, assume that it's course content, and add manually data directory
-            except Exception as err:
-                log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
-                    rest, str(err)))
-                url = "".join([prefix, course_path])
+    # The replacements are the same as those of the separate passes unless the urls overlap:
+    # one url's closing quote opens another, or a url contains (possibly escaped) quotes.
+    overlapping = []
 
-        return "".join([quote, url, quote])
+    def replace_url(match):
+        """
+        Replace a single matched url.
+        """
+        original = match.group(0)
+        quote = match.group('quote')
+        rest = match.group('rest')
+        if "'" in rest or '"' in rest or '\\' in rest or url_start.match(match.string, match.end()):
+            overlapping.append(match)
+            return original
+        if match.group('static') is not None:
+            return _replace_static_url(
+                original, match.group('prefix'), quote, rest, data_directory, course_id, static_asset_path
+            )
+        elif match.group('course') is not None:
+            return "".join([quote, '/courses/' + course_id.to_deprecated_string() + '/', rest, quote])
+        else:
+            return "".join([quote, jump_to_id_base_url + rest, quote])
 
-    return process_static_urls(text, replace_static_url, data_dir=static_asset_path or data_directory)
+    regex, url_start = _url_regex(static_asset_path or data_directory, jump_to_id_base_url is not None)
+    replaced = regex.sub(replace_url, text)
+    if overlapping:
+        return replace_in_order(text)
+    return replaced
@@ -1,9 +1,13 @@
 import re
 
+from django.test.utils import override_settings
 from nose.tools import assert_equals, assert_true, assert_false  # pylint: disable=no-name-in-module
 from static_replace import (
     replace_static_urls,
     replace_course_urls,
+    replace_jump_to_id_urls,
+    replace_urls,
+    clear_static_url_cache,
     _url_replace_regex,
     process_static_urls,
     make_static_urls_absolute
@@ -143,6 +147,49 @@ def test_static_url_with_query(mock_modulestore, mock_storage):
     assert_equals(post_text, replace_static_urls(pre_text, DATA_DIRECTORY, COURSE_KEY))
 
 
+@patch('static_replace.staticfiles_storage')
+@patch('static_replace.modulestore')
+def test_replace_urls(mock_modulestore, mock_storage):
+    """
+    Make sure that replacing all the urls in one pass gives the same result as separate passes
+    """
+    mock_storage.exists.return_value = False
+    mock_modulestore.return_value = Mock(MongoModuleStore)
+    jump_to_id_base_url = '/courses/org/course/run/jump_to_id/'
+
+    for text in (
+            '<img src="/static/file.png"/><a href="/course/info">info</a><a href=\'/jump_to_id/abc\'>abc</a>',
+            # urls overlapping each other
+            '<a href="/course/info"/static/file.png"/jump_to_id/abc">',
+            '<a href="/course/info \'/static/file.png\'">',
+    ):
+        expected = replace_static_urls(text, DATA_DIRECTORY, COURSE_KEY)
+        expected = replace_course_urls(expected, COURSE_KEY)
+        expected = replace_jump_to_id_urls(expected, COURSE_KEY, jump_to_id_base_url)
+        assert_equals(expected, replace_urls(text, COURSE_KEY, jump_to_id_base_url, DATA_DIRECTORY))
+
+
+@override_settings(STATIC_URL_CACHE_SIZE=10)
+@patch('static_replace.staticfiles_storage')
+@patch('static_replace.modulestore')
+def test_static_url_cache(mock_modulestore, mock_storage):
+    """
+    Make sure that the static urls of a course are only resolved again once the course's cache is cleared
+    """
+    mock_storage.exists.return_value = False
+    mock_modulestore.return_value = Mock(MongoModuleStore)
+    clear_static_url_cache()
+
+    expected = replace_static_urls(STATIC_SOURCE, DATA_DIRECTORY, COURSE_KEY)
+    assert_equals(expected, replace_static_urls(STATIC_SOURCE, DATA_DIRECTORY, COURSE_KEY))
+    assert_equals(mock_storage.exists.call_count, 1)
+
+    clear_static_url_cache(COURSE_KEY)
+    assert_equals(expected, replace_static_urls(STATIC_SOURCE, DATA_DIRECTORY, COURSE_KEY))
+    assert_equals(mock_storage.exists.call_count, 2)
+    clear_static_url_cache()
+
+
 def test_regex():
     yes = ('"/static/foo.png"',
            '"/static/foo.png"',
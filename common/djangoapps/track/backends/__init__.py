@@ -26,3 +26,14 @@ class BaseBackend(object):
     def send(self, event):
         """Send event to tracker."""
         pass
+
+    def send_many(self, events):
+        """
+        Send a batch of events to tracker.
+
+        Backends which can store several events in one operation should
+        override this; by default each event is sent individually.
+
+        """
+        for event in events:
+            self.send(event)
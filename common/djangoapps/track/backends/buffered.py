@@ -0,0 +1,206 @@
+"""
+Event tracker backend that buffers events in memory and hands them to
+another backend in batches from a background thread, taking event I/O
+off the request path.
+
+Example configuration::
+
+  TRACKING_BACKENDS = {
+      'mongo': {
+          'ENGINE': 'track.backends.buffered.BufferedBackend',
+          'OPTIONS': {
+              'backend': {
+                  'ENGINE': 'track.backends.mongodb.MongoBackend',
+                  'OPTIONS': {'database': 'track'},
+              },
+              'batch_size': 100,
+              'flush_interval': 1.0,
+              'max_queue_size': 10000,
+              'overflow_policy': 'drop_newest',
+          }
+      }
+  }
+
+"""
+
+from __future__ import absolute_import
+
+import atexit
+import logging
+import os
+import threading
+import time
+import Queue
+
+from dogapi import dog_stats_api
+
+from track.backends import BaseBackend
+
+
+log = logging.getLogger(__name__)
+
+# What to do with an event when the queue is full
+DROP_NEWEST = 'drop_newest'
+DROP_OLDEST = 'drop_oldest'
+BLOCK = 'block'
+OVERFLOW_POLICIES = (DROP_NEWEST, DROP_OLDEST, BLOCK)
+
+
+class BufferedBackend(BaseBackend):
+    """
+    Event tracker backend that queues events and sends them to the
+    wrapped backend in batches using its `send_many`.
+
+    """
+    def __init__(self, backend, batch_size=100, flush_interval=1.0, max_queue_size=10000,
+                 overflow_policy=DROP_NEWEST, block_timeout=0.1, **kwargs):
+        """
+        :Parameters:
+
+          - `backend`: dict with the 'ENGINE' and (optional) 'OPTIONS' of
+            the backend which actually stores the events
+          - `batch_size`: maximum number of events sent in one batch
+          - `flush_interval`: maximum number of seconds an event waits in
+            the queue before being sent
+          - `max_queue_size`: maximum number of events held in memory
+          - `overflow_policy`: what to do with events once the queue is
+            full: 'drop_newest' discards the new event, 'drop_oldest'
+            discards the oldest queued event to make room, and 'block'
+            waits up to `block_timeout` seconds for room before discarding
+            the new event
+
+        """
+        super(BufferedBackend, self).__init__(**kwargs)
+
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError('Invalid overflow policy {0}'.format(overflow_policy))
+
+        # Imported here since the tracker instantiates its backends on import
+        from track.tracker import _instantiate_backend_from_name
+        self.backend = _instantiate_backend_from_name(backend['ENGINE'], backend.get('OPTIONS', {}))
+
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._stopping = threading.Event()
+
+        atexit.register(self.close)
+
+    def _ensure_worker(self):
+        """
+        Start the background thread, unless it is already running in this
+        process. Threads don't survive a fork, so pre-forked workers each
+        start their own on the first event they send.
+
+        """
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                # Events queued by a parent process belong to that process
+                self._queue = Queue.Queue(self.max_queue_size)
+                self._pid = os.getpid()
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='track-buffered-backend')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def send(self, event):
+        """Queue the event to be sent in the next batch."""
+        self._ensure_worker()
+        try:
+            if self.overflow_policy == BLOCK:
+                self._queue.put(event, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(event)
+            return
+        except Queue.Full:
+            pass
+
+        if self.overflow_policy == DROP_OLDEST:
+            try:
+                self._queue.get_nowait()
+            except Queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(event)
+            except Queue.Full:
+                pass
+            else:
+                dog_stats_api.increment('track.buffered.dropped', tags=['policy:{0}'.format(self.overflow_policy)])
+                return
+
+        dog_stats_api.increment('track.buffered.dropped', tags=['policy:{0}'.format(self.overflow_policy)])
+
+    def _next_batch(self, timeout):
+        """
+        Wait up to `timeout` seconds for an event, then collect up to
+        `batch_size` events arriving within `flush_interval` of it.
+
+        """
+        try:
+            batch = [self._queue.get(timeout=timeout)]
+        except Queue.Empty:
+            return []
+
+        deadline = time.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.time()
+            try:
+                if remaining > 0 and not self._stopping.is_set():
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except Queue.Empty:
+                break
+        return batch
+
+    def _send_batch(self, batch):
+        """Hand a batch to the wrapped backend, never letting an error kill the worker."""
+        dog_stats_api.histogram('track.buffered.batch_size', len(batch))
+        try:
+            with dog_stats_api.timer('track.buffered.send_many'):
+                self.backend.send_many(batch)
+        except Exception:  # pylint: disable=broad-except
+            log.exception('Error sending a batch of %d events', len(batch))
+
+    def _run(self):
+        """Body of the background thread."""
+        while not self._stopping.is_set():
+            batch = self._next_batch(self.flush_interval)
+            if batch:
+                self._send_batch(batch)
+        self.flush()
+
+    def flush(self):
+        """Synchronously send every event queued by this process."""
+        if self._queue is None or self._pid != os.getpid():
+            return
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except Queue.Empty:
+                    break
+            if not batch:
+                return
+            self._send_batch(batch)
+
+    def close(self, timeout=5.0):
+        """Stop the background thread, sending any queued events first."""
+        self._stopping.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            thread.join(timeout)
+        else:
+            self.flush()
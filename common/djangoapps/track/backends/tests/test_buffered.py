@@ -0,0 +1,66 @@
+from __future__ import absolute_import
+
+import os
+import Queue
+
+from django.test import TestCase
+from mock import patch
+
+from track.backends import BaseBackend
+from track.backends.buffered import BufferedBackend
+
+
+class BatchingDummyBackend(BaseBackend):
+    """Dummy backend recording the batches it is sent."""
+    def __init__(self, **options):
+        super(BatchingDummyBackend, self).__init__(**options)
+        self.batches = []
+
+    def send(self, event):
+        self.batches.append([event])
+
+    def send_many(self, events):
+        self.batches.append(list(events))
+
+
+WRAPPED_BACKEND = {'ENGINE': 'track.backends.tests.test_buffered.BatchingDummyBackend'}
+
+
+class TestBufferedBackend(TestCase):
+    def test_events_sent_in_batches(self):
+        backend = BufferedBackend(WRAPPED_BACKEND, batch_size=2, flush_interval=0.01)
+        events = [{'test': index} for index in range(5)]
+        for event in events:
+            backend.send(event)
+        backend.close()
+
+        batches = backend.backend.batches
+        self.assertTrue(all(len(batch) <= 2 for batch in batches))
+        self.assertEqual([event for batch in batches for event in batch], events)
+
+    def _queued_backend(self, overflow_policy):
+        """Return a BufferedBackend with a queue of 2 events and no worker thread."""
+        backend = BufferedBackend(WRAPPED_BACKEND, max_queue_size=2, overflow_policy=overflow_policy, block_timeout=0)
+        backend._queue = Queue.Queue(2)  # pylint: disable=protected-access
+        backend._pid = os.getpid()  # pylint: disable=protected-access
+        return backend
+
+    @patch.object(BufferedBackend, '_ensure_worker')
+    def test_drop_newest(self, _ensure_worker):
+        backend = self._queued_backend('drop_newest')
+        for index in range(3):
+            backend.send({'test': index})
+        backend.flush()
+        self.assertEqual(backend.backend.batches, [[{'test': 0}, {'test': 1}]])
+
+    @patch.object(BufferedBackend, '_ensure_worker')
+    def test_drop_oldest(self, _ensure_worker):
+        backend = self._queued_backend('drop_oldest')
+        for index in range(3):
+            backend.send({'test': index})
+        backend.flush()
+        self.assertEqual(backend.backend.batches, [[{'test': 1}, {'test': 2}]])
+
+    def test_invalid_overflow_policy(self):
+        with self.assertRaises(ValueError):
+            BufferedBackend(WRAPPED_BACKEND, overflow_policy='explode')
@@ -7,6 +7,9 @@ Uses pyparsing to parse. Main function as of now is evaluator().
 import math
 import operator
 import numbers
+import threading
+from collections import OrderedDict
+
 import numpy
 import scipy.constants
 import functions
@@ -50,6 +53,11 @@ DEFAULT_FUNCTIONS = {
     'arccsch': functions.arccsch,
     'arccoth': functions.arccoth
 }
+# The default functions which aren't NumPy ufuncs, but still apply element-wise to arrays
+ELEMENTWISE_FUNCTIONS = frozenset([
+    functions.sec, functions.csc, functions.cot, functions.arcsec, functions.arccsc,
+    functions.sech, functions.csch, functions.coth, functions.arcsech, functions.arccsch, functions.arccoth,
+])
 DEFAULT_VARIABLES = {
     'i': numpy.complex(0, 1),
     'j': numpy.complex(0, 1),
@@ -73,6 +81,13 @@ SUFFIXES = {
 }
 
 
+# Number of parsed expressions kept by `parse_expression`
+PARSE_CACHE_SIZE = 1024
+
+_PARSED_EXPRESSIONS = OrderedDict()
+_PARSED_EXPRESSIONS_LOCK = threading.Lock()
+
+
 class UndefinedVariable(Exception):
     """
     Indicate when a student inputs a variable which was not expected.
@@ -228,34 +243,351 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
     if math_expr.strip() == "":
         return float('nan')
 
-    # Parse the tree.
-    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
-    math_interpreter.parse_algebra()
+    # Parse the tree, or reuse the one compiled for an earlier call.
+    compiled = compile_expression(math_expr, case_sensitive)
 
     # Get our variables together.
     all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
 
     # ...and check them
-    math_interpreter.check_variables(all_variables, all_functions)
+    compiled.check_variables(all_variables, all_functions)
 
-    # Create a recursion to evaluate the tree.
-    if case_sensitive:
-        casify = lambda x: x
-    else:
-        casify = lambda x: x.lower()  # Lowercase for case insens.
+    return compiled.evaluate(all_variables, all_functions)
+
+
+def parse_expression(math_expr, case_sensitive=False):
+    """
+    Return the ParseAugmenter of `math_expr`, already parsed.
+
+    The most recently used PARSE_CACHE_SIZE expressions are kept, so that
+    evaluating or previewing the same expression again doesn't parse it again.
+    The returned ParseAugmenter is shared, and must not be modified.
+    """
+    key = (math_expr, case_sensitive)
+    with _PARSED_EXPRESSIONS_LOCK:
+        parsed = _PARSED_EXPRESSIONS.pop(key, None)
+        if parsed is not None:
+            # Re-insert to mark as most recently used.
+            _PARSED_EXPRESSIONS[key] = parsed
+            return parsed
+
+    parsed = ParseAugmenter(math_expr, case_sensitive)
+    parsed.parse_algebra()
+    with _PARSED_EXPRESSIONS_LOCK:
+        _PARSED_EXPRESSIONS[key] = parsed
+        while len(_PARSED_EXPRESSIONS) > PARSE_CACHE_SIZE:
+            _PARSED_EXPRESSIONS.popitem(last=False)
+    return parsed
+
+
+def clear_parse_cache():
+    """
+    Forget the expressions kept by `parse_expression`.
+    """
+    with _PARSED_EXPRESSIONS_LOCK:
+        _PARSED_EXPRESSIONS.clear()
+
+
+def compile_expression(math_expr, case_sensitive=False):
+    """
+    Return the CompiledExpression of `math_expr`, which is compiled once for
+    as long as its parse is kept by `parse_expression`.
+    """
+    return parse_expression(math_expr, case_sensitive).compile()
+
+
+def evaluate_many(expressions, variables=None, functions=None, case_sensitive=False):
+    """
+    Evaluate each of `expressions` with the same variables and functions, as
+    `evaluator` would, and return the list of their values.
+
+    This is meant for evaluating many stored answers at once, e.g. when rescoring:
+    the defaults are merged in only once, each distinct expression is only parsed
+    once, and the expressions don't displace those kept by `parse_expression`.
+    An expression which can't be evaluated doesn't stop the others; the exception
+    it raised is returned in place of its value.
+    """
+    all_variables, all_functions = add_defaults(variables or {}, functions or {}, case_sensitive)
+    compiled = {}
+    results = []
+    for math_expr in expressions:
+        try:
+            if math_expr.strip() == "":
+                results.append(float('nan'))
+                continue
+            if math_expr not in compiled:
+                math_interpreter = ParseAugmenter(math_expr, case_sensitive)
+                math_interpreter.parse_algebra()
+                compiled[math_expr] = math_interpreter.compile()
+            compiled[math_expr].check_variables(all_variables, all_functions)
+            results.append(compiled[math_expr].evaluate(all_variables, all_functions))
+        except Exception as error:  # pylint: disable=broad-except
+            results.append(error)
+    return results
+
+
+def _parallel(values):
+    """
+    Like `eval_parallel`, but for values which may be arrays, element-wise.
+    """
+    if not any(isinstance(value, numpy.ndarray) for value in values):
+        return eval_parallel(values)
+    has_zero = reduce(numpy.logical_or, [value == 0 for value in values])
+    # Divide by 1 wherever there is a zero, whose result is then replaced by NaN.
+    reciprocals = [1. / numpy.where(has_zero, 1, value) for value in values]
+    return numpy.where(has_zero, float('nan'), 1. / sum(reciprocals))
+
+
+class CompiledExpression(object):
+    """
+    A math expression parsed once into a tree of closures, which can then be
+    evaluated any number of times with different variables.
 
-    evaluate_actions = {
-        'number': eval_number,
-        'variable': lambda x: all_variables[casify(x[0])],
-        'function': lambda x: all_functions[casify(x[0])](x[1]),
-        'atom': eval_atom,
-        'power': eval_power,
-        'parallel': eval_parallel,
-        'product': eval_product,
-        'sum': eval_sum
-    }
+    Evaluation gives the same results as `evaluator`, which uses this. The
+    closures also accept NumPy arrays as the values of variables, so that
+    `evaluate_samples` can evaluate the expression at many points at once.
+    """
+    def __init__(self, math_interpreter):
+        """
+        Compile the tree of `math_interpreter`, a ParseAugmenter which has been parsed.
+        """
+        self.math_expr = math_interpreter.math_expr
+        self.case_sensitive = math_interpreter.case_sensitive
+
+        self.variables_used = frozenset(math_interpreter.variables_used)
+        self.functions_used = frozenset(math_interpreter.functions_used)
+
+        if self.case_sensitive:
+            casify = lambda x: x
+        else:
+            casify = lambda x: x.lower()  # Lowercase for case insens.
+
+        # Each action returns the closure computing the value of its node from the
+        # (variables, functions) it's called with. Terminal nodes (operators and the
+        # parts of numbers) are left as strings.
+        def compile_number(parse_result):
+            value = eval_number(parse_result)
+            return lambda variables, functions: value
+
+        def compile_variable(parse_result):
+            name = casify(parse_result[0])
+            return lambda variables, functions: variables[name]
+
+        def compile_function(parse_result):
+            name = casify(parse_result[0])
+            argument = parse_result[1]
+            return lambda variables, functions: functions[name](argument(variables, functions))
+
+        def compile_atom(parse_result):
+            # In the case of parenthesis, ignore them.
+            return next(k for k in parse_result if callable(k))
+
+        def compile_power(parse_result):
+            operands = [k for k in parse_result if callable(k)]  # Ignore the '^' marks.
+            if len(operands) == 1:
+                return operands[0]
+            operands.reverse()
+            return lambda variables, functions: reduce(
+                lambda a, b: b ** a, [operand(variables, functions) for operand in operands]
+            )
+
+        def compile_parallel(parse_result):
+            operands = [k for k in parse_result if callable(k)]  # Ignore the '||' marks.
+            if len(operands) == 1:
+                return operands[0]
+            return lambda variables, functions: _parallel([operand(variables, functions) for operand in operands])
+
+        def compile_operations(parse_result, operators, initial, initial_operator):
+            """
+            Return the closure applying each operand with the operator preceding it.
+            """
+            operations = []
+            current_op = initial_operator
+            for token in parse_result:
+                if token in operators:
+                    current_op = operators[token]
+                else:
+                    operations.append((current_op, token))
+
+            def evaluate(variables, functions):
+                result = initial
+                for operation, operand in operations:
+                    result = operation(result, operand(variables, functions))
+                return result
+            return evaluate
+
+        def compile_product(parse_result):
+            if len(parse_result) == 1:
+                return parse_result[0]
+            return compile_operations(
+                parse_result, {'*': operator.mul, '/': operator.truediv}, 1.0, operator.mul
+            )
+
+        def compile_sum(parse_result):
+            return compile_operations(
+                parse_result, {'+': operator.add, '-': operator.sub}, 0.0, operator.add
+            )
+
+        compile_actions = {
+            'number': compile_number,
+            'variable': compile_variable,
+            'function': compile_function,
+            'atom': compile_atom,
+            'power': compile_power,
+            'parallel': compile_parallel,
+            'product': compile_product,
+            'sum': compile_sum
+        }
+        self._evaluate = math_interpreter.reduce_tree(compile_actions)
+
+    def check_variables(self, valid_variables, valid_functions):
+        """
+        Confirm that all the variables and functions used are valid/defined.
 
-    return math_interpreter.reduce_tree(evaluate_actions)
+        Otherwise, raise an UndefinedVariable containing all bad variables.
+        """
+        check_variables(
+            self.variables_used, self.functions_used, valid_variables, valid_functions, self.case_sensitive
+        )
+
+    def evaluate(self, all_variables, all_functions):
+        """
+        Return the value of the expression with the given variables and functions, which
+        must include the defaults (see `add_defaults`) and have been checked.
+        """
+        return self._evaluate(all_variables, all_functions)
+
+    def _elementwise(self, all_functions):
+        """
+        Return whether all the functions used, among `all_functions`, apply element-wise to arrays.
+        """
+        for name in self.functions_used:
+            function = all_functions[name if self.case_sensitive else name.lower()]
+            if not (isinstance(function, numpy.ufunc) or function in ELEMENTWISE_FUNCTIONS):
+                return False
+        return True
+
+    def _evaluate_arrays(self, samples, all_variables, all_functions):
+        """
+        Return the list of the values of the expression for each of `samples`, computed
+        at once with NumPy arrays of their values, or None if any of them isn't finite.
+        """
+        names = [name for name in samples[0] if isinstance(samples[0][name], numbers.Number)]
+        try:
+            array_variables = dict(all_variables)
+            for name in names:
+                values = numpy.array([sample[name] for sample in samples])
+                if values.dtype.kind in 'biu':
+                    # Integer arrays would overflow and divide differently than Python numbers.
+                    values = values.astype(float)
+                array_variables[name if self.case_sensitive else name.lower()] = values
+            with numpy.errstate(all='ignore'):
+                results = numpy.asarray(self._evaluate(array_variables, all_functions))
+                if results.ndim == 0:
+                    # The value doesn't depend on the samples.
+                    results = numpy.repeat(results, len(samples))
+                if results.shape == (len(samples),) and numpy.isfinite(results).all():
+                    return results.tolist()
+        except Exception:  # pylint: disable=broad-except
+            pass
+        return None
+
+    def evaluate_samples(self, samples, functions=None):
+        """
+        Return the list of the values of the expression for each dict of variables in
+        `samples`, which must all define the same variables. Raises the same errors as
+        `evaluator` would for the first sample which it fails to evaluate.
+
+        If there are several samples and every function used is a NumPy ufunc (or one of
+        ELEMENTWISE_FUNCTIONS), the expression is evaluated for all the samples at once,
+        with NumPy arrays of the samples' values. Should that fail or produce any result
+        which isn't finite (where `evaluator` may have raised an error), or should other
+        functions be used, each sample is evaluated in turn.
+        """
+        if not samples:
+            return []
+        functions = functions or {}
+        all_variables, all_functions = add_defaults(samples[0], functions, self.case_sensitive)
+        self.check_variables(all_variables, all_functions)
+
+        if len(samples) > 1 and self._elementwise(all_functions):
+            results = self._evaluate_arrays(samples, all_variables, all_functions)
+            if results is not None:
+                return results
+
+        results = []
+        for sample in samples:
+            all_variables, all_functions = add_defaults(sample, functions, self.case_sensitive)
+            results.append(self._evaluate(all_variables, all_functions))
+        return results
+
+
+def _algebra_grammar():
+    """
+    Build the pyparsing grammar of algebraic expressions.
+
+    Parsing with it gives a `pyparsing.ParseResult` with proper groupings to
+    reflect parenthesis and order of operations. All operators are left in the
+    tree and strings of numbers are not parsed into their float versions.
+
+    The grammar holds no state of its own, so it is built once and shared by
+    every parse.
+    """
+    # 0.33 or 7 or .34 or 16.
+    number_part = Word(nums)
+    inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
+    # pyparsing allows spaces between tokens--`Combine` prevents that.
+    inner_number = Combine(inner_number)
+
+    # SI suffixes and percent.
+    number_suffix = MatchFirst(Literal(k) for k in SUFFIXES.keys())
+
+    # 0.33k or 17
+    plus_minus = Literal('+') | Literal('-')
+    number = Group(
+        Optional(plus_minus) +
+        inner_number +
+        Optional(CaselessLiteral("E") + Optional(plus_minus) + number_part) +
+        Optional(number_suffix)
+    )
+    number = number("number")
+
+    # Predefine recursive variables.
+    expr = Forward()
+
+    # Handle variables passed in. They must start with letters/underscores
+    # and may contain numbers afterward.
+    inner_varname = Word(alphas + "_", alphanums + "_")
+    varname = Group(inner_varname)("variable")
+
+    # Same thing for functions.
+    function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
+
+    atom = number | function | varname | "(" + expr + ")"
+    atom = Group(atom)("atom")
+
+    # Do the following in the correct order to preserve order of operation.
+    pow_term = atom + ZeroOrMore("^" + atom)
+    pow_term = Group(pow_term)("power")
+
+    par_term = pow_term + ZeroOrMore('||' + pow_term)  # 5k || 4k
+    par_term = Group(par_term)("parallel")
+
+    prod_term = par_term + ZeroOrMore((Literal('*') | Literal('/')) + par_term)  # 7 * 5 / 4
+    prod_term = Group(prod_term)("product")
+
+    sum_term = Optional(plus_minus) + prod_term + ZeroOrMore(plus_minus + prod_term)  # -5 + 4 - 3
+    sum_term = Group(sum_term)("sum")
+
+    # Finish the recursion.
+    expr << sum_term  # pylint: disable=pointless-statement
+    grammar = expr + stringEnd
+    # Streamline now rather than on the first parse, which may happen in several threads at once.
+    grammar.streamline()
+    return grammar
+
+
+ALGEBRA_GRAMMAR = _algebra_grammar()
 
 
 class ParseAugmenter(object):
@@ -277,87 +609,43 @@ class ParseAugmenter(object):
         self.tree = None
         self.variables_used = set()
         self.functions_used = set()
-
-        def vpa(tokens):
-            """
-            When a variable is recognized, store it in `variables_used`.
-            """
-            varname = tokens[0][0]
-            self.variables_used.add(varname)
-
-        def fpa(tokens):
-            """
-            When a function is recognized, store it in `functions_used`.
-            """
-            varname = tokens[0][0]
-            self.functions_used.add(varname)
-
-        self.variable_parse_action = vpa
-        self.function_parse_action = fpa
+        self._compiled = None
 
     def parse_algebra(self):
         """
-        Parse an algebraic expression into a tree.
+        Parse an algebraic expression into a tree, with `ALGEBRA_GRAMMAR`.
 
-        Store a `pyparsing.ParseResult` in `self.tree` with proper groupings to
-        reflect parenthesis and order of operations. Leave all operators in the
-        tree and do not parse any strings of numbers into their float versions.
+        Store a `pyparsing.ParseResult` in `self.tree`, and the names of the
+        variables and functions it uses in `variables_used` and `functions_used`.
 
         Adding the groups and result names makes the `repr()` of the result
         really gross. For debugging, use something like
           print OBJ.tree.asXML()
         """
-        # 0.33 or 7 or .34 or 16.
-        number_part = Word(nums)
-        inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
-        # pyparsing allows spaces between tokens--`Combine` prevents that.
-        inner_number = Combine(inner_number)
-
-        # SI suffixes and percent.
-        number_suffix = MatchFirst(Literal(k) for k in SUFFIXES.keys())
-
-        # 0.33k or 17
-        plus_minus = Literal('+') | Literal('-')
-        number = Group(
-            Optional(plus_minus) +
-            inner_number +
-            Optional(CaselessLiteral("E") + Optional(plus_minus) + number_part) +
-            Optional(number_suffix)
-        )
-        number = number("number")
-
-        # Predefine recursive variables.
-        expr = Forward()
-
-        # Handle variables passed in. They must start with letters/underscores
-        # and may contain numbers afterward.
-        inner_varname = Word(alphas + "_", alphanums + "_")
-        varname = Group(inner_varname)("variable")
-        varname.setParseAction(self.variable_parse_action)
-
-        # Same thing for functions.
-        function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
-        function.setParseAction(self.function_parse_action)
-
-        atom = number | function | varname | "(" + expr + ")"
-        atom = Group(atom)("atom")
-
-        # Do the following in the correct order to preserve order of operation.
-        pow_term = atom + ZeroOrMore("^" + atom)
-        pow_term = Group(pow_term)("power")
+        self.tree = ALGEBRA_GRAMMAR.parseString(self.math_expr)[0]
 
-        par_term = pow_term + ZeroOrMore('||' + pow_term)  # 5k || 4k
-        par_term = Group(par_term)("parallel")
-
-        prod_term = par_term + ZeroOrMore((Literal('*') | Literal('/')) + par_term)  # 7 * 5 / 4
-        prod_term = Group(prod_term)("product")
+        def collect_names(node):
+            """
+            Store the names of the variables and functions in `node` and its children.
+            """
+            node_name = node.getName()
+            if node_name == 'variable':
+                self.variables_used.add(node[0])
+            elif node_name == 'function':
+                self.functions_used.add(node[0])
+            for child in node:
+                if isinstance(child, ParseResults):
+                    collect_names(child)
 
-        sum_term = Optional(plus_minus) + prod_term + ZeroOrMore(plus_minus + prod_term)  # -5 + 4 - 3
-        sum_term = Group(sum_term)("sum")
+        collect_names(self.tree)
 
-        # Finish the recursion.
-        expr << sum_term  # pylint: disable=pointless-statement
-        self.tree = (expr + stringEnd).parseString(self.math_expr)[0]
+    def compile(self):
+        """
+        Return the CompiledExpression of the tree, compiling it on the first call.
+        """
+        if self._compiled is None:
+            self._compiled = CompiledExpression(self)
+        return self._compiled
 
     def reduce_tree(self, handle_actions, terminal_converter=None):
         """
@@ -403,16 +691,27 @@ class ParseAugmenter(object):
 
         Otherwise, raise an UndefinedVariable containing all bad variables.
         """
-        if self.case_sensitive:
-            casify = lambda x: x
-        else:
-            casify = lambda x: x.lower()  # Lowercase for case insens.
+        check_variables(
+            self.variables_used, self.functions_used, valid_variables, valid_functions, self.case_sensitive
+        )
+
+
+def check_variables(variables_used, functions_used, valid_variables, valid_functions, case_sensitive):
+    """
+    Confirm that all the `variables_used` and `functions_used` are valid/defined.
+
+    Otherwise, raise an UndefinedVariable containing all bad variables.
+    """
+    if case_sensitive:
+        casify = lambda x: x
+    else:
+        casify = lambda x: x.lower()  # Lowercase for case insens.
 
-        # Test if casify(X) is valid, but return the actual bad input (i.e. X)
-        bad_vars = set(var for var in self.variables_used
-                       if casify(var) not in valid_variables)
-        bad_vars.update(func for func in self.functions_used
-                        if casify(func) not in valid_functions)
+    # Test if casify(X) is valid, but return the actual bad input (i.e. X)
+    bad_vars = set(var for var in variables_used
+                   if casify(var) not in valid_variables)
+    bad_vars.update(func for func in functions_used
+                    if casify(func) not in valid_functions)
 
-        if bad_vars:
-            raise UndefinedVariable(' '.join(sorted(bad_vars)))
+    if bad_vars:
+        raise UndefinedVariable(' '.join(sorted(bad_vars)))
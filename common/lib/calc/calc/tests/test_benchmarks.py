@@ -0,0 +1,84 @@
+"""
+Micro-benchmarks of the parse cache and of `calc.evaluate_many`.
+
+Each benchmark times the cached path against the uncached one, and reports both
+timings. The results depend on the machine, so nothing is asserted about them, and
+the benchmarks only run when the CALC_BENCHMARKS environment variable is set:
+
+    CALC_BENCHMARKS=1 nosetests -a benchmark common/lib/calc
+"""
+
+import os
+import sys
+import timeit
+import unittest
+
+from nose.plugins.attrib import attr
+
+import calc
+
+# An expression typical of a formula or numerical answer
+EXPRESSION = '(3.2k*x^2 + sin(y)/2) / (1 + sqrt(x*y)) - 4.7e-3*x || 5'
+VARIABLES = {'x': 1.75, 'y': 0.5}
+
+
+def best_time(function, number):
+    """
+    Return the best of three timings of `number` calls of `function`, in seconds.
+    """
+    return min(timeit.repeat(function, repeat=3, number=number))
+
+
+def report(name, fast, slow):
+    """
+    Report the best time `fast` of a benchmark, against the time `slow` of the path it improves on.
+    """
+    sys.stderr.write("\n{}: {:.4f}s, against {:.4f}s ({:.1f}x)\n".format(name, fast, slow, slow / fast))
+
+
+@attr('benchmark')
+@unittest.skipUnless(os.environ.get('CALC_BENCHMARKS'), "CALC_BENCHMARKS is not set")
+class ParseCacheBenchmark(unittest.TestCase):
+    """
+    Compare evaluating and previewing expressions with and without the parse cache.
+    """
+    def setUp(self):
+        super(ParseCacheBenchmark, self).setUp()
+        calc.clear_parse_cache()
+        self.addCleanup(calc.clear_parse_cache)
+
+    def test_evaluator(self):
+        def uncached():
+            calc.clear_parse_cache()
+            calc.evaluator(VARIABLES, {}, EXPRESSION)
+
+        def cached():
+            calc.evaluator(VARIABLES, {}, EXPRESSION)
+
+        report('evaluator, cached', best_time(cached, 100), best_time(uncached, 100))
+
+    def test_preview(self):
+        from calc import preview
+
+        def uncached():
+            calc.clear_parse_cache()
+            preview.latex_preview(EXPRESSION, VARIABLES)
+
+        def cached():
+            preview.latex_preview(EXPRESSION, VARIABLES)
+
+        report('latex_preview, cached', best_time(cached, 100), best_time(uncached, 100))
+
+    def test_evaluate_many(self):
+        # Stored answers, many of which students gave identically
+        answers = ['{} * x + y^{}'.format(index % 20, index % 3) for index in xrange(500)]
+
+        def one_by_one():
+            for answer in answers:
+                calc.clear_parse_cache()
+                calc.evaluator(VARIABLES, {}, answer)
+
+        def in_bulk():
+            calc.evaluate_many(answers, VARIABLES)
+
+        report('evaluate_many', best_time(in_bulk, 1), best_time(one_by_one, 1))
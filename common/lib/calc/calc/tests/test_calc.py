@@ -4,6 +4,8 @@ Unit tests for calc.py
 
 import unittest
 import numpy
+from mock import patch
+
 import calc
 from pyparsing import ParseException
 
@@ -559,3 +561,114 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+
+class CompiledExpressionTest(unittest.TestCase):
+    """
+    Test that compiled expressions evaluate many samples at once just as
+    `calc.evaluator` evaluates each of them.
+    """
+    SAMPLES = [{'x': 1.5, 'y': -2.0}, {'x': 3.25, 'y': 0.5}, {'x': 4.0, 'y': 7.75}]
+
+    def assert_samples_evaluated(self, math_expr, samples, case_sensitive=False):
+        """
+        Check `evaluate_samples` against `evaluator` for each of the samples.
+        """
+        compiled = calc.compile_expression(math_expr, case_sensitive)
+        expected = [calc.evaluator(sample, {}, math_expr, case_sensitive) for sample in samples]
+        for actual_value, expected_value in zip(compiled.evaluate_samples(samples), expected):
+            if numpy.isnan(expected_value):
+                self.assertTrue(numpy.isnan(actual_value))
+            else:
+                self.assertAlmostEqual(actual_value, expected_value, delta=1e-12 * max(1, abs(expected_value)))
+
+    def test_compiled_once(self):
+        self.assertIs(calc.compile_expression('x^2 + y'), calc.compile_expression('x^2 + y'))
+        self.assertIsNot(calc.compile_expression('x^2 + y'), calc.compile_expression('x^2 + y', True))
+
+    def test_evaluate_samples(self):
+        expressions = [
+            '5', 'x', '-x + 2*y - 3', 'x^y^2', 'x/y*2', 'sin(x) + cos(y)^2', 'x*i + y', 'x || y || 2',
+            '3k*x + 20%', 'sqrt(y)', '(x + y)/(x - y)', 'X*Y', 'fact(4)*x', 'arccot(x)',
+        ]
+        for expression in expressions:
+            self.assert_samples_evaluated(expression, self.SAMPLES)
+
+    def test_case_sensitive_samples(self):
+        self.assert_samples_evaluated('x*X', [{'x': 2.0, 'X': 3.0}, {'x': 4.0, 'X': 5.0}], case_sensitive=True)
+
+    def test_samples_evaluated_separately_on_error(self):
+        # Where a sample makes the expression fail, the failure is that of evaluator
+        with self.assertRaises(ZeroDivisionError):
+            calc.compile_expression('1/x').evaluate_samples([{'x': 1.0}, {'x': 0.0}])
+        with self.assertRaisesRegexp(ValueError, 'factorial'):
+            calc.compile_expression('fact(x)').evaluate_samples([{'x': 1.0}, {'x': 1.5}])
+        self.assert_samples_evaluated('x || 1', [{'x': 0.0}, {'x': 1.0}])
+
+    def test_single_sample_not_vectorized(self):
+        # A one-element array would let math.factorial accept a non-integer
+        with self.assertRaisesRegexp(ValueError, 'factorial'):
+            calc.compile_expression('fact(x)').evaluate_samples([{'x': 1.5}])
+
+    def test_only_elementwise_functions_vectorized(self):
+        compiled = calc.compile_expression('sin(x) + sec(y)')
+        wrapped = compiled._evaluate_arrays  # pylint: disable=protected-access
+        with patch.object(compiled, '_evaluate_arrays', wraps=wrapped) as evaluate_arrays:
+            compiled.evaluate_samples(self.SAMPLES)
+            self.assertTrue(evaluate_arrays.called)
+            evaluate_arrays.reset_mock()
+            compiled.evaluate_samples(self.SAMPLES, {'sin': lambda x: x})
+            self.assertFalse(evaluate_arrays.called)
+
+    def test_undefined_sample_variables(self):
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'z'):
+            calc.compile_expression('x + z').evaluate_samples(self.SAMPLES)
+
+
+class ParseCacheTest(unittest.TestCase):
+    """
+    Test the cache of parsed expressions, and `calc.evaluate_many`.
+    """
+    def setUp(self):
+        super(ParseCacheTest, self).setUp()
+        calc.clear_parse_cache()
+        self.addCleanup(calc.clear_parse_cache)
+
+    def test_parsed_once(self):
+        parsed = calc.parse_expression('x + f(y)')
+        self.assertIs(calc.parse_expression('x + f(y)'), parsed)
+        self.assertEqual(parsed.variables_used, set(['x', 'y']))
+        self.assertEqual(parsed.functions_used, set(['f']))
+        self.assertIs(calc.compile_expression('x + f(y)'), parsed.compile())
+
+    def test_least_recently_used_evicted(self):
+        with patch('calc.calc.PARSE_CACHE_SIZE', 2):
+            first = calc.parse_expression('1 + x')
+            second = calc.parse_expression('2 + x')
+            self.assertIs(calc.parse_expression('1 + x'), first)
+            calc.parse_expression('3 + x')
+            self.assertIs(calc.parse_expression('1 + x'), first)
+            self.assertIsNot(calc.parse_expression('2 + x'), second)
+
+    def test_evaluate_many(self):
+        expressions = ['x^2', '', 'x + y', 'x + z', '1/(x - 2)', '2 +* 3', 'x^2']
+        results = calc.evaluate_many(expressions, {'x': 2, 'y': 3})
+        self.assertEqual(results[0], 4)
+        self.assertTrue(numpy.isnan(results[1]))
+        self.assertEqual(results[2], 5)
+        self.assertIsInstance(results[3], calc.UndefinedVariable)
+        self.assertIsInstance(results[4], ZeroDivisionError)
+        self.assertIsInstance(results[5], ParseException)
+        self.assertEqual(results[6], 4)
+
+    def test_evaluate_many_matches_evaluator(self):
+        expressions = ['sin(x) + Y', 'x || 2', '3k*x', 'fact(4)']
+        variables = {'x': 0.5, 'y': 4}
+        self.assertEqual(
+            calc.evaluate_many(expressions, variables),
+            [calc.evaluator(variables, {}, expression) for expression in expressions]
+        )
+        # Expressions evaluated in bulk don't displace those kept for `evaluator`
+        calc.clear_parse_cache()
+        calc.evaluate_many(expressions, variables)
+        self.assertEqual(len(calc.calc._PARSED_EXPRESSIONS), 0)  # pylint: disable=protected-access
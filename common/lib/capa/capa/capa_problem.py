@@ -13,11 +13,14 @@ Main module which shows problems (of "capa" type).
 This is used by capa_module.
 """
 
+from collections import OrderedDict
 from copy import deepcopy
 from datetime import datetime
+import hashlib
 import logging
 import os.path
 import re
+import threading
 
 from lxml import etree
 from pytz import UTC
@@ -58,6 +61,12 @@ html_problem_semantics = [
 
 log = logging.getLogger(__name__)
 
+# Number of parsed problems kept by each process, see `LoncapaProblem._load_tree`
+PROBLEM_TEMPLATE_CACHE_SIZE = 500
+
+_TEMPLATES = OrderedDict()
+_TEMPLATES_LOCK = threading.Lock()
+
 #-----------------------------------------------------------------------------
 # main class for this module
 
@@ -154,25 +163,16 @@ class LoncapaProblem(object):
         self.done = state.get('done', False)
         self.input_state = state.get('input_state', {})
 
-        # Convert startouttext and endouttext to proper <text></text>
-        problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
-        problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
-        self.problem_text = problem_text
-
-        # parse problem XML file into an element tree
-        self.tree = etree.XML(problem_text)
-
-        # handle any <include file="foo"> tags
-        self._process_includes()
+        # Parse the problem XML into self.tree, with IDs added to its responses and their inputs
+        response_inputs = self._load_tree(problem_text)
 
         # construct script processor context (eg for customresponse problems)
         self.context = self._extract_context(self.tree)
 
-        # Pre-parse the XML tree: modifies it to add ID's and perform some in-place
-        # transformations.  This also creates the dict (self.responders) of Response
-        # instances for each question in the problem. The dict has keys = xml subtree of
-        # Response, values = Response instance
-        self._preprocess_problem(self.tree)
+        # Pre-parse the XML tree: performs some in-place transformations.  This also creates
+        # the dict (self.responders) of Response instances for each question in the problem.
+        # The dict has keys = xml subtree of Response, values = Response instance
+        self._preprocess_problem(self.tree, response_inputs)
 
         if not self.student_answers:  # True when student_answers is an empty dict
             self.set_initial_display()
@@ -529,6 +529,59 @@ class LoncapaProblem(object):
 
     # ======= Private Methods Below ========
 
+    def _load_tree(self, problem_text):
+        """
+        Set self.problem_text and self.tree from `problem_text`, with the <include> tags
+        replaced and IDs added to the responses and their inputs, and return the list of
+        (response, inputfields) of self.tree.
+
+        None of this depends on the seed or the student's state, so it is only done once
+        for each problem XML and id, and kept in a cache of the PROBLEM_TEMPLATE_CACHE_SIZE
+        most recently used problems of the process. Later instances work on a copy of it.
+        Problems including files aren't cached, since the files may change.
+        """
+        text = problem_text.encode('utf-8') if isinstance(problem_text, unicode) else problem_text
+        key = (hashlib.md5(text).hexdigest(), self.problem_id)
+        with _TEMPLATES_LOCK:
+            template = _TEMPLATES.pop(key, None)
+            if template is not None:
+                # Re-insert to mark as most recently used.
+                _TEMPLATES[key] = template
+        if template is not None:
+            self.problem_text, template_tree, response_indices = template
+            self.tree = deepcopy(template_tree)
+            elements = list(self.tree.iter())
+            return [
+                (elements[response], [elements[index] for index in inputfields])
+                for response, inputfields in response_indices
+            ]
+
+        # Convert startouttext and endouttext to proper <text></text>
+        problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
+        problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
+        self.problem_text = problem_text
+
+        # parse problem XML file into an element tree
+        self.tree = etree.XML(problem_text)
+
+        # handle any <include file="foo"> tags
+        has_includes = self.tree.find('.//include') is not None
+        self._process_includes()
+
+        response_inputs = self._assign_ids(self.tree)
+
+        if not has_includes:
+            indices = dict((element, index) for index, element in enumerate(self.tree.iter()))
+            response_indices = [
+                (indices[response], [indices[entry] for entry in inputfields])
+                for response, inputfields in response_inputs
+            ]
+            with _TEMPLATES_LOCK:
+                _TEMPLATES[key] = (problem_text, deepcopy(self.tree), response_indices)
+                while len(_TEMPLATES) > PROBLEM_TEMPLATE_CACHE_SIZE:
+                    _TEMPLATES.popitem(last=False)
+        return response_inputs
+
     def _process_includes(self):
         """
         Handle any <include file="foo"> tags by reading in the specified file and inserting it
@@ -777,19 +830,16 @@ class LoncapaProblem(object):
 
         return tree
 
-    def _preprocess_problem(self, tree):  # private
+    def _assign_ids(self, tree):  # private
         """
         Assign IDs to all the responses
         Assign sub-IDs to all entries (textline, schematic, etc.)
-        Annoted correctness and value
         In-place transformation
 
-        Also create capa Response instances for each responsetype and save as self.responders
-
-        Obtain all responder answers and save as self.responder_answers dict (key = response)
+        Returns the list of (response, inputfields) of the tree, in order.
         """
         response_id = 1
-        self.responders = {}
+        response_inputs = []
         for response in tree.xpath('//' + "|//".join(responsetypes.registry.registered_tags())):
             response_id_str = self.problem_id + "_" + str(response_id)
             # create and save ID for this response
@@ -810,6 +860,21 @@ class LoncapaProblem(object):
                 entry.attrib['id'] = "%s_%i_%i" % (self.problem_id, response_id, answer_id)
                 answer_id = answer_id + 1
 
+            response_inputs.append((response, inputfields))
+        return response_inputs
+
+    def _preprocess_problem(self, tree, response_inputs):  # private
+        """
+        Annoted correctness and value
+        In-place transformation
+
+        Create capa Response instances for each of the (response, inputfields) of
+        `response_inputs` and save as self.responders
+
+        Obtain all responder answers and save as self.responder_answers dict (key = response)
+        """
+        self.responders = {}
+        for response, inputfields in response_inputs:
             # instantiate capa Response
             responsetype_cls = responsetypes.registry.get_class_for_tag(response.tag)
             responder = responsetype_cls(response, inputfields, self.context, self.capa_system)
@@ -1,3 +1,5 @@
 """Capa's specialized use of codejail.safe_exec."""
 
 from .safe_exec import safe_exec, update_hash
+from .sandbox_pool import configure_pool
+from .result_cache import configure_result_cache
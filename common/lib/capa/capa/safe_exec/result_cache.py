@@ -0,0 +1,267 @@
+"""
+Cache of safe_exec results.
+
+Results are cached in the cache given by the LoncapaSystem, which is shared by
+every process, and the most recently used results are also kept in each process,
+up to a budget of `max_bytes` (see `configure_result_cache`). Results larger than
+`compress_over` bytes of JSON are stored compressed, in both tiers.
+
+How often each slug (the id of the problem or response running the code) hits
+either tier is counted in each process, and added to counters kept in the shared
+cache every STATS_FLUSH_INTERVAL seconds, with `incr`, by a thread of its own
+rather than by the request which happens to be counted then. The slugs whose
+counters were created most recently are listed in a ring of STATS_MAX_SLUGS keys,
+so the counts can be reported without a list being read and rewritten as they
+change. The counters, the ring and the markers of listed slugs are kept for
+STATS_TIMEOUT seconds from their creation, rather than the cache's default.
+"""
+import hashlib
+import json
+import marshal
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+# Seconds between additions of a process's counts to the shared cache
+STATS_FLUSH_INTERVAL = 60
+# Seconds the counts are kept in the shared cache, the longest memcached allows
+STATS_TIMEOUT = 30 * 24 * 60 * 60
+# Number of slugs listed in the shared cache
+STATS_MAX_SLUGS = 1000
+# Counter of the slugs listed so far, whose remainder is the next slot of the ring
+STATS_SLUGS_KEY = "safe_exec.stats.slugs"
+
+LOCAL = 'local'
+SHARED = 'shared'
+MISS = 'miss'
+
+_CONFIG = {'max_bytes': 0, 'compress_over': 16 * 1024}
+
+_RESULTS = OrderedDict()
+_RESULTS_LOCK = threading.Lock()
+_RESULTS_BYTES = [0]
+
+_STATS = {}
+_STATS_LOCK = threading.Lock()
+_STATS_FLUSHED_AT = [time.time()]
+_STATS_FLUSHER = [None]
+
+
+def configure_result_cache(max_bytes=0, compress_over=16 * 1024):
+    """
+    Configure the in-process tier. A `max_bytes` of 0 disables it.
+    """
+    _CONFIG.update(max_bytes=max_bytes, compress_over=compress_over)
+    clear_local_results()
+
+
+def clear_local_results():
+    """
+    Forget the results kept in this process.
+    """
+    with _RESULTS_LOCK:
+        _RESULTS.clear()
+        _RESULTS_BYTES[0] = 0
+
+
+def _canonical(obj):
+    """
+    Return `obj` with its dicts replaced by their items in order, and its tuples
+    tagged as such, so that equal objects marshal to the same bytes.
+    """
+    if isinstance(obj, dict):
+        return ('d', tuple((key, _canonical(obj[key])) for key in sorted(obj)))
+    if isinstance(obj, (list, tuple)):
+        items = [_canonical(item) if isinstance(item, (dict, list, tuple)) else item for item in obj]
+        return items if isinstance(obj, list) else ('t', items)
+    return obj
+
+
+def cache_key(code, safe_globals, random_seed):
+    """
+    Return the cache key of running `code` with the JSON-safe `safe_globals`.
+
+    Unlike `update_hash`, which visits every value in Python, this only walks the
+    containers and leaves the values to `marshal`, whose output only differs for
+    equal objects when a str is interned in one and not the other, costing a miss.
+    """
+    digest = hashlib.md5(marshal.dumps((code, _canonical(safe_globals)), 2)).hexdigest()
+    return "safe_exec.%r.%s" % (random_seed, digest)
+
+
+def _encode(result):
+    """
+    Return the JSON of `result`, and whether it was compressed.
+    """
+    data = json.dumps(result)
+    if len(data) > _CONFIG['compress_over']:
+        return zlib.compress(data), True
+    return data, False
+
+
+def _decode(data, compressed):
+    """
+    Return the result encoded by `_encode`.
+    """
+    if compressed:
+        data = zlib.decompress(data)
+    return json.loads(data)
+
+
+def _keep_local(key, data, compressed):
+    """
+    Keep an encoded result in this process, evicting the least recently used ones
+    until the results fit in the budget.
+    """
+    max_bytes = _CONFIG['max_bytes']
+    if not max_bytes or len(data) > max_bytes:
+        return
+    with _RESULTS_LOCK:
+        previous = _RESULTS.pop(key, None)
+        if previous is not None:
+            _RESULTS_BYTES[0] -= len(previous[0])
+        _RESULTS[key] = (data, compressed)
+        _RESULTS_BYTES[0] += len(data)
+        while _RESULTS_BYTES[0] > max_bytes:
+            evicted = _RESULTS.popitem(last=False)[1]
+            _RESULTS_BYTES[0] -= len(evicted[0])
+
+
+def get_result(cache, key, slug=None):
+    """
+    Return the cached (exception message, globals) result of `key`, or None.
+    """
+    with _RESULTS_LOCK:
+        local = _RESULTS.pop(key, None)
+        if local is not None:
+            # Re-insert to mark as most recently used.
+            _RESULTS[key] = local
+    if local is not None:
+        _record(cache, slug, LOCAL)
+        return _decode(*local)
+
+    cached = cache.get(key)
+    if cached is None:
+        _record(cache, slug, MISS)
+        return None
+    _record(cache, slug, SHARED)
+    if isinstance(cached, basestring):
+        # A large result, compressed.
+        _keep_local(key, cached, True)
+        return _decode(cached, True)
+    if _CONFIG['max_bytes']:
+        _keep_local(key, *_encode(cached))
+    return cached
+
+
+def set_result(cache, key, result):
+    """
+    Cache the (exception message, globals) `result` of `key`.
+    """
+    data, compressed = _encode(result)
+    _keep_local(key, data, compressed)
+    cache.set(key, data if compressed else result)
+
+
+def _stats_key(slug, outcome=None):
+    """
+    Return the key of the counter of `outcome` for `slug` in the shared cache, or
+    without an `outcome`, the key marking `slug` as listed.
+    """
+    key = "safe_exec.stats.%s" % hashlib.md5(slug.encode('utf-8')).hexdigest()
+    return key if outcome is None else "%s.%s" % (key, outcome)
+
+
+def _slot_key(index):
+    """
+    Return the key of the slot `index` of the ring of listed slugs.
+    """
+    return "%s.%d" % (STATS_SLUGS_KEY, index % STATS_MAX_SLUGS)
+
+
+def _incr(cache, key, delta):
+    """
+    Add `delta` to the counter `key` in the shared `cache`, creating it if needed,
+    and return its new value.
+    """
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # The counter doesn't exist, unless another process has just created it.
+        if cache.add(key, delta, STATS_TIMEOUT):
+            return delta
+        return cache.incr(key, delta)
+
+
+def _record(cache, slug, outcome):
+    """
+    Count an `outcome` of looking up a result for `slug`, adding the counts of
+    this process to the shared cache in the background if they haven't been for
+    a while.
+    """
+    if slug is None:
+        return
+    with _STATS_LOCK:
+        counts = _STATS.setdefault(slug, {LOCAL: 0, SHARED: 0, MISS: 0})
+        counts[outcome] += 1
+        if time.time() - _STATS_FLUSHED_AT[0] < STATS_FLUSH_INTERVAL:
+            return
+        if _STATS_FLUSHER[0] is not None and _STATS_FLUSHER[0].is_alive():
+            # The previous counts are still being added; these will be next time.
+            return
+        _STATS_FLUSHED_AT[0] = time.time()
+        pending = dict(_STATS)
+        _STATS.clear()
+        _STATS_FLUSHER[0] = _flush_in_background(cache, pending)
+
+
+def _flush_in_background(cache, pending):
+    """
+    Start a thread adding the `pending` counts to the shared `cache`, and return it.
+    """
+    flusher = threading.Thread(target=flush_stats, args=(cache, pending))
+    flusher.daemon = True
+    flusher.start()
+    return flusher
+
+
+def flush_stats(cache, pending):
+    """
+    Add the `pending` counts, by slug, to the counters in the shared `cache`.
+
+    Each count is added atomically, so counts added at the same time by several
+    processes are all kept, and a slug is only written to the ring the first time
+    it's seen since its marker expired. The markers are read, and the new slugs
+    written to the ring, all at once.
+    """
+    for slug, counts in pending.iteritems():
+        for outcome, count in counts.iteritems():
+            if count:
+                _incr(cache, _stats_key(slug, outcome), count)
+    markers = {_stats_key(slug): slug for slug in pending}
+    listed = cache.get_many(markers.keys())
+    new_slugs = [
+        slug for key, slug in markers.iteritems()
+        if key not in listed and cache.add(key, True, STATS_TIMEOUT)
+    ]
+    if new_slugs:
+        start = _incr(cache, STATS_SLUGS_KEY, len(new_slugs)) - len(new_slugs)
+        cache.set_many(
+            {_slot_key(start + offset): slug for offset, slug in enumerate(new_slugs)}, STATS_TIMEOUT
+        )
+
+
+def get_stats(cache):
+    """
+    Return the counts of the outcomes of looking up results, in the shared `cache`,
+    by slug.
+    """
+    listed = cache.get_many([_slot_key(index) for index in xrange(STATS_MAX_SLUGS)])
+    stats = {}
+    for slug in set(listed.itervalues()):
+        keys = {_stats_key(slug, outcome): outcome for outcome in (LOCAL, SHARED, MISS)}
+        found = cache.get_many(keys.keys())
+        if found:
+            stats[slug] = {outcome: found.get(key, 0) for key, outcome in keys.iteritems()}
+    return stats
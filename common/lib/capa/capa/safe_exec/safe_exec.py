@@ -1,12 +1,12 @@
 """Capa's specialized use of codejail.safe_exec."""
 
-from codejail.safe_exec import safe_exec as codejail_safe_exec
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
 from codejail.safe_exec import json_safe, SafeExecException
 from . import lazymod
+from . import result_cache
+from .sandbox_pool import safe_exec as pooled_safe_exec
 from dogapi import dog_stats_api
 
-import hashlib
 
 # Establish the Python environment for Capa.
 # Capa assumes float-friendly division always.
@@ -99,7 +99,7 @@ def safe_exec(
 
     `cache` is an object with .get(key) and .set(key, value) methods.  It will be used
     to cache the execution, taking into account the code, the values of the globals,
-    and the random seed.
+    and the random seed.  See result_cache.py for the results also kept in-process.
 
     `slug` is an arbitrary string, a description that's meaningful to the
     caller, that will be used in log messages.
@@ -110,11 +110,8 @@ def safe_exec(
     # Check the cache for a previous result.
     if cache:
         safe_globals = json_safe(globals_dict)
-        md5er = hashlib.md5()
-        md5er.update(repr(code))
-        update_hash(md5er, safe_globals)
-        key = "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
-        cached = cache.get(key)
+        key = result_cache.cache_key(code, safe_globals, random_seed)
+        cached = result_cache.get_result(cache, key, slug)
         if cached is not None:
             # We have a cached result.  The result is a pair: the exception
             # message, if any, else None; and the resulting globals dictionary.
@@ -131,7 +128,8 @@ def safe_exec(
     if unsafely:
         exec_fn = codejail_not_safe_exec
     else:
-        exec_fn = codejail_safe_exec
+        # codejail's safe_exec, run by a warm sandbox if a pool is configured.
+        exec_fn = pooled_safe_exec
 
     # Run the code!  Results are side effects in globals_dict.
     try:
@@ -148,7 +146,7 @@ def safe_exec(
     # the globals dict might not be entirely serializable.
     if cache:
         cleaned_results = json_safe(globals_dict)
-        cache.set(key, (emsg, cleaned_results))
+        result_cache.set_result(cache, key, (emsg, cleaned_results))
 
     # If an exception happened, raise it now.
     if emsg:
@@ -0,0 +1,313 @@
+"""
+Pool of warm sandboxes for capa's safe_exec.
+
+Every execution by codejail starts a new sandboxed Python, which then imports
+numpy, scipy, calc and the rest again. Instead, each process can keep a pool of
+sandbox workers (see sandbox_worker.py) which have imported them already. A
+worker is the sandboxed Python executable configured for codejail, run as the
+sandbox user, and runs each execution in a child with codejail's limits, forked
+from a process which has done nothing but the imports, so only the imports are
+shared between executions.
+
+The children run as the same user as their worker, so they can send it signals,
+unless the pool has a `child_user`: then the worker must be run as root, by
+`worker_cmdline`, and runs each child as `child_user` instead.
+
+Workers are started as they are needed, up to the size of the pool, and are
+replaced after `max_executions` executions, or once a worker has used more than
+`max_memory` bytes itself. Code which needs files that aren't sent along with it,
+and any execution which a worker fails to complete, are run by codejail as before.
+A worker which fails is killed along with every process of its process group.
+"""
+import atexit
+import base64
+import json
+import logging
+import os
+import pwd
+import select
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+
+from codejail import jail_code
+from codejail.safe_exec import safe_exec as codejail_safe_exec
+from codejail.safe_exec import json_safe, SafeExecException
+from dogapi import dog_stats_api
+
+from . import sandbox_worker
+
+log = logging.getLogger(__name__)
+
+# Seconds a new worker has to import the assumed modules
+WORKER_STARTUP_TIMEOUT = 30
+# Seconds a worker has to reply on top of codejail's REALTIME limit
+WORKER_REPLY_GRACE = 5
+# Seconds a worker has to exit once its input is closed
+WORKER_EXIT_TIMEOUT = 1
+
+# The worker runs in the sandbox, where it is given its source rather than a path to it.
+sandbox_worker_py_file = sandbox_worker.__file__
+if sandbox_worker_py_file.endswith("c"):
+    sandbox_worker_py_file = sandbox_worker_py_file[:-1]
+
+WORKER_CODE = open(sandbox_worker_py_file).read()
+
+_POOL_CONFIG = {'size': 0}
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+
+class SandboxWorkerError(Exception):
+    """
+    A sandbox worker failed to run an execution.
+    """
+    pass
+
+
+class SandboxWorker(object):
+    """
+    A sandbox worker process, and the pipes to it.
+    """
+    def __init__(self, argv):
+        self.argv = argv
+        try:
+            with open(os.devnull, 'wb') as devnull:
+                # The worker leads a process group of its own, so that it can be
+                # killed along with its zygote and children.
+                self.process = subprocess.Popen(
+                    argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=devnull,
+                    cwd=tempfile.gettempdir(), env={}, close_fds=True, preexec_fn=os.setpgrp,
+                )
+        except OSError as error:
+            raise SandboxWorkerError("Sandbox worker failed to start: {}".format(error))
+        self.executions = 0
+        self.memory = 0
+        self._buffer = ''
+        try:
+            ready = self._read_line(WORKER_STARTUP_TIMEOUT) == 'ready'
+        except SandboxWorkerError:
+            ready = False
+        if not ready:
+            self.close(kill=True)
+            raise SandboxWorkerError("Sandbox worker failed to start")
+
+    def _read_line(self, timeout):
+        """
+        Return the next line written by the worker, without its newline.
+        """
+        deadline = time.time() + timeout if timeout else None
+        fileno = self.process.stdout.fileno()
+        while '\n' not in self._buffer:
+            wait = None if deadline is None else max(0, deadline - time.time())
+            if not select.select([fileno], [], [], wait)[0]:
+                raise SandboxWorkerError("Sandbox worker timed out")
+            chunk = os.read(fileno, 65536)
+            if not chunk:
+                raise SandboxWorkerError("Sandbox worker exited")
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split('\n', 1)
+        return line
+
+    def execute(self, request, timeout):
+        """
+        Send `request` to the worker, and return its reply.
+        """
+        try:
+            self.process.stdin.write(json.dumps(request) + '\n')
+            self.process.stdin.flush()
+            reply = json.loads(self._read_line(timeout))
+        except (IOError, OSError, ValueError) as error:
+            raise SandboxWorkerError("Sandbox worker failed: {}".format(error))
+        self.executions += 1
+        self.memory = reply.pop('memory', 0)
+        return reply
+
+    def close(self, kill=False):
+        """
+        Stop the worker, killing it and every process of its group if `kill` is
+        true or if it doesn't exit once its input is closed.
+        """
+        try:
+            self.process.stdin.close()
+        except IOError:
+            pass
+        deadline = time.time() + WORKER_EXIT_TIMEOUT
+        while not kill and self.process.poll() is None and time.time() < deadline:
+            time.sleep(0.01)
+        if self.process.poll() is None:
+            self._kill_group()
+        self.process.wait()
+
+    def _kill_group(self):
+        """
+        Kill every process of the worker's process group.
+        """
+        pgid = self.process.pid
+        if os.path.basename(self.argv[0]) == 'sudo':
+            # The worker runs as another user, so only sudo can kill it.
+            with open(os.devnull, 'wb') as devnull:
+                subprocess.call(
+                    ['sudo', 'pkill', '-KILL', '-g', str(pgid)], stdout=devnull, stderr=devnull, close_fds=True
+                )
+        else:
+            try:
+                os.killpg(pgid, signal.SIGKILL)
+            except OSError:
+                pass
+
+
+class SandboxPool(object):
+    """
+    Up to `size` sandbox workers, each running one execution at a time.
+    """
+    def __init__(self, size, max_executions=100, max_memory=0, worker_cmdline=None, child_user=None, argv=None):
+        """
+        `worker_cmdline` starts the Python running a worker, by default the
+        sandboxed Python executable configured for codejail. `argv` is the whole
+        command running a worker, for tests.
+        """
+        if argv is None:
+            # Imported here since safe_exec imports this module
+            from .safe_exec import ASSUMED_IMPORTS
+            argv = list(worker_cmdline or jail_code.COMMANDS['python']['cmdline_start']) + ['-c', WORKER_CODE]
+            if child_user:
+                entry = pwd.getpwnam(child_user)
+                argv += ['--child-ids', '{}:{}'.format(entry.pw_uid, entry.pw_gid)]
+            argv += [module for __, module in ASSUMED_IMPORTS]
+        self.argv = argv
+        self.size = size
+        self.max_executions = max_executions
+        self.max_memory = max_memory
+
+        self._lock = threading.Lock()
+        self._slots = threading.Semaphore(size)
+        self._idle = []
+        self._workers = 0
+        self._waiting = 0
+
+    def execute(self, code, globals_dict, python_path=None, extra_files=None):
+        """
+        Run `code` in a worker, as codejail's safe_exec would.
+
+        Raises SandboxWorkerError if the worker fails, in which case it is
+        uncertain whether the code was run.
+        """
+        request = {
+            'code': code,
+            'globals': json_safe(globals_dict),
+            'python_path': [os.path.basename(pydir) for pydir in python_path or ()],
+            'extra_files': [[name, base64.b64encode(contents)] for name, contents in extra_files or ()],
+            'limits': dict(jail_code.LIMITS),
+        }
+        realtime = request['limits'].get('REALTIME')
+        timeout = realtime + WORKER_REPLY_GRACE if realtime else None
+
+        with self._lock:
+            dog_stats_api.histogram('capa.safe_exec.pool.queue_depth', self._waiting)
+            self._waiting += 1
+        self._slots.acquire()
+        try:
+            with self._lock:
+                self._waiting -= 1
+                worker = self._idle.pop() if self._idle else None
+            if worker is None:
+                worker = self._start_worker()
+
+            start = time.time()
+            try:
+                reply = worker.execute(request, timeout)
+            except SandboxWorkerError:
+                self._stop_worker(worker, 'failed', kill=True)
+                raise
+            dog_stats_api.histogram('capa.safe_exec.pool.exec_time', time.time() - start)
+
+            if worker.executions >= self.max_executions:
+                self._stop_worker(worker, 'executions')
+            elif self.max_memory and worker.memory > self.max_memory:
+                self._stop_worker(worker, 'memory')
+            else:
+                with self._lock:
+                    self._idle.append(worker)
+        finally:
+            self._slots.release()
+
+        if 'error' in reply:
+            raise SafeExecException("Couldn't execute jailed code: %s" % reply['error'])
+        globals_dict.update(reply['globals'])
+
+    def _start_worker(self):
+        """
+        Start a new worker.
+        """
+        worker = SandboxWorker(self.argv)
+        with self._lock:
+            self._workers += 1
+            dog_stats_api.gauge('capa.safe_exec.pool.size', self._workers)
+        return worker
+
+    def _stop_worker(self, worker, reason, kill=False):
+        """
+        Stop `worker`, which is no longer idle, for `reason`, killing it if `kill` is true.
+        """
+        worker.close(kill=kill)
+        with self._lock:
+            self._workers -= 1
+            dog_stats_api.gauge('capa.safe_exec.pool.size', self._workers)
+        dog_stats_api.increment('capa.safe_exec.pool.recycled', tags=['reason:{}'.format(reason)])
+
+    def close(self):
+        """
+        Stop the idle workers.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.close()
+
+
+def configure_pool(size=0, max_executions=100, max_memory=0, worker_cmdline=None, child_user=None):
+    """
+    Configure the pools of sandbox workers. A `size` of 0 disables them.
+    """
+    _POOL_CONFIG.clear()
+    _POOL_CONFIG.update(
+        size=size, max_executions=max_executions, max_memory=max_memory,
+        worker_cmdline=worker_cmdline, child_user=child_user,
+    )
+
+
+def get_pool():
+    """
+    Return the pool of sandbox workers of this process, or None if there isn't one.
+
+    Worker processes don't survive a fork, so each process has a pool of its own.
+    """
+    if not _POOL_CONFIG['size'] or not jail_code.is_configured('python'):
+        return None
+    pid = os.getpid()
+    pool = _POOLS.get(pid)
+    if pool is None:
+        with _POOLS_LOCK:
+            pool = _POOLS.get(pid)
+            if pool is None:
+                pool = _POOLS[pid] = SandboxPool(**_POOL_CONFIG)
+                atexit.register(pool.close)
+    return pool
+
+
+def safe_exec(code, globals_dict, python_path=None, extra_files=None, slug=None):
+    """
+    Like codejail's safe_exec, but using this process's pool of sandbox workers if there is one.
+    """
+    pool = get_pool()
+    extra_names = set(name for name, __ in extra_files or ())
+    if pool is not None and all(os.path.basename(pydir) in extra_names for pydir in python_path or ()):
+        try:
+            pool.execute(code, globals_dict, python_path=python_path, extra_files=extra_files)
+            return
+        except SandboxWorkerError:
+            log.warning("Sandbox worker failed to run %s, running it in a new sandbox", slug, exc_info=True)
+    codejail_safe_exec(code, globals_dict, python_path=python_path, extra_files=extra_files, slug=slug)
@@ -0,0 +1,281 @@
+"""
+Worker of capa's pool of warm sandboxes, see sandbox_pool.py.
+
+This runs in the sandbox, as the sandboxed Python executable, so it mustn't
+import anything from outside the standard library; sandbox_pool passes its
+source on the command line. The modules named by its arguments are imported
+once, then a "zygote" process is forked, before any request is read. Each
+request read from stdin is run in a child forked from the zygote, which
+inherits the imports but nothing of earlier requests, since the zygote never
+sees their code, data or results. The child is given codejail's limits.
+
+The worker and the zygote can't be traced, nor their memory read, by other
+processes of their user (see `make_undumpable`). They can still be sent signals
+by processes of their user, so a child could stop them, making the execution it
+runs fail, unless the children run as another user: given `--child-ids UID:GID`,
+a worker run as root runs each child as that user and group.
+
+Requests and replies are JSON objects, one per line. The worker passes each
+request to its child in a file of the child's temporary directory, and the
+child writes its result, preceded by its length, on a pipe shared by all the
+children; only one child runs at a time, and the worker empties the pipe once
+the zygote has reaped it.
+"""
+import base64
+import json
+import os
+import resource
+import select
+import shutil
+import signal
+import sys
+import tempfile
+import time
+import traceback
+
+OK_TYPES = (type(None), int, long, float, str, unicode, list, tuple, dict)
+BAD_KEYS = ("__builtins__",)
+
+
+def jsonable(value):
+    """
+    Whether `value` can be sent back to the calling process.
+    """
+    if not isinstance(value, OK_TYPES):
+        return False
+    try:
+        json.dumps(value)
+    except Exception:  # pylint: disable=broad-except
+        return False
+    return True
+
+
+def set_limits(limits):
+    """
+    Set the resource limits of codejail on this process.
+    """
+    if limits.get("CPU"):
+        resource.setrlimit(resource.RLIMIT_CPU, (limits["CPU"], limits["CPU"]))
+    if limits.get("VMEM"):
+        resource.setrlimit(resource.RLIMIT_AS, (limits["VMEM"], limits["VMEM"]))
+    fsize = limits.get("FSIZE", 0)
+    resource.setrlimit(resource.RLIMIT_FSIZE, (fsize, fsize))
+    # No forking.
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+
+
+PR_SET_PDEATHSIG = 1
+PR_SET_DUMPABLE = 4
+
+
+def prctl(option, value):
+    """
+    Set an attribute of this process with Linux's prctl, if it's available.
+    """
+    try:
+        import ctypes
+        ctypes.CDLL(None).prctl(option, value, 0, 0, 0)
+    except (ImportError, OSError, AttributeError):
+        pass
+
+
+def make_undumpable():
+    """
+    Stop processes of the same user from tracing this process or reading its
+    memory. The setting is inherited by forked processes.
+    """
+    prctl(PR_SET_DUMPABLE, 0)
+
+
+REQUEST_FILE = "request.json"
+
+
+def run_child(directory, result_fd, child_ids):
+    """
+    Run the request in `directory`, writing its result to `result_fd`, as the
+    user and group `child_ids` if they aren't None. Never returns.
+    """
+    try:
+        # The code mustn't read further requests, nor write on the replies.
+        devnull = os.open(os.devnull, os.O_RDWR)
+        os.dup2(devnull, 0)
+        os.dup2(devnull, 1)
+
+        os.chdir(directory)
+        with open(REQUEST_FILE) as request_file:
+            request = json.load(request_file)
+        os.remove(REQUEST_FILE)
+        if child_ids is not None:
+            uid, gid = child_ids
+            os.chown(directory, uid, gid)
+            os.setgroups([])
+            os.setgid(gid)
+            os.setuid(uid)
+        # Changing user resets this, so it's set afterwards.
+        prctl(PR_SET_PDEATHSIG, signal.SIGKILL)
+        for name, contents in request["extra_files"]:
+            with open(name, "wb") as extra_file:
+                extra_file.write(base64.b64decode(contents))
+        for pybase in request["python_path"]:
+            sys.path.append(pybase)
+        set_limits(request["limits"])
+
+        g_dict = request["globals"]
+        exec request["code"] in g_dict  # pylint: disable=exec-used
+        result = {
+            "globals": dict((k, v) for k, v in g_dict.iteritems() if jsonable(v) and k not in BAD_KEYS)
+        }
+    except BaseException:  # pylint: disable=broad-except
+        result = {"error": traceback.format_exc()}
+
+    try:
+        output = json.dumps(result)
+        output = "%d\n%s" % (len(output), output)
+        while output:
+            output = output[os.write(result_fd, output):]
+    finally:
+        os._exit(0)  # pylint: disable=protected-access
+
+
+def peak_memory():
+    """
+    Return the peak memory used by this process, in bytes.
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def run_zygote(command_fd, status_fd, result_fd, child_ids):
+    """
+    Fork a child running the request in each directory named on `command_fd`, as
+    the user and group `child_ids` if they aren't None, writing its pid on
+    `status_fd`, then, once it has exited, the peak memory of the zygote in bytes.
+    Never returns.
+    """
+    make_undumpable()
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    commands = os.fdopen(command_fd, "r", 0)
+    while True:
+        directory = commands.readline().rstrip("\n")
+        if not directory:
+            os._exit(0)  # pylint: disable=protected-access
+        pid = os.fork()
+        if pid == 0:
+            os.close(command_fd)
+            os.close(status_fd)
+            run_child(directory, result_fd, child_ids)
+        os.write(status_fd, "%d\n" % pid)
+        os.waitpid(pid, 0)
+        os.write(status_fd, "%d\n" % peak_memory())
+
+
+class Zygote(object):
+    """
+    The zygote forked by the worker, and the pipes to it and to its children.
+    """
+    def __init__(self, child_ids=None):
+        command_fd, self.command_fd = os.pipe()
+        self.status_fd, status_fd = os.pipe()
+        self.result_fd, result_fd = os.pipe()
+        self.pid = os.fork()
+        if self.pid == 0:
+            os.close(self.command_fd)
+            os.close(self.status_fd)
+            os.close(self.result_fd)
+            run_zygote(command_fd, status_fd, result_fd, child_ids)
+        os.close(command_fd)
+        os.close(status_fd)
+        os.close(result_fd)
+
+    def read_status(self):
+        """
+        Return the next number written by the zygote.
+        """
+        line = ""
+        while not line.endswith("\n"):
+            char = os.read(self.status_fd, 1)
+            if not char:
+                raise EOFError("The zygote exited")
+            line += char
+        return int(line)
+
+    def execute(self, request):
+        """
+        Run `request` in a child of the zygote, and return the reply to it,
+        with the larger of the peak memory of the worker and of the zygote.
+        """
+        directory = tempfile.mkdtemp(prefix="codejail-")
+        with open(os.path.join(directory, REQUEST_FILE), "w") as request_file:
+            json.dump(request, request_file)
+        os.write(self.command_fd, directory + "\n")
+        pid = self.read_status()
+
+        realtime = request["limits"].get("REALTIME")
+        deadline = time.time() + realtime if realtime else None
+        output = ""
+        zygote_memory = None
+        while zygote_memory is None:
+            timeout = None if deadline is None else max(0, deadline - time.time())
+            ready = select.select([self.result_fd, self.status_fd], [], [], timeout)[0]
+            if not ready:
+                os.kill(pid, signal.SIGKILL)
+                deadline = None
+            if self.result_fd in ready:
+                output += os.read(self.result_fd, 65536)
+            elif self.status_fd in ready:
+                # The child has exited, so everything it wrote is in the pipe.
+                zygote_memory = self.read_status()
+        while select.select([self.result_fd], [], [], 0)[0]:
+            chunk = os.read(self.result_fd, 65536)
+            if not chunk:
+                break
+            output += chunk
+        shutil.rmtree(directory, ignore_errors=True)
+
+        length, _, output = output.partition("\n")
+        try:
+            if len(output) != int(length):
+                raise ValueError("Incomplete result")
+            reply = json.loads(output)
+        except ValueError:
+            # The child was killed, by a limit or for running out of time.
+            reply = {"error": ""}
+        reply["memory"] = max(peak_memory(), zygote_memory)
+        return reply
+
+
+def main(args):
+    """
+    Import the modules named by `args`, then serve requests until stdin is closed.
+    `args` may start with "--child-ids UID:GID".
+    """
+    child_ids = None
+    if args[:1] == ["--child-ids"]:
+        child_ids = tuple(int(value) for value in args[1].split(":"))
+        args = args[2:]
+    make_undumpable()
+    for module in args:
+        try:
+            __import__(module)
+        except Exception:  # pylint: disable=broad-except
+            pass
+    zygote = Zygote(child_ids)
+
+    sys.stdout.write("ready\n")
+    sys.stdout.flush()
+    while True:
+        line = sys.stdin.readline()
+        if not line:
+            break
+        try:
+            reply = zygote.execute(json.loads(line))
+        except (EOFError, OSError):
+            # The zygote has died, so the pool must start a new worker.
+            break
+        sys.stdout.write(json.dumps(reply) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,147 @@
+"""Test result_cache.py"""
+
+import unittest
+
+from mock import Mock, patch
+
+from capa.safe_exec import result_cache, safe_exec
+from capa.safe_exec.tests.test_safe_exec import DictCache
+
+
+class TestCacheKey(unittest.TestCase):
+    """Test that cache keys depend on values, not on how they're stored."""
+
+    def key(self, safe_globals, code="a = 1", seed=1):
+        """Return the cache key of `safe_globals`."""
+        return result_cache.cache_key(code, safe_globals, seed)
+
+    def test_dict_order(self):
+        d1 = {k: 1 for k in "abcdefghijklmnopqrstuvwxyz"}
+        d2 = dict(d1)
+        for i in xrange(10000):
+            d2[i] = 1
+        for i in xrange(10000):
+            del d2[i]
+        # Check that our dicts are equal, but with different key order.
+        self.assertEqual(d1, d2)
+        self.assertNotEqual(d1.keys(), d2.keys())
+
+        self.assertEqual(self.key(d1), self.key(d2))
+        self.assertEqual(self.key({'a': [1, d1]}), self.key({'a': [1, d2]}))
+
+    def test_different_values(self):
+        keys = set([
+            self.key({'a': 1}),
+            self.key({'a': 1.0}),
+            self.key({'a': True}),
+            self.key({'a': [1, 2]}),
+            self.key({'a': (1, 2)}),
+            self.key({'a': {1: 2}}),
+            self.key({'a': [(1, 2)]}),
+            self.key({'a': 1}, code="a = 2"),
+            self.key({'a': 1}, seed=2),
+        ])
+        self.assertEqual(len(keys), 9)
+
+
+class TestResultCache(unittest.TestCase):
+    """Test the two tiers of the cache."""
+
+    def setUp(self):
+        super(TestResultCache, self).setUp()
+        result_cache.configure_result_cache(max_bytes=1000, compress_over=100)
+        self.addCleanup(result_cache.configure_result_cache)
+
+    def test_kept_in_process(self):
+        cache = {}
+        safe_exec("a = 17", {}, cache=DictCache(cache))
+        cache.clear()
+        g = {}
+        safe_exec("a = 17", g, cache=DictCache(cache))
+        self.assertEqual(g['a'], 17)
+        self.assertEqual(cache, {})
+
+    def test_results_are_copies(self):
+        cache = DictCache({})
+        result_cache.set_result(cache, "key", (None, {'a': [1]}))
+        result_cache.get_result(cache, "key")[1]['a'].append(2)
+        self.assertEqual(result_cache.get_result(cache, "key"), [None, {'a': [1]}])
+
+    def test_large_results_compressed(self):
+        cache = {}
+        result = [None, {'a': 'x' * 500}]
+        result_cache.set_result(DictCache(cache), "key", result)
+        self.assertIsInstance(cache["key"], str)
+        self.assertLess(len(cache["key"]), 100)
+        result_cache.clear_local_results()
+        self.assertEqual(result_cache.get_result(DictCache(cache), "key"), result)
+
+    def test_byte_budget(self):
+        result_cache.configure_result_cache(max_bytes=100)
+        cache = {}
+        for index in xrange(20):
+            result_cache.set_result(DictCache(cache), "key{}".format(index), (None, {'a': index}))
+        self.assertLessEqual(result_cache._RESULTS_BYTES[0], 100)  # pylint: disable=protected-access
+        cache.clear()
+        # The most recent results were kept, the oldest evicted
+        self.assertIsNotNone(result_cache.get_result(DictCache(cache), "key19"))
+        self.assertIsNone(result_cache.get_result(DictCache(cache), "key0"))
+
+    def test_stats(self):
+        cache = {}
+        with patch.object(result_cache, 'STATS_FLUSH_INTERVAL', 0):
+            with patch.object(result_cache, '_flush_in_background', result_cache.flush_stats):
+                safe_exec("a = 17", {}, cache=DictCache(cache), slug="problem_1")
+                safe_exec("a = 17", {}, cache=DictCache(cache), slug="problem_1")
+                result_cache.clear_local_results()
+                safe_exec("a = 17", {}, cache=DictCache(cache), slug="problem_1")
+        self.assertEqual(
+            result_cache.get_stats(DictCache(cache))["problem_1"],
+            {result_cache.LOCAL: 1, result_cache.SHARED: 1, result_cache.MISS: 1}
+        )
+
+    def test_stats_added_in_background(self):
+        # pylint: disable=protected-access
+        if result_cache._STATS_FLUSHER[0] is not None:
+            result_cache._STATS_FLUSHER[0].join()
+        cache = {}
+        with patch.object(result_cache, 'STATS_FLUSH_INTERVAL', 0):
+            safe_exec("a = 17", {}, cache=DictCache(cache), slug="problem_background")
+        flusher = result_cache._STATS_FLUSHER[0]
+        self.assertTrue(flusher.daemon)
+        flusher.join()
+        self.assertEqual(
+            result_cache.get_stats(DictCache(cache))["problem_background"],
+            {result_cache.LOCAL: 0, result_cache.SHARED: 0, result_cache.MISS: 1}
+        )
+
+    def test_stats_of_processes_added(self):
+        cache = DictCache({})
+        # Counts flushed by two processes are both kept, and the slug listed once
+        result_cache.flush_stats(cache, {"problem_1": {result_cache.LOCAL: 2, result_cache.MISS: 1}})
+        result_cache.flush_stats(cache, {"problem_1": {result_cache.LOCAL: 3}, "problem_2": {result_cache.MISS: 1}})
+        self.assertEqual(result_cache.get_stats(cache), {
+            "problem_1": {result_cache.LOCAL: 5, result_cache.SHARED: 0, result_cache.MISS: 1},
+            "problem_2": {result_cache.LOCAL: 0, result_cache.SHARED: 0, result_cache.MISS: 1},
+        })
+
+    def test_stats_kept_long(self):
+        cache = Mock(wraps=DictCache({}))
+        result_cache.flush_stats(cache, {"problem_1": {result_cache.MISS: 1}, "problem_2": {result_cache.LOCAL: 1}})
+        self.assertEqual(cache.add.call_count, 5)
+        self.assertEqual(cache.set_many.call_count, 1)
+        for call in cache.add.call_args_list + cache.set_many.call_args_list:
+            self.assertEqual(call[0][-1], result_cache.STATS_TIMEOUT)
+        # Listed slugs are found all at once.
+        cache.reset_mock()
+        result_cache.flush_stats(cache, {"problem_1": {result_cache.MISS: 1}, "problem_2": {result_cache.LOCAL: 1}})
+        self.assertEqual(cache.get_many.call_count, 1)
+        self.assertFalse(cache.add.called)
+        self.assertFalse(cache.set_many.called)
+
+    def test_stats_slugs_limited(self):
+        cache = DictCache({})
+        with patch.object(result_cache, 'STATS_MAX_SLUGS', 2):
+            for slug in ("problem_1", "problem_2", "problem_3"):
+                result_cache.flush_stats(cache, {slug: {result_cache.MISS: 1}})
+            self.assertEqual(sorted(result_cache.get_stats(cache)), ["problem_2", "problem_3"])
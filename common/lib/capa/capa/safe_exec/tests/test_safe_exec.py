@@ -101,11 +101,30 @@ class DictCache(object):
         assert len(key) <= 250
         return self.cache.get(key)
 
-    def set(self, key, value):
+    def set(self, key, value, timeout=None):  # pylint: disable=unused-argument
         # Actual cache implementations have limits on key length
         assert len(key) <= 250
         self.cache[key] = value
 
+    def add(self, key, value, timeout=None):
+        if key in self.cache:
+            return False
+        self.set(key, value, timeout)
+        return True
+
+    def set_many(self, data, timeout=None):
+        for key, value in data.iteritems():
+            self.set(key, value, timeout)
+
+    def incr(self, key, delta=1):
+        if key not in self.cache:
+            raise ValueError("Key '%s' not found" % key)
+        self.cache[key] += delta
+        return self.cache[key]
+
+    def get_many(self, keys):
+        return {key: self.cache[key] for key in keys if key in self.cache}
+
 
 class TestSafeExecCaching(unittest.TestCase):
     """Test that caching works on safe_exec."""
@@ -0,0 +1,167 @@
+"""Test sandbox_pool.py"""
+
+import os
+import pwd
+import sys
+import time
+import unittest
+import zipfile
+from StringIO import StringIO
+
+from mock import patch
+
+from capa.safe_exec import sandbox_pool
+from codejail import jail_code
+from codejail.safe_exec import SafeExecException
+
+
+class TestSandboxPool(unittest.TestCase):
+    """
+    Test the pool with workers running this Python, unsandboxed.
+    """
+    def setUp(self):
+        super(TestSandboxPool, self).setUp()
+        self.pool = sandbox_pool.SandboxPool(
+            2, max_executions=3, argv=[sys.executable, '-c', sandbox_pool.WORKER_CODE, 'math']
+        )
+        self.addCleanup(self.pool.close)
+        patcher = patch.dict(jail_code.LIMITS, {'CPU': 1, 'REALTIME': 1})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_set_values(self):
+        g = {'b': 2}
+        self.pool.execute("from __future__ import division\na = b/4\nprint 'ignored'", g)
+        self.assertEqual(g, {'a': 0.5, 'b': 2})
+
+    def test_raising_exceptions(self):
+        with self.assertRaises(SafeExecException) as cm:
+            self.pool.execute("1/0", {})
+        self.assertIn("ZeroDivisionError", cm.exception.message)
+        # The worker is still usable
+        g = {}
+        self.pool.execute("a = 17", g)
+        self.assertEqual(g['a'], 17)
+
+    def test_extra_files(self):
+        zipped = StringIO()
+        with zipfile.ZipFile(zipped, 'w') as python_lib:
+            python_lib.writestr("constant.py", "THE_CONST = 23\n")
+        g = {}
+        self.pool.execute(
+            "import constant; a = constant.THE_CONST", g,
+            python_path=["python_lib.zip"], extra_files=[("python_lib.zip", zipped.getvalue())]
+        )
+        self.assertEqual(g['a'], 23)
+
+    def test_executions_are_isolated(self):
+        self.pool.execute("import math; math.leaked = True", {})
+        g = {}
+        self.pool.execute("import math; a = hasattr(math, 'leaked')", g)
+        self.assertFalse(g['a'])
+
+    def test_memory_of_the_worker(self):
+        self.pool.execute("a = 1", {})
+        worker = self.pool._idle[-1]  # pylint: disable=protected-access
+        baseline = worker.memory
+        self.assertGreater(baseline, 0)
+        # The memory of the children isn't counted, since they exit.
+        self.pool.execute("a = len('x' * 64 * 1024 * 1024)", {})
+        self.assertLess(worker.memory, baseline + 32 * 1024 * 1024)
+
+    def test_workers_using_too_much_memory_recycled(self):
+        self.pool.max_memory = 1
+        with patch.object(sandbox_pool, 'SandboxWorker', wraps=sandbox_pool.SandboxWorker) as worker:
+            self.pool.execute("a = 1", {})
+            self.pool.execute("a = 1", {})
+        self.assertEqual(worker.call_count, 2)
+
+    def test_failed_worker_killed_with_its_group(self):
+        worker = sandbox_pool.SandboxWorker(self.pool.argv)
+        request = {'code': "import time; time.sleep(5)", 'globals': {}, 'python_path': [], 'extra_files': [],
+                   'limits': {'REALTIME': 5}}
+        with self.assertRaises(sandbox_pool.SandboxWorkerError):
+            worker.execute(request, 0.5)
+        worker.close(kill=True)
+        # The zygote and the child are killed along with the worker.
+        time.sleep(0.1)
+        self.assertEqual(self._group_members(worker.process.pid), [])
+
+    def _group_members(self, pgid):
+        """
+        Return the pids of the live processes of the process group `pgid`.
+        """
+        pids = []
+        for pid in os.listdir('/proc'):
+            try:
+                with open('/proc/{}/stat'.format(pid)) as stat:
+                    fields = stat.read().rsplit(')', 1)[1].split()
+            except (IOError, IndexError):
+                continue
+            if fields[0] != 'Z' and int(fields[2]) == pgid:
+                pids.append(int(pid))
+        return pids
+
+    @unittest.skipUnless(hasattr(os, 'geteuid') and os.geteuid() == 0, "Needs root to change users")
+    def test_children_run_as_child_user(self):
+        nobody = pwd.getpwnam('nobody')
+        self.pool.argv = [
+            sys.executable, '-c', sandbox_pool.WORKER_CODE,
+            '--child-ids', '{}:{}'.format(nobody.pw_uid, nobody.pw_gid), 'math',
+        ]
+        g = {}
+        self.pool.execute("import os; a = os.getuid(); b = os.getgid()", g)
+        self.assertEqual((g['a'], g['b']), (nobody.pw_uid, nobody.pw_gid))
+        # The children can't signal the zygote.
+        with self.assertRaises(SafeExecException) as cm:
+            self.pool.execute("import os, signal; os.kill(os.getppid(), signal.SIGSTOP)", {})
+        self.assertIn("Operation not permitted", cm.exception.message)
+
+    def test_limits(self):
+        with self.assertRaises(SafeExecException):
+            self.pool.execute("import time; time.sleep(5)", {})
+        with self.assertRaises(SafeExecException):
+            self.pool.execute("while True: pass", {})
+
+    def test_workers_recycled(self):
+        with patch.object(sandbox_pool, 'SandboxWorker', wraps=sandbox_pool.SandboxWorker) as worker:
+            for value in xrange(7):
+                g = {}
+                self.pool.execute("a = {}".format(value), g)
+                self.assertEqual(g['a'], value)
+        # Executions are run one at a time, so by a new worker after every three
+        self.assertEqual(worker.call_count, 3)
+
+
+class TestPooledSafeExec(unittest.TestCase):
+    """
+    Test choosing between the pool and codejail.
+    """
+    def setUp(self):
+        super(TestPooledSafeExec, self).setUp()
+        self.pool = sandbox_pool.SandboxPool(1, argv=[sys.executable, '-c', sandbox_pool.WORKER_CODE])
+        self.addCleanup(self.pool.close)
+
+    def test_pool_used(self):
+        with patch.object(sandbox_pool, 'get_pool', return_value=self.pool):
+            with patch.object(sandbox_pool, 'codejail_safe_exec') as codejail_safe_exec:
+                g = {}
+                sandbox_pool.safe_exec("a = 1", g, python_path=["lib.zip"], extra_files=[("lib.zip", "")])
+        self.assertEqual(g['a'], 1)
+        self.assertFalse(codejail_safe_exec.called)
+
+    def test_codejail_used_for_missing_files(self):
+        with patch.object(sandbox_pool, 'get_pool', return_value=self.pool):
+            with patch.object(sandbox_pool, 'codejail_safe_exec') as codejail_safe_exec:
+                sandbox_pool.safe_exec("a = 1", {}, python_path=["/course/lib"])
+        self.assertTrue(codejail_safe_exec.called)
+
+    def test_codejail_used_when_worker_fails(self):
+        self.pool.argv = [sys.executable, '-c', 'pass']
+        with patch.object(sandbox_pool, 'get_pool', return_value=self.pool):
+            with patch.object(sandbox_pool, 'codejail_safe_exec') as codejail_safe_exec:
+                sandbox_pool.safe_exec("a = 1", {})
+        self.assertTrue(codejail_safe_exec.called)
+
+    def test_no_pool_by_default(self):
+        self.assertIsNone(sandbox_pool.get_pool())
@@ -0,0 +1,79 @@
+"""Tests the cache of parsed problems shared by instances of the same problem."""
+
+import textwrap
+import unittest
+
+from mock import patch
+
+from . import new_loncapa_problem, test_capa_system
+from capa import capa_problem
+
+
+class ProblemTemplateTest(unittest.TestCase):
+    """Capa problem tests for the cache of parsed problems."""
+
+    XML = textwrap.dedent("""
+        <problem>
+        <script type="loncapa/python">
+        answer = str(random.randint(0, 1000))
+        </script>
+        <p>Enter $answer</p>
+        <stringresponse answer="$answer">
+          <textline size="20"/>
+        </stringresponse>
+        <multiplechoiceresponse>
+          <choicegroup type="MultipleChoice" shuffle="true">
+            <choice correct="false">Apple</choice>
+            <choice correct="false">Banana</choice>
+            <choice correct="false">Chocolate</choice>
+            <choice correct ="true">Donut</choice>
+          </choicegroup>
+        </multiplechoiceresponse>
+        <solution><p>It's $answer</p></solution>
+        </problem>
+    """)
+
+    def setUp(self):
+        super(ProblemTemplateTest, self).setUp()
+        capa_problem._TEMPLATES.clear()  # pylint: disable=protected-access
+
+    def input_ids(self, problem):
+        """Return the ids of the inputs of `problem`."""
+        return sorted(problem.tree.xpath('//textline/@id | //choicegroup/@id'))
+
+    def test_parsed_once(self):
+        new_loncapa_problem(self.XML)
+        with patch.object(capa_problem.LoncapaProblem, '_assign_ids') as assign_ids:
+            problem = new_loncapa_problem(self.XML)
+        self.assertFalse(assign_ids.called)
+        self.assertEqual(self.input_ids(problem), ['1_2_1', '1_3_1'])
+
+    def test_same_as_uncached(self):
+        new_loncapa_problem(self.XML)
+        for seed in (1, 2, 3):
+            cached = new_loncapa_problem(self.XML, seed=seed)
+            capa_problem._TEMPLATES.clear()  # pylint: disable=protected-access
+            # This caches the problem again for the next seed
+            uncached = new_loncapa_problem(self.XML, seed=seed)
+
+            self.assertEqual(cached.get_html(), uncached.get_html())
+            self.assertEqual(cached.context['answer'], uncached.context['answer'])
+            self.assertEqual(
+                sorted(response.get('id') for response in cached.responders),
+                sorted(response.get('id') for response in uncached.responders)
+            )
+
+    def test_instances_have_own_trees(self):
+        first = new_loncapa_problem(self.XML, seed=1)
+        second = new_loncapa_problem(self.XML, seed=2)
+        self.assertIsNot(first.tree, second.tree)
+        self.assertNotEqual(first.get_html(), second.get_html())
+
+    def test_ids_depend_on_problem_id(self):
+        new_loncapa_problem(self.XML)
+        problem = capa_problem.LoncapaProblem(self.XML, id='2', seed=1, capa_system=test_capa_system())
+        self.assertEqual(self.input_ids(problem), ['2_2_1', '2_3_1'])
+
+    def test_includes_not_cached(self):
+        new_loncapa_problem('<problem><include file="snuggletex_2x+3y.xml"/></problem>')
+        self.assertEqual(len(capa_problem._TEMPLATES), 0)  # pylint: disable=protected-access
@@ -16,7 +16,7 @@ from xmodule.editing_module import EditingDescriptor
 from xmodule.edxnotes_utils import edxnotes
 from xmodule.html_checker import check_html
 from xmodule.stringify import stringify_children
-from xmodule.x_module import XModule, DEPRECATION_VSCOMPAT_EVENT
+from xmodule.x_module import XModule, DEPRECATION_VSCOMPAT_EVENT, STUDENT_VIEW
 from xmodule.xml_module import XmlDescriptor, name_to_pathname
 from xblock.core import XBlock
 from xblock.fields import Scope, String, Boolean, List
@@ -100,6 +100,18 @@ class HtmlDescriptor(HtmlFields, XmlDescriptor, EditingDescriptor):  # pylint: d
     js_module_name = "HTMLEditingDescriptor"
     css = {'scss': [resource_string(__name__, 'css/editor/edit.scss'), resource_string(__name__, 'css/html/edit.scss')]}
 
+    @property
+    def user_invariant_views(self):
+        """
+        The views which render the same for every user, and so whose fragments may be cached.
+
+        HtmlModules are annotated with the user's notes when edxnotes are enabled, and
+        %%USER_ID%% keywords are replaced with the user's anonymous id.
+        """
+        if self.module_class is HtmlModule or '%%USER_ID%%' in self.data:
+            return ()
+        return (STUDENT_VIEW,)
+
     # VS[compat] TODO (cpennington): Delete this method once all fall 2012 course
     # are being edited in the cms
     @classmethod
@@ -306,6 +306,12 @@ class EditInfo(object):
     """
     Encapsulates the editing info of a block.
     """
+    # A course structure holds one of these per block, so they're kept compact
+    __slots__ = (
+        'previous_version', 'update_version', 'source_version', 'edited_on', 'edited_by',
+        'original_usage', 'original_usage_version', '_subtree_edited_on', '_subtree_edited_by',
+    )
+
     def __init__(self, **kwargs):
         self.from_storable(kwargs)
 
@@ -352,6 +358,13 @@ class EditInfo(object):
         self.original_usage = edit_info.get('original_usage', None)
         self.original_usage_version = edit_info.get('original_usage_version', None)
 
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.iteritems():
+            setattr(self, name, value)
+
     def __repr__(self):
         # pylint: disable=bad-continuation, redundant-keyword-arg
         return ("{classname}(previous_version={self.previous_version}, "
@@ -375,6 +388,9 @@ class BlockData(object):
     Allows the storing of meta-information about a structure that doesn't persist along with
     the structure itself.
     """
+    # A course structure holds one of these per block, so they're kept compact
+    __slots__ = ('fields', 'block_type', 'definition', 'defaults', 'edit_info', 'definition_loaded')
+
     def __init__(self, **kwargs):
         # Has the definition been loaded?
         self.definition_loaded = False
@@ -413,6 +429,13 @@ class BlockData(object):
         # EditInfo object containing all versioning/editing data.
         self.edit_info = EditInfo(**block_data.get('edit_info', {}))
 
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.iteritems():
+            setattr(self, name, value)
+
     def __repr__(self):
         # pylint: disable=bad-continuation, redundant-keyword-arg
         return ("{classname}(fields={self.fields}, "
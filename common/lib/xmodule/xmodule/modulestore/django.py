@@ -25,6 +25,7 @@ from pymongo import ReadPreference
 from xmodule.contentstore.django import contentstore
 from xmodule.modulestore.draft_and_published import BranchSettingMixin
 from xmodule.modulestore.mixed import MixedModuleStore
+from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
 from xmodule.util.django import get_current_request_hostname
 import xblock.reference.plugins
 
@@ -153,6 +154,14 @@ def create_modulestore_instance(
     if issubclass(class_, BranchSettingMixin):
         _options['branch_setting_func'] = _get_modulestore_branch_setting
 
+    if issubclass(class_, SplitMongoModuleStore):
+        _options['structure_cache_size'] = getattr(settings, 'SPLIT_STRUCTURE_CACHE_SIZE', 0)
+        _options['definition_cache_size'] = getattr(settings, 'SPLIT_DEFINITION_CACHE_SIZE', 0)
+        try:
+            _options['shared_structure_cache'] = get_cache('course_structure_cache')
+        except InvalidCacheBackendError:
+            pass
+
     if HAS_USER_SERVICE and not user_service:
         xb_user_service = DjangoXBlockUserService(get_current_user())
     else:
@@ -0,0 +1,195 @@
+"""
+Process-local, size-bounded caches for immutable split modulestore documents.
+
+Split structures (and definitions) are addressed by a guid and never change once
+written, so they can be cached for the life of the process without invalidation.
+Entries are serialized (zlib-compressed pickles) so that:
+
+* the size of the cache can be accounted for and bounded in bytes,
+* every caller gets its own copy of the document, so code which mutates a structure
+  in place (e.g. ``BlockData.definition_loaded``) can't corrupt the cached value,
+* the same payload can be handed to a shared (Django) cache as a second tier.
+
+By default the local tier keeps the serialized data, and each hit deserializes it.
+Subclasses can instead keep a decoded form of each entry, from which they can make
+copies more cheaply (see `_keep` and `_copy`).
+"""
+import cPickle as pickle
+import logging
+import threading
+import zlib
+from collections import OrderedDict
+
+try:
+    import dogstats_wrapper as dog_stats_api
+except ImportError:
+    dog_stats_api = None
+
+log = logging.getLogger(__name__)
+
+
+def serialize(value):
+    """
+    Return the compact serialized form of `value` which is stored in the caches.
+    """
+    return zlib.compress(pickle.dumps(value, pickle.HIGHEST_PROTOCOL), 1)
+
+
+def deserialize(data):
+    """
+    Inverse of :func:`serialize`.
+    """
+    return pickle.loads(zlib.decompress(data))
+
+
+class SerializedLRUCache(object):
+    """
+    A thread-safe LRU cache whose capacity is a budget in bytes of serialized data.
+    Entries kept in a decoded form are still counted at their serialized size, which
+    is several times smaller than the memory they use.
+
+    Optionally backed by a second tier `shared_cache` (anything implementing the Django
+    cache `get`/`set` api) which is consulted on local misses and populated on `set`.
+
+    Hits and misses are counted per tier and, when available, reported to datadog as
+    ``<name>.hit`` / ``<name>.miss`` tagged with the tier.
+    """
+    def __init__(self, name, max_bytes, shared_cache=None, shared_cache_timeout=None):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.shared_cache = shared_cache
+        self.shared_cache_timeout = shared_cache_timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _shared_key(self, key):
+        """
+        The key used for `key` in the shared cache.
+        """
+        return u'{}.{}'.format(self.name, key)
+
+    def _record(self, result, tier):
+        """
+        Report a hit or miss on `tier` to datadog.
+        """
+        if dog_stats_api:
+            dog_stats_api.increment(u'{}.{}'.format(self.name, result), tags=[u'tier:{}'.format(tier)])
+
+    def get(self, key):
+        """
+        Return a fresh copy of the value cached for `key`, or None if it isn't cached.
+        """
+        if not self.max_bytes and self.shared_cache is None:
+            return None
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                # re-insert to mark as most recently used
+                self._entries[key] = entry
+                self.hits += 1
+            else:
+                self.misses += 1
+        if entry is not None:
+            self._record('hit', 'local')
+            return self._copy(entry[1])
+
+        self._record('miss', 'local')
+        if self.shared_cache is None:
+            return None
+
+        try:
+            data = self.shared_cache.get(self._shared_key(key))
+        except Exception:  # pylint: disable=broad-except
+            log.exception(u"Unable to read %s from the shared %s cache", key, self.name)
+            data = None
+        if data is None:
+            self.shared_misses += 1
+            self._record('miss', 'shared')
+            return None
+
+        self.shared_hits += 1
+        self._record('hit', 'shared')
+        kept = self._store(key, data)
+        return deserialize(data) if kept is None else self._copy(kept)
+
+    def set(self, key, value):
+        """
+        Cache a copy of `value` under `key` in every tier.
+        """
+        if not self.max_bytes and self.shared_cache is None:
+            return
+        data = serialize(value)
+        self._store(key, data)
+        if self.shared_cache is not None:
+            try:
+                self.shared_cache.set(self._shared_key(key), data, self.shared_cache_timeout)
+            except Exception:  # pylint: disable=broad-except
+                log.exception(u"Unable to write %s to the shared %s cache", key, self.name)
+
+    def _keep(self, data):
+        """
+        Return what the local tier keeps of an entry, given its serialized `data`.
+        """
+        return data
+
+    def _copy(self, kept):
+        """
+        Return a copy of an entry which callers may mutate, given what the local tier keeps of it.
+        """
+        return deserialize(kept)
+
+    def _store(self, key, data):
+        """
+        Put the serialized `data` in the local tier, evicting least recently used entries to stay within budget.
+        Returns what the local tier keeps of it, or None if it is too large to be kept.
+        """
+        size = len(data)
+        if size > self.max_bytes:
+            return None
+        kept = self._keep(data)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[0]
+            self._entries[key] = (size, kept)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                evicted_size = self._entries.popitem(last=False)[1][0]
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+        return kept
+
+    def clear(self):
+        """
+        Empty the local tier. The shared tier is left alone as its entries are immutable.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """
+        Return a dict describing the size and effectiveness of the cache.
+        """
+        return {
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'shared_hits': self.shared_hits,
+            'shared_misses': self.shared_misses,
+            'evictions': self.evictions,
+        }
@@ -1,46 +1,142 @@
 """
 Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
 """
+import logging
 import re
+from collections import ItemsView, KeysView, MutableMapping, ValuesView
 from mongodb_proxy import autoretry_read, MongoProxy
 import pymongo
 
 # Import this just to export it
 from pymongo.errors import DuplicateKeyError  # pylint: disable=unused-import
 
+import contracts
 from contracts import check, new_contract
 from xmodule.exceptions import HeartbeatFailure
 from xmodule.modulestore import BlockData
 from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.lru_cache import SerializedLRUCache, deserialize
 import datetime
 import pytz
 
+log = logging.getLogger(__name__)
+
 
 new_contract('BlockData', BlockData)
 
 
+def _contracts_enabled():
+    """
+    Whether to validate the shape of structures, which costs a pass over every block.
+    Validation is off wherever contracts are disabled, e.g. in production (see lms/wsgi.py).
+    """
+    return not contracts.all_disabled()
+
+
+def block_from_mongo(block):
+    """
+    Converts a block's document from a structure's 'blocks' list to a BlockData,
+    converting 'fields.children' from [[block_type, block_id]] to [BlockKey].
+
+    The document is left unchanged, and the BlockData gets its own 'fields' and 'defaults'
+    maps, since documents may be shared by the copies of a cached structure.
+    """
+    fields = dict(block['fields'])
+    if 'children' in fields:
+        fields['children'] = [BlockKey(*child) for child in fields['children']]
+    return BlockData(**dict(block, fields=fields, defaults=dict(block.get('defaults', {}))))
+
+
+class LazyBlockDict(MutableMapping):
+    """
+    The {BlockKey: BlockData} map of a structure's blocks, which converts each block from
+    its mongo document to a BlockData the first time it's accessed.
+
+    Most requests only touch a few of the blocks of a structure, so this saves decoding
+    every block of large courses. Blocks not accessed yet are held as their (smaller) documents.
+
+    This is a Mapping rather than a dict subclass, since dict(), dict.update() and the dict
+    views read a dict subclass's storage directly, and would expose the undecoded documents.
+    """
+    def __init__(self, documents=None):
+        """
+        `documents` optionally maps BlockKeys to the mongo documents of their blocks.
+        """
+        self._blocks = dict(documents or {})
+
+    def __getitem__(self, block_key):
+        block = self._blocks[block_key]
+        if type(block) is dict:  # pylint: disable=unidiomatic-typecheck
+            block = block_from_mongo(block)
+            self._blocks[block_key] = block
+        return block
+
+    def __setitem__(self, block_key, block):
+        self._blocks[block_key] = block
+
+    def __delitem__(self, block_key):
+        del self._blocks[block_key]
+
+    def __contains__(self, block_key):
+        return block_key in self._blocks
+
+    def __iter__(self):
+        return iter(self._blocks)
+
+    def __len__(self):
+        return len(self._blocks)
+
+    def __repr__(self):
+        return repr(dict(self.iteritems()))
+
+    def keys(self):
+        return self._blocks.keys()
+
+    def viewkeys(self):
+        return KeysView(self)
+
+    def viewvalues(self):
+        return ValuesView(self)
+
+    def viewitems(self):
+        return ItemsView(self)
+
+    def copy(self):
+        """
+        Return a shallow copy, sharing the (decoded or not) blocks but not the map.
+        """
+        return LazyBlockDict(self._blocks)
+
+    __copy__ = copy
+
+
+def _index_blocks(structure):
+    """
+    Converts 'root' from [block_type, block_id] to BlockKey, and the 'blocks' key from
+        a list [block_data] to a dict {BlockKey: block_data} of the (unchanged) documents.
+    """
+    if _contracts_enabled():
+        check('seq[2]', structure['root'])
+        check('list(dict)', structure['blocks'])
+        for block in structure['blocks']:
+            if 'children' in block['fields']:
+                check('list(list[2])', block['fields']['children'])
+
+    structure['root'] = BlockKey(*structure['root'])
+    structure['blocks'] = {BlockKey(block['block_type'], block['block_id']): block for block in structure['blocks']}
+    return structure
+
+
 def structure_from_mongo(structure):
     """
     Converts the 'blocks' key from a list [block_data] to a map
-        {BlockKey: block_data}.
+        {BlockKey: block_data}, which decodes each block when it's first accessed.
     Converts 'root' from [block_type, block_id] to BlockKey.
     Converts 'blocks.*.fields.children' from [[block_type, block_id]] to [BlockKey].
     N.B. Does not convert any other ReferenceFields (because we don't know which fields they are at this level).
     """
-    check('seq[2]', structure['root'])
-    check('list(dict)', structure['blocks'])
-    for block in structure['blocks']:
-        if 'children' in block['fields']:
-            check('list(list[2])', block['fields']['children'])
-
-    structure['root'] = BlockKey(*structure['root'])
-    new_blocks = {}
-    for block in structure['blocks']:
-        if 'children' in block['fields']:
-            block['fields']['children'] = [BlockKey(*child) for child in block['fields']['children']]
-        new_blocks[BlockKey(block['block_type'], block.pop('block_id'))] = BlockData(**block)
-    structure['blocks'] = new_blocks
-
+    structure = _index_blocks(structure)
+    structure['blocks'] = LazyBlockDict(structure['blocks'])
     return structure
 
 
@@ -52,11 +148,12 @@ def structure_to_mongo(structure):
     Doesn't convert 'root', since namedtuple's can be inserted
         directly into mongo.
     """
-    check('BlockKey', structure['root'])
-    check('dict(BlockKey: BlockData)', structure['blocks'])
-    for block in structure['blocks'].itervalues():
-        if 'children' in block.fields:
-            check('list(BlockKey)', block.fields['children'])
+    if _contracts_enabled():
+        check('BlockKey', structure['root'])
+        check('map(BlockKey: BlockData)', structure['blocks'])
+        for block in structure['blocks'].itervalues():
+            if 'children' in block.fields:
+                check('list(BlockKey)', block.fields['children'])
 
     new_structure = dict(structure)
     new_structure['blocks'] = []
@@ -70,16 +167,41 @@ def structure_to_mongo(structure):
     return new_structure
 
 
+class StructureCache(SerializedLRUCache):
+    """
+    The cache of structures, which are given to it in their mongo form, and returned
+    as by `structure_from_mongo`.
+
+    The local tier keeps each structure with its blocks indexed by BlockKey (see
+    `_index_blocks`), and each hit returns a new LazyBlockDict over the same, never
+    modified, block documents, rather than deserializing the whole structure.
+    """
+    def _keep(self, data):
+        return _index_blocks(deserialize(data))
+
+    def _copy(self, kept):
+        return dict(kept, blocks=LazyBlockDict(kept['blocks']))
+
+
 class MongoConnection(object):
     """
     Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
     """
     def __init__(
         self, db, collection, host, port=27017, tz_aware=True, user=None, password=None,
-        asset_collection=None, retry_wait_time=0.1, **kwargs
+        asset_collection=None, retry_wait_time=0.1, structure_cache_size=0,
+        shared_structure_cache=None, definition_cache_size=0, bulk_write_concern=None, **kwargs
     ):
         """
         Create & open the connection, authenticate, and provide pointers to the collections
+
+        Structures are immutable, so they may be cached for the life of the connection in an
+        LRU bounded to `structure_cache_size` bytes of compressed data (0, the default, disables it).
+        `shared_structure_cache`, if given, is a Django cache used as a second tier across processes.
+        Definitions are likewise immutable and cached in an LRU of `definition_cache_size` bytes.
+
+        `bulk_write_concern` optionally maps 'structures' and 'definitions' to the write concern
+        (e.g. {'w': 1, 'j': True}) of the batched inserts made at the end of bulk operations.
         """
         if kwargs.get('replicaSet') is None:
             kwargs.pop('replicaSet', None)
@@ -112,6 +234,12 @@ class MongoConnection(object):
         self.structures.write_concern = {'w': 1}
         self.definitions.write_concern = {'w': 1}
 
+        self.structure_cache = StructureCache(
+            'split.structure_cache', structure_cache_size, shared_cache=shared_structure_cache
+        )
+        self.definition_cache = SerializedLRUCache('split.definition_cache', definition_cache_size)
+        self.bulk_write_concern = bulk_write_concern or {}
+
     def heartbeat(self):
         """
         Check that the db is reachable.
@@ -125,7 +253,13 @@ class MongoConnection(object):
         """
         Get the structure from the persistence mechanism whose id is the given key
         """
-        return structure_from_mongo(self.structures.find_one({'_id': key}))
+        structure = self.structure_cache.get(key)
+        if structure is None:
+            structure = self.structures.find_one({'_id': key})
+            if structure is not None:
+                self.structure_cache.set(key, structure)
+            structure = structure_from_mongo(structure)
+        return structure
 
     @autoretry_read()
     def find_structures_by_id(self, ids):
@@ -176,7 +310,35 @@ class MongoConnection(object):
         """
         Insert a new structure into the database.
         """
-        self.structures.insert(structure_to_mongo(structure))
+        mongo_structure = structure_to_mongo(structure)
+        self.structures.insert(mongo_structure)
+        self.structure_cache.set(structure['_id'], mongo_structure)
+
+    def insert_structures(self, structures):
+        """
+        Insert new structures into the database in as few batches as possible, skipping any
+        which are already there.
+        """
+        mongo_structures = [structure_to_mongo(structure) for structure in structures]
+        self._insert_many(self.structures, mongo_structures, self.bulk_write_concern.get('structures'))
+        for mongo_structure in mongo_structures:
+            self.structure_cache.set(mongo_structure['_id'], mongo_structure)
+
+    def _insert_many(self, collection, documents, write_concern=None):
+        """
+        Insert `documents` into `collection` with unordered bulk semantics: pymongo splits them
+        into as few messages as the server allows, and a document which is already in the collection
+        doesn't stop the rest from being inserted.
+        """
+        if not documents:
+            return
+        try:
+            collection.insert(documents, continue_on_error=True, **(write_concern or {}))
+        except DuplicateKeyError:
+            # The caller may not have looked up some of these documents, and thus didn't realize that
+            # they were already in the database. That's OK, the store is append only, so if one's
+            # already been written it's the same document, and all the others have been inserted.
+            log.debug("Attempted to insert duplicate documents into %s", collection.name)
 
     def get_course_index(self, key, ignore_case=False):
         """
@@ -261,19 +423,66 @@ class MongoConnection(object):
         """
         Get the definition from the persistence mechanism whose id is the given key
         """
-        return self.definitions.find_one({'_id': key})
+        definition = self.definition_cache.get(key)
+        if definition is None:
+            definition = self.definitions.find_one({'_id': key})
+            if definition is not None:
+                self.definition_cache.set(key, definition)
+        return definition
 
     def get_definitions(self, definitions):
         """
-        Retrieve all definitions listed in `definitions`.
-        """
-        return self.definitions.find({'_id': {'$in': definitions}})
+        Retrieve all definitions listed in `definitions`, once each.
+        """
+        found = []
+        missing = []
+        for key in set(definitions):
+            definition = self.definition_cache.get(key)
+            if definition is None:
+                missing.append(key)
+            else:
+                found.append(definition)
+        if missing:
+            for definition in self.definitions.find({'_id': {'$in': missing}}):
+                self.definition_cache.set(definition['_id'], definition)
+                found.append(definition)
+        return found
+
+    def prefetch_definitions(self, definitions):
+        """
+        Load every definition listed in `definitions` which isn't already cached into the
+        definition cache with a single query, so that later `get_definition` calls for them
+        (e.g. by lazily loaded blocks) don't each go to the database.
+
+        Does nothing if the definition cache is disabled. Returns the number of definitions read.
+        """
+        if not self.definition_cache.max_bytes:
+            return 0
+        missing = [key for key in set(definitions) if key not in self.definition_cache]
+        if not missing:
+            return 0
+        count = 0
+        for definition in self.definitions.find({'_id': {'$in': missing}}):
+            self.definition_cache.set(definition['_id'], definition)
+            count += 1
+        return count
 
     def insert_definition(self, definition):
         """
         Create the definition in the db
         """
         self.definitions.insert(definition)
+        self.definition_cache.set(definition['_id'], definition)
+
+    def insert_definitions(self, definitions):
+        """
+        Create the definitions in the db in as few batches as possible, skipping any which are
+        already there.
+        """
+        definitions = list(definitions)
+        self._insert_many(self.definitions, definitions, self.bulk_write_concern.get('definitions'))
+        for definition in definitions:
+            self.definition_cache.set(definition['_id'], definition)
 
     def ensure_indexes(self):
         """
@@ -57,6 +57,7 @@ import copy
 import datetime
 import hashlib
 import logging
+import time
 from contracts import contract, new_contract
 from importlib import import_module
 from mongodb_proxy import autoretry_read
@@ -79,7 +80,7 @@ from xmodule.modulestore import (
 
 from ..exceptions import ItemNotFoundError
 from .caching_descriptor_system import CachingDescriptorSystem
-from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, DuplicateKeyError
+from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection
 from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
 from xmodule.error_module import ErrorDescriptor
 from collections import defaultdict
@@ -87,6 +88,13 @@ from types import NoneType
 from xmodule.assetstore import AssetMetadata
 
 
+# We don't want to force a dependency on datadog, so make the import conditional
+try:
+    import dogstats_wrapper as dog_stats_api
+except ImportError:
+    # pylint: disable=invalid-name
+    dog_stats_api = None
+
 log = logging.getLogger(__name__)
 
 # ==============================================================================
@@ -110,6 +118,9 @@ log = logging.getLogger(__name__)
 # When blacklists are this, all children should be excluded
 EXCLUDE_ALL = '*'
 
+# The largest number of blocks loaded lazily by cache_items whose definitions are fetched up front
+LAZY_PREFETCH_MAX_BLOCKS = 250
+
 
 new_contract('BlockUsageLocator', BlockUsageLocator)
 new_contract('BlockKey', BlockKey)
@@ -127,6 +138,9 @@ class SplitBulkWriteRecord(BulkOpsRecord):
         self.modules = defaultdict(dict)
         self.definitions = {}
         self.definitions_in_db = set()
+        # Publish states computed from the structures of this bulk operation, emptied whenever
+        # one of them is updated (see DraftVersioningModuleStore._get_publish_state)
+        self.publish_states = {}
 
     # TODO: This needs to track which branches have actually been modified/versioned,
     # so that copying one branch to another doesn't update the original branch.
@@ -186,6 +200,9 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
     """
     _bulk_ops_record_type = SplitBulkWriteRecord
 
+    # Bulk operations which write at least this many structures and definitions are logged
+    LOG_BULK_WRITES_OF = 100
+
     def _get_bulk_ops_record(self, course_key, ignore_case=False):
         """
         Return the :class:`.SplitBulkWriteRecord` for this course.
@@ -236,28 +253,23 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
 
         dirty = False
 
-        # If the content is dirty, then update the database
-        for _id in bulk_write_record.structures.viewkeys() - bulk_write_record.structures_in_db:
+        # If the content is dirty, then update the database, inserting each kind of document in one batch
+        start = time.time()
+        structures = [
+            bulk_write_record.structures[_id]
+            for _id in bulk_write_record.structures.viewkeys() - bulk_write_record.structures_in_db
+        ]
+        if structures:
             dirty = True
+            self.db_connection.insert_structures(structures)
 
-            try:
-                self.db_connection.insert_structure(bulk_write_record.structures[_id])
-            except DuplicateKeyError:
-                # We may not have looked up this structure inside this bulk operation, and thus
-                # didn't realize that it was already in the database. That's OK, the store is
-                # append only, so if it's already been written, we can just keep going.
-                log.debug("Attempted to insert duplicate structure %s", _id)
-
-        for _id in bulk_write_record.definitions.viewkeys() - bulk_write_record.definitions_in_db:
+        definitions = [
+            bulk_write_record.definitions[_id]
+            for _id in bulk_write_record.definitions.viewkeys() - bulk_write_record.definitions_in_db
+        ]
+        if definitions:
             dirty = True
-
-            try:
-                self.db_connection.insert_definition(bulk_write_record.definitions[_id])
-            except DuplicateKeyError:
-                # We may not have looked up this definition inside this bulk operation, and thus
-                # didn't realize that it was already in the database. That's OK, the store is
-                # append only, so if it's already been written, we can just keep going.
-                log.debug("Attempted to insert duplicate definition %s", _id)
+            self.db_connection.insert_definitions(definitions)
 
         if bulk_write_record.index is not None and bulk_write_record.index != bulk_write_record.initial_index:
             dirty = True
@@ -267,10 +279,29 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
             else:
                 self.db_connection.update_course_index(bulk_write_record.index, from_index=bulk_write_record.initial_index)
 
+        if dirty:
+            self._report_bulk_write(structure_key, len(structures), len(definitions), time.time() - start)
+
         if dirty and emit_signals:
             self.send_bulk_published_signal(bulk_write_record, structure_key)
             self.send_bulk_library_updated_signal(bulk_write_record, structure_key)
 
+    def _report_bulk_write(self, structure_key, num_structures, num_definitions, duration):
+        """
+        Record the number of documents written at the end of a bulk operation and how long
+        writing them took. Large bulk operations, e.g. imports and reruns, are also logged.
+        """
+        if dog_stats_api:
+            tags = [u'course_type:{}'.format(type(structure_key).__name__)]
+            dog_stats_api.histogram('split.bulk_write.structures', num_structures, tags=tags)
+            dog_stats_api.histogram('split.bulk_write.definitions', num_definitions, tags=tags)
+            dog_stats_api.histogram('split.bulk_write.duration', duration, tags=tags)
+        if num_structures + num_definitions >= self.LOG_BULK_WRITES_OF:
+            log.info(
+                u"Bulk operation on %s wrote %d structures and %d definitions in %.3f seconds",
+                structure_key, num_structures, num_definitions, duration
+            )
+
     def get_course_index(self, course_key, ignore_case=False):
         """
         Return the index for course_key.
@@ -337,6 +368,7 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
         bulk_write_record = self._get_bulk_ops_record(course_key)
         if bulk_write_record.active:
             bulk_write_record.structures[structure['_id']] = structure
+            bulk_write_record.publish_states.clear()
         else:
             self.db_connection.insert_structure(structure)
 
@@ -430,6 +462,21 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
             definitions.extend(defs_from_db)
         return definitions
 
+    def prefetch_definitions(self, course_key, ids):
+        """
+        Warm the process-local definition cache with all of the definitions in ``ids`` using
+        at most one query. Definitions already loaded by an active bulk operation on
+        course_key are skipped.
+
+        Arguments:
+            course_key (:class:`.CourseKey`): The course that these definitions are being loaded for
+            ids (list): A list of definition ids
+        """
+        bulk_write_record = self._get_bulk_ops_record(course_key)
+        if bulk_write_record.active:
+            ids = [definition_id for definition_id in ids if definition_id not in bulk_write_record.definitions]
+        return self.db_connection.prefetch_definitions(ids)
+
     def update_definition(self, course_key, definition):
         """
         Update a definition, respecting the current bulk operation status
@@ -636,14 +683,23 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                  default_class=None,
                  error_tracker=null_error_tracker,
                  i18n_service=None, fs_service=None, user_service=None,
-                 services=None, signal_handler=None, **kwargs):
+                 services=None, signal_handler=None, structure_cache_size=0, shared_structure_cache=None,
+                 definition_cache_size=0, **kwargs):
         """
         :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware.
+        :param structure_cache_size: byte budget of the process-local structure cache (0 disables it)
+        :param shared_structure_cache: optional Django cache used as a second tier for structures
+        :param definition_cache_size: byte budget of the process-local definition cache (0 disables it)
         """
 
         super(SplitMongoModuleStore, self).__init__(contentstore, **kwargs)
 
-        self.db_connection = MongoConnection(**doc_store_config)
+        self.db_connection = MongoConnection(
+            structure_cache_size=structure_cache_size,
+            shared_structure_cache=shared_structure_cache,
+            definition_cache_size=definition_cache_size,
+            **doc_store_config
+        )
         self.db = self.db_connection.database
 
         if default_class is not None:
@@ -690,6 +746,8 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         connection = self.db.connection
         connection.drop_database(self.db.name)
         connection.close()
+        self.db_connection.structure_cache.clear()
+        self.db_connection.definition_cache.clear()
 
     def cache_items(self, system, base_block_ids, course_key, depth=0, lazy=True):
         """
@@ -734,6 +792,11 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                         # convert_fields gets done later in the runtime's xblock_from_json
                         block.fields.update(definition.get('fields'))
                         block.definition_loaded = True
+            elif depth is not None and len(new_module_data) <= LAZY_PREFETCH_MAX_BLOCKS:
+                # Lazily loaded definitions are later read one block at a time; warm the
+                # definition cache for a bounded subtree with a single query instead. Unbounded
+                # loads (e.g. of a whole course) mostly touch blocks whose definitions are never read.
+                self.prefetch_definitions(course_key, [block.definition for block in new_module_data.itervalues()])
 
             system.module_data.update(new_module_data)
             return system.module_data
@@ -2404,7 +2467,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
             return result
 
-    @contract(block_key=BlockKey, blocks='dict(BlockKey: BlockData)')
+    @contract(block_key=BlockKey, blocks='map(BlockKey: BlockData)')
     def _remove_subtree(self, block_key, blocks):
         """
         Remove the subtree rooted at block_key
@@ -2908,8 +2971,8 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
     @contract(
         block_key=BlockKey,
-        source_blocks="dict(BlockKey: *)",
-        destination_blocks="dict(BlockKey: *)",
+        source_blocks="map(BlockKey: *)",
+        destination_blocks="map(BlockKey: *)",
         blacklist="list(BlockKey) | str",
     )
     def _copy_subdag(self, user_id, destination_version, block_key, source_blocks, destination_blocks, blacklist):
@@ -1,6 +1,8 @@
 """
 Module for the dual-branch fall-back Draft->Published Versioning ModuleStore
 """
+import threading
+from collections import OrderedDict
 
 from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore, EXCLUDE_ALL
 from xmodule.exceptions import InvalidVersionError
@@ -19,6 +21,14 @@ class DraftVersioningModuleStore(SplitMongoModuleStore, ModuleStoreDraftAndPubli
     A subclass of Split that supports a dual-branch fall-back versioning framework
         with a Draft branch that falls back to a Published branch.
     """
+    # Number of computed publish states, each for one version of a course's structures, kept by each process
+    PUBLISH_STATE_CACHE_SIZE = 16
+
+    def __init__(self, *args, **kwargs):
+        super(DraftVersioningModuleStore, self).__init__(*args, **kwargs)
+        self._publish_states = OrderedDict()
+        self._publish_states_lock = threading.Lock()
+
     def create_course(self, org, course, run, user_id, skip_auto_publish=False, **kwargs):
         """
         Creates and returns the course.
@@ -317,33 +327,111 @@ class DraftVersioningModuleStore(SplitMongoModuleStore, ModuleStoreDraftAndPubli
         def get_course(branch_name):
             return self._lookup_course(xblock.location.course_key.for_branch(branch_name)).structure
 
-        def get_block(course_structure, block_key):
-            return self._get_block_from_structure(course_structure, block_key)
-
         draft_course = get_course(ModuleStoreEnum.BranchName.draft)
         published_course = get_course(ModuleStoreEnum.BranchName.published)
 
+        changed = self._get_publish_state(
+            xblock.location.course_key,
+            ('changed', draft_course['_id'], published_course['_id']),
+            (ModuleStoreEnum.BranchName.draft, ModuleStoreEnum.BranchName.published),
+            lambda: self._compute_changed(draft_course, published_course),
+        )
+        return changed.get(BlockKey.from_usage_key(xblock.location), True)
+
+    def _compute_changed(self, draft_course, published_course):
+        """
+        Return a dict mapping the BlockKey of every block of the draft structure to whether it or
+        any of its descendants differ from the published structure, found in one pass over the blocks.
+        """
+        changed = {}
+
+        def get_block(course_structure, block_key):
+            return self._get_block_from_structure(course_structure, block_key)
+
         def has_changes_subtree(block_key):
+            if block_key in changed:
+                return changed[block_key]
             draft_block = get_block(draft_course, block_key)
             if draft_block is None:  # temporary fix for bad pointers TNL-1141
                 return True
             published_block = get_block(published_course, block_key)
-            if published_block is None:
-                return True
 
+            if published_block is None:
+                block_changed = True
             # check if the draft has changed since the published was created
-            if self._get_version(draft_block) != self._get_version(published_block):
-                return True
+            elif self._get_version(draft_block) != self._get_version(published_block):
+                block_changed = True
+            else:
+                # check the children in the draft, all of them so that each one's result is recorded
+                block_changed = False
+                for child_block_key in draft_block.fields.get('children', []):
+                    block_changed = has_changes_subtree(child_block_key) or block_changed
+            changed[block_key] = block_changed
+            return block_changed
 
-            # check the children in the draft
-            if 'children' in draft_block.fields:
-                return any(
-                    [has_changes_subtree(child_block_id) for child_block_id in draft_block.fields['children']]
-                )
+        for block_key in draft_course['blocks']:
+            has_changes_subtree(block_key)
+        return changed
 
-            return False
+    def _get_published_info(self, xblock):
+        """
+        Return the (edited_on, edited_by) of the published version of the block, or None if it
+        has no published version.
+        """
+        course_key = xblock.location.course_key
+        try:
+            published_course = self._lookup_course(
+                course_key.for_branch(ModuleStoreEnum.BranchName.published)
+            ).structure
+        except ItemNotFoundError:
+            # There is no published version xblock container, e.g. Library
+            return None
 
-        return has_changes_subtree(BlockKey.from_usage_key(xblock.location))
+        def compute_published_info():
+            published_info = {}
+            for block_key in published_course['blocks']:
+                edit_info = self._get_block_from_structure(published_course, block_key).edit_info
+                published_info[block_key] = (edit_info.edited_on, edit_info.edited_by)
+            return published_info
+
+        published_info = self._get_publish_state(
+            course_key,
+            ('published', published_course['_id']),
+            (ModuleStoreEnum.BranchName.published,),
+            compute_published_info,
+        )
+        return published_info.get(BlockKey.from_usage_key(xblock.location))
+
+    def _get_publish_state(self, course_key, key, branches, compute):
+        """
+        Return the publish state of the blocks of a course identified by `key`, a tuple including
+        the ids of the structures it is computed from, calling `compute` if it isn't cached.
+
+        Saved structures never change, so the state is only computed once for each version of the
+        structures and then reused. The exception is a bulk operation which has modified any of the
+        `branches` but not yet saved them, whose structures change in place: the state is then kept
+        by the bulk operation until it next updates a structure.
+        """
+        bulk_write_record = self._get_bulk_ops_record(course_key)
+        if bulk_write_record.active and any(branch in bulk_write_record.dirty_branches for branch in branches):
+            publish_state = bulk_write_record.publish_states.get(key)
+            if publish_state is None:
+                publish_state = bulk_write_record.publish_states[key] = compute()
+            return publish_state
+
+        with self._publish_states_lock:
+            publish_state = self._publish_states.pop(key, None)
+            if publish_state is not None:
+                # re-insert to mark as most recently used
+                self._publish_states[key] = publish_state
+                return publish_state
+
+        publish_state = compute()
+        with self._publish_states_lock:
+            self._publish_states[key] = publish_state
+            while len(self._publish_states) > self.PUBLISH_STATE_CACHE_SIZE:
+                self._publish_states.popitem(last=False)
+        return publish_state
 
     def publish(self, location, user_id, blacklist=None, **kwargs):
         """
@@ -459,7 +547,7 @@ class DraftVersioningModuleStore(SplitMongoModuleStore, ModuleStoreDraftAndPubli
         """
         Returns whether this xblock has a published version (whether it's up to date or not).
         """
-        return self._get_head(xblock, ModuleStoreEnum.BranchName.published) is not None
+        return self._get_published_info(xblock) is not None
 
     def convert_to_draft(self, location, user_id):
         """
@@ -470,15 +558,6 @@ class DraftVersioningModuleStore(SplitMongoModuleStore, ModuleStoreDraftAndPubli
         # This is a no-op in Split since a draft version of the data always remains
         pass
 
-    def _get_head(self, xblock, branch):
-        """ Gets block at the head of specified branch """
-        try:
-            course_structure = self._lookup_course(xblock.location.course_key.for_branch(branch)).structure
-        except ItemNotFoundError:
-            # There is no published version xblock container, e.g. Library
-            return None
-        return self._get_block_from_structure(course_structure, BlockKey.from_usage_key(xblock.location))
-
     def _get_version(self, block):
         """
         Return the version of the given database representation of a block.
@@ -520,10 +599,10 @@ class DraftVersioningModuleStore(SplitMongoModuleStore, ModuleStoreDraftAndPubli
         """
         Get the published branch and find when it was published if it was. Cache the results in the xblock
         """
-        published_block = self._get_head(xblock, ModuleStoreEnum.BranchName.published)
-        if published_block is not None:
-            setattr(xblock, '_published_by', published_block.edit_info.edited_by)
-            setattr(xblock, '_published_on', published_block.edit_info.edited_on)
+        published_info = self._get_published_info(xblock)
+        if published_info is not None:
+            setattr(xblock, '_published_on', published_info[0])
+            setattr(xblock, '_published_by', published_info[1])
 
     @contract(asset_key='AssetKey')
     def find_asset_metadata(self, asset_key, **kwargs):
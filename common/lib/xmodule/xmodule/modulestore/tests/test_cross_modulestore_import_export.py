@@ -453,6 +453,70 @@ class CrossStoreXMLRoundtrip(CourseComparisonTest, PartitionTestCase):
                             dest_course_key,
                         )
 
+    @ddt.data(*itertools.product(
+        MODULESTORE_SETUPS,
+        COURSE_DATA_NAMES,
+    ))
+    @ddt.unpack
+    def test_threaded_static_import(self, store_builder, course_data_name):
+        # Import the course serially into one store and with its static files imported by a pool of
+        # threads into another, which should produce the same course
+        with MongoContentstoreBuilder().build() as serial_content:
+            with store_builder.build(contentstore=serial_content) as serial_store:
+                with MongoContentstoreBuilder().build() as threaded_content:
+                    with store_builder.build(contentstore=threaded_content) as threaded_store:
+                        serial_course_key = serial_store.make_course_key('a', 'course', 'course')
+                        threaded_course_key = threaded_store.make_course_key('a', 'course', 'course')
+
+                        import_course_from_xml(
+                            serial_store,
+                            'test_user',
+                            TEST_DATA_DIR,
+                            source_dirs=[course_data_name],
+                            static_content_store=serial_content,
+                            target_id=serial_course_key,
+                            raise_on_failure=True,
+                            create_if_not_present=True,
+                        )
+
+                        import_course_from_xml(
+                            threaded_store,
+                            'test_user',
+                            TEST_DATA_DIR,
+                            source_dirs=[course_data_name],
+                            static_content_store=threaded_content,
+                            target_id=threaded_course_key,
+                            raise_on_failure=True,
+                            create_if_not_present=True,
+                            static_import_threads=4,
+                        )
+
+                        self.ignore_asset_key('_id')
+                        self.ignore_asset_key('uploadDate')
+                        self.ignore_asset_key('content_son')
+                        self.ignore_asset_key('thumbnail_location')
+
+                        self.assertCoursesEqual(
+                            serial_store,
+                            serial_course_key,
+                            threaded_store,
+                            threaded_course_key,
+                        )
+
+                        self.assertAssetsEqual(
+                            serial_content,
+                            serial_course_key,
+                            threaded_content,
+                            threaded_course_key,
+                        )
+
+                        self.assertAssetsMetadataEqual(
+                            serial_store,
+                            serial_course_key,
+                            threaded_store,
+                            threaded_course_key,
+                        )
+
     def test_split_course_export_import(self):
         # Construct the contentstore for storing the first import
         with MongoContentstoreBuilder().build() as source_content:
@@ -0,0 +1,93 @@
+"""
+Tests for the size-bounded caches used by the split modulestore.
+"""
+import unittest
+
+from bson.objectid import ObjectId
+
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.lru_cache import SerializedLRUCache, serialize
+
+
+class DictCache(dict):
+    """
+    Minimal stand-in for a Django cache.
+    """
+    def set(self, key, value, timeout=None):  # pylint: disable=unused-argument
+        self[key] = value
+
+
+class TestSerializedLRUCache(unittest.TestCase):
+    """
+    Tests of SerializedLRUCache
+    """
+    def _structure(self, block_id='course'):
+        """
+        Return a small structure in the form produced by `structure_from_mongo`.
+        """
+        root = BlockKey('course', block_id)
+        return {
+            '_id': ObjectId(),
+            'root': root,
+            'blocks': {
+                root: BlockData(block_type='course', fields={'children': []}, edit_info={}),
+            },
+        }
+
+    def test_returns_copies(self):
+        cache = SerializedLRUCache('test', 1024 * 1024)
+        structure = self._structure()
+        cache.set(structure['_id'], structure)
+
+        cached = cache.get(structure['_id'])
+        self.assertEqual(cached['root'], structure['root'])
+        self.assertIsNot(cached, structure)
+
+        # mutating a returned structure doesn't affect the cached one
+        cached['blocks'][cached['root']].definition_loaded = True
+        self.assertFalse(cache.get(structure['_id'])['blocks'][structure['root']].definition_loaded)
+        self.assertEqual(cache.hits, 2)
+        self.assertEqual(cache.misses, 0)
+
+    def test_miss(self):
+        cache = SerializedLRUCache('test', 1024 * 1024)
+        self.assertIsNone(cache.get(ObjectId()))
+        self.assertEqual(cache.misses, 1)
+
+    def test_byte_budget(self):
+        structures = [self._structure('course{}'.format(index)) for index in range(3)]
+        entry_size = len(serialize(structures[0]))
+        cache = SerializedLRUCache('test', entry_size * 2 + 1)
+
+        cache.set(structures[0]['_id'], structures[0])
+        cache.set(structures[1]['_id'], structures[1])
+        # touch the first so that the second is least recently used
+        cache.get(structures[0]['_id'])
+        cache.set(structures[2]['_id'], structures[2])
+
+        self.assertIn(structures[0]['_id'], cache)
+        self.assertNotIn(structures[1]['_id'], cache)
+        self.assertIn(structures[2]['_id'], cache)
+        self.assertLessEqual(cache.current_bytes, cache.max_bytes)
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_disabled(self):
+        cache = SerializedLRUCache('test', 0)
+        structure = self._structure()
+        cache.set(structure['_id'], structure)
+        self.assertEqual(len(cache), 0)
+        self.assertIsNone(cache.get(structure['_id']))
+
+    def test_shared_tier(self):
+        shared = DictCache()
+        structure = self._structure()
+        SerializedLRUCache('test', 1024 * 1024, shared_cache=shared).set(structure['_id'], structure)
+
+        # a new process-local cache falls back to the shared tier, then keeps the entry locally
+        cache = SerializedLRUCache('test', 1024 * 1024, shared_cache=shared)
+        self.assertEqual(cache.get(structure['_id'])['root'], structure['root'])
+        self.assertEqual((cache.misses, cache.shared_hits), (1, 1))
+        self.assertIn(structure['_id'], cache)
+        cache.get(structure['_id'])
+        self.assertEqual(cache.hits, 1)
@@ -10,6 +10,7 @@ import unittest
 import uuid
 
 from contracts import contract
+from mock import patch
 from nose.plugins.attrib import attr
 
 from openedx.core.lib import tempdir
@@ -28,6 +29,8 @@ from xmodule.fields import Date, Timedelta
 from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
 from xmodule.modulestore.tests.test_modulestore import check_has_course_method
 from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.lru_cache import SerializedLRUCache
+from xmodule.modulestore.split_mongo.mongo_connection import StructureCache
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
 from xmodule.modulestore.edit_info import EditInfoMixin
 
@@ -1978,6 +1981,57 @@ class TestSchema(SplitModuleTest):
             )
 
 
+class TestDocumentCaches(SplitModuleTest):
+    """
+    Test the process-local caches of immutable structures and definitions
+    """
+    def setUp(self):
+        super(TestDocumentCaches, self).setUp()
+        self.db_connection = modulestore().db_connection
+        self.db_connection.structure_cache = StructureCache('test.structures', 10 * 1024 * 1024)
+        self.db_connection.definition_cache = SerializedLRUCache('test.definitions', 10 * 1024 * 1024)
+        self.course_key = CourseLocator(org='testx', course='GreekHero', run='run', branch=BRANCH_NAME_DRAFT)
+
+    def test_structure_cache(self):
+        version_guid = modulestore().get_course(self.course_key).location.version_guid
+        self.assertIn(version_guid, self.db_connection.structure_cache)
+
+        hits = self.db_connection.structure_cache.hits
+        structure = modulestore().get_structure(self.course_key, version_guid)
+        self.assertEqual(structure['_id'], version_guid)
+        self.assertEqual(self.db_connection.structure_cache.hits, hits + 1)
+
+    def test_prefetch_definitions(self):
+        course_entry = modulestore()._lookup_course(self.course_key)  # pylint: disable=protected-access
+        blocks = course_entry.structure['blocks']
+        course_block = blocks[BlockKey('course', 'head12345')]
+        subtree = [course_block] + [blocks[BlockKey(*child)] for child in course_block.fields['children']]
+        definition_ids = [block.definition for block in subtree]
+
+        # lazily loading a bounded subtree fetched all of its definitions in one go
+        modulestore().get_course(self.course_key, depth=1)
+        for definition_id in definition_ids:
+            self.assertIn(definition_id, self.db_connection.definition_cache)
+        self.assertEqual(modulestore().prefetch_definitions(self.course_key, definition_ids), 0)
+
+        hits = self.db_connection.definition_cache.hits
+        definition = modulestore().get_definition(self.course_key, definition_ids[0])
+        self.assertEqual(definition['_id'], definition_ids[0])
+        self.assertEqual(self.db_connection.definition_cache.hits, hits + 1)
+
+    def test_definitions_not_duplicated(self):
+        course_entry = modulestore()._lookup_course(self.course_key)  # pylint: disable=protected-access
+        definition_id = course_entry.structure['blocks'][BlockKey('course', 'head12345')].definition
+        for _ in range(2):
+            # Once read from the database, then from the cache
+            definitions = self.db_connection.get_definitions([definition_id, definition_id])
+            self.assertEqual([definition['_id'] for definition in definitions], [definition_id])
+
+    def test_no_prefetch_for_unbounded_depth(self):
+        with patch.object(modulestore(), 'prefetch_definitions') as prefetch_definitions:
+            modulestore().get_course(self.course_key, depth=None)
+        self.assertFalse(prefetch_definitions.called)
+
 # ===========================================
 def modulestore():
     """
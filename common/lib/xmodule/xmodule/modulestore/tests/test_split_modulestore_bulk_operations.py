@@ -128,7 +128,7 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.update_structure(self.course_key, self.structure)
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
-        self.assertConnCalls(call.insert_structure(self.structure))
+        self.assertConnCalls(call.insert_structures([self.structure]))
 
     def test_write_multiple_structures_on_close(self):
         self.conn.get_course_index.return_value = None
@@ -139,10 +139,8 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.update_structure(self.course_key.replace(branch='b'), other_structure)
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
-        self.assertItemsEqual(
-            [call.insert_structure(self.structure), call.insert_structure(other_structure)],
-            self.conn.mock_calls
-        )
+        self.assertEqual(1, len(self.conn.mock_calls))
+        self.assertItemsEqual([self.structure, other_structure], self.conn.insert_structures.call_args[0][0])
 
     def test_write_index_and_definition_on_close(self):
         original_index = {'versions': {}}
@@ -154,7 +152,7 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
         self.assertConnCalls(
-            call.insert_definition(self.definition),
+            call.insert_definitions([self.definition]),
             call.update_course_index(
                 {'versions': {self.course_key.branch: self.definition['_id']}},
                 from_index=original_index
@@ -171,16 +169,13 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.update_definition(self.course_key.replace(branch='b'), other_definition)
         self.bulk.insert_course_index(self.course_key, {'versions': {'a': self.definition['_id'], 'b': other_definition['_id']}})
         self.bulk._end_bulk_operation(self.course_key)
-        self.assertItemsEqual(
-            [
-                call.insert_definition(self.definition),
-                call.insert_definition(other_definition),
-                call.update_course_index(
-                    {'versions': {'a': self.definition['_id'], 'b': other_definition['_id']}},
-                    from_index=original_index
-                )
-            ],
-            self.conn.mock_calls
+        self.assertItemsEqual([self.definition, other_definition], self.conn.insert_definitions.call_args[0][0])
+        self.assertConnCalls(
+            call.insert_definitions(self.conn.insert_definitions.call_args[0][0]),
+            call.update_course_index(
+                {'versions': {'a': self.definition['_id'], 'b': other_definition['_id']}},
+                from_index=original_index
+            )
         )
 
     def test_write_definition_on_close(self):
@@ -190,7 +185,7 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.update_definition(self.course_key, self.definition)
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
-        self.assertConnCalls(call.insert_definition(self.definition))
+        self.assertConnCalls(call.insert_definitions([self.definition]))
 
     def test_write_multiple_definitions_on_close(self):
         self.conn.get_course_index.return_value = None
@@ -201,10 +196,8 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.update_definition(self.course_key.replace(branch='b'), other_definition)
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
-        self.assertItemsEqual(
-            [call.insert_definition(self.definition), call.insert_definition(other_definition)],
-            self.conn.mock_calls
-        )
+        self.assertEqual(1, len(self.conn.mock_calls))
+        self.assertItemsEqual([self.definition, other_definition], self.conn.insert_definitions.call_args[0][0])
 
     def test_write_index_and_structure_on_close(self):
         original_index = {'versions': {}}
@@ -216,7 +209,7 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
         self.assertConnCalls(
-            call.insert_structure(self.structure),
+            call.insert_structures([self.structure]),
             call.update_course_index(
                 {'versions': {self.course_key.branch: self.structure['_id']}},
                 from_index=original_index
@@ -233,16 +226,13 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.update_structure(self.course_key.replace(branch='b'), other_structure)
         self.bulk.insert_course_index(self.course_key, {'versions': {'a': self.structure['_id'], 'b': other_structure['_id']}})
         self.bulk._end_bulk_operation(self.course_key)
-        self.assertItemsEqual(
-            [
-                call.insert_structure(self.structure),
-                call.insert_structure(other_structure),
-                call.update_course_index(
-                    {'versions': {'a': self.structure['_id'], 'b': other_structure['_id']}},
-                    from_index=original_index
-                )
-            ],
-            self.conn.mock_calls
+        self.assertItemsEqual([self.structure, other_structure], self.conn.insert_structures.call_args[0][0])
+        self.assertConnCalls(
+            call.insert_structures(self.conn.insert_structures.call_args[0][0]),
+            call.update_course_index(
+                {'versions': {'a': self.structure['_id'], 'b': other_structure['_id']}},
+                from_index=original_index
+            )
         )
 
     def test_version_structure_creates_new_version(self):
@@ -677,7 +667,7 @@ class TestBulkWriteMixinOpen(TestBulkWriteMixin):
         index_copy['versions']['draft'] = index['versions']['published']
         self.bulk.update_course_index(self.course_key, index_copy)
         self.bulk._end_bulk_operation(self.course_key)
-        self.conn.insert_structure.assert_called_once_with(published_structure)
+        self.conn.insert_structures.assert_called_once_with([published_structure])
         self.conn.update_course_index.assert_called_once_with(index_copy, from_index=self.conn.get_course_index.return_value)
         self.conn.get_course_index.assert_called_once_with(self.course_key)
 
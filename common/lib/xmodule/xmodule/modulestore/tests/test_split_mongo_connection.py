@@ -0,0 +1,140 @@
+"""
+Tests of the conversion of split modulestore structures to and from their mongo form.
+"""
+import copy
+import cPickle as pickle
+import unittest
+
+from bson.objectid import ObjectId
+from mock import patch
+
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo import lru_cache
+from xmodule.modulestore.split_mongo.mongo_connection import StructureCache, structure_from_mongo, structure_to_mongo
+
+
+class TestStructureFromMongo(unittest.TestCase):
+    """
+    Tests of structure_from_mongo and the lazily decoded blocks it produces
+    """
+    def setUp(self):
+        super(TestStructureFromMongo, self).setUp()
+        self.document = {
+            '_id': ObjectId(),
+            'root': ['course', 'course'],
+            'blocks': [
+                {
+                    'block_type': 'course', 'block_id': 'course', 'definition': ObjectId(),
+                    'fields': {'children': [['chapter', 'chapter1']]}, 'edit_info': {'edited_by': 1},
+                },
+                {
+                    'block_type': 'chapter', 'block_id': 'chapter1', 'definition': ObjectId(),
+                    'fields': {'display_name': 'Chapter 1'}, 'edit_info': {'edited_by': 2},
+                },
+            ],
+        }
+        self.structure = structure_from_mongo(copy.deepcopy(self.document))
+        self.root = BlockKey('course', 'course')
+        self.chapter = BlockKey('chapter', 'chapter1')
+
+    def test_decoded_on_access(self):
+        blocks = self.structure['blocks']
+        self.assertEqual(self.structure['root'], self.root)
+        self.assertItemsEqual(blocks.keys(), [self.root, self.chapter])
+        self.assertNotIsInstance(blocks._blocks[self.chapter], BlockData)  # pylint: disable=protected-access
+
+        block = blocks[self.root]
+        self.assertIsInstance(block, BlockData)
+        self.assertEqual(block.fields['children'], [self.chapter])
+        self.assertEqual(block.edit_info.edited_by, 1)
+        # the decoded block is kept, so changes to it persist
+        block.definition_loaded = True
+        self.assertTrue(blocks.get(self.root).definition_loaded)
+        self.assertNotIsInstance(blocks._blocks[self.chapter], BlockData)  # pylint: disable=protected-access
+
+    def test_iteration_decodes(self):
+        for block_key, block in self.structure['blocks'].iteritems():
+            self.assertIsInstance(block, BlockData)
+            self.assertEqual(block.block_type, block_key.type)
+        self.assertIsInstance(self.structure['blocks'].pop(self.chapter), BlockData)
+        self.assertNotIn(self.chapter, self.structure['blocks'])
+        self.assertIsNone(self.structure['blocks'].get(self.chapter))
+
+    def test_dict_conversions_decode(self):
+        blocks = self.structure['blocks']
+        updated = {}
+        updated.update(blocks)
+        for converted in (dict(blocks), updated, blocks.copy()):
+            self.assertItemsEqual(converted.keys(), [self.root, self.chapter])
+            self.assertIsInstance(converted[self.chapter], BlockData)
+        for block in blocks.viewvalues():
+            self.assertIsInstance(block, BlockData)
+        for block_key, block in blocks.viewitems():
+            self.assertEqual(block.block_type, block_key.type)
+
+    def test_copy_is_independent(self):
+        blocks = self.structure['blocks']
+        copied = copy.copy(blocks)
+        del copied[self.chapter]
+        self.assertIn(self.chapter, blocks)
+
+    def test_round_trip(self):
+        blocks = {block['block_id']: block for block in structure_to_mongo(self.structure)['blocks']}
+        self.assertItemsEqual(blocks.keys(), ['course', 'chapter1'])
+        self.assertEqual(blocks['course']['block_type'], 'course')
+        self.assertEqual(blocks['course']['fields']['children'], [self.chapter])
+        self.assertEqual(blocks['chapter1']['fields'], {'display_name': 'Chapter 1'})
+        self.assertEqual(blocks['chapter1']['edit_info']['edited_by'], 2)
+
+    def test_copies(self):
+        for structure in (copy.deepcopy(self.structure), pickle.loads(pickle.dumps(self.structure, -1))):
+            block = structure['blocks'][self.chapter]
+            self.assertEqual(block.fields, {'display_name': 'Chapter 1'})
+            self.assertEqual(block.edit_info.edited_by, 2)
+            self.assertIsNot(block, self.structure['blocks'][self.chapter])
+
+
+class TestStructureCache(unittest.TestCase):
+    """
+    Tests of the cache of structures, which keeps them decoded
+    """
+    def setUp(self):
+        super(TestStructureCache, self).setUp()
+        self.document = {
+            '_id': ObjectId(),
+            'root': ['course', 'course'],
+            'blocks': [
+                {
+                    'block_type': 'course', 'block_id': 'course', 'definition': ObjectId(),
+                    'fields': {'children': [], 'display_name': 'Course'}, 'edit_info': {'edited_by': 1},
+                },
+            ],
+        }
+        self.cache = StructureCache('test', 1024 * 1024)
+        self.cache.set(self.document['_id'], self.document)
+        self.root = BlockKey('course', 'course')
+
+    def test_hits_not_deserialized(self):
+        with patch.object(lru_cache, 'deserialize') as deserialize:
+            structure = self.cache.get(self.document['_id'])
+        self.assertFalse(deserialize.called)
+        self.assertEqual(structure['root'], self.root)
+        self.assertEqual(structure['blocks'][self.root].fields['display_name'], 'Course')
+
+    def test_hits_are_independent(self):
+        structure = self.cache.get(self.document['_id'])
+        block = structure['blocks'][self.root]
+        block.definition_loaded = True
+        block.fields['display_name'] = 'Changed'
+        del structure['blocks'][self.root]
+
+        block = self.cache.get(self.document['_id'])['blocks'][self.root]
+        self.assertFalse(block.definition_loaded)
+        self.assertEqual(block.fields['display_name'], 'Course')
+
+    def test_documents_are_copied(self):
+        # The cache keeps its own copy of the documents it's given
+        self.document['blocks'][0]['fields']['display_name'] = 'Changed'
+        structure = self.cache.get(self.document['_id'])
+        self.assertEqual(structure['blocks'][self.root].fields['display_name'], 'Course')
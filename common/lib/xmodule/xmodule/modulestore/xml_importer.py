@@ -20,8 +20,10 @@ Modulestore virtual   |          XML physical (draft, published)
              (a, a)   |  (a, a) | (x, a) | (x, x) | (x, y) | (a, x)
              (a, b)   |  (a, b) | (x, b) | (x, x) | (x, y) | (a, x)
 """
+import functools
 import logging
 from abc import abstractmethod
+from multiprocessing.pool import ThreadPool
 from opaque_keys.edx.locator import LibraryLocator
 import os
 import mimetypes
@@ -55,10 +57,14 @@ log = logging.getLogger(__name__)
 
 def import_static_content(
         course_data_path, static_content_store,
-        target_id, subpath='static', verbose=False):
-
-    remap_dict = {}
+        target_id, subpath='static', verbose=False, pool=None):
+    """
+    Import the files under `subpath` of `course_data_path` into `static_content_store`, with their
+    thumbnails, and return the map of their paths to their asset keys.
 
+    If `pool` (a multiprocessing.pool.ThreadPool) is given, its threads read, thumbnail and save
+    the files, at most as many at a time as it has threads.
+    """
     # now import all static assets
     static_dir = course_data_path / subpath
     try:
@@ -75,6 +81,7 @@ def import_static_content(
     mimetypes.add_type('application/octet-stream', '.srt')
     mimetypes_list = mimetypes.types_map.values()
 
+    content_paths = []
     for dirname, _, filenames in os.walk(static_dir):
         for filename in filenames:
 
@@ -85,58 +92,77 @@ def import_static_content(
                     log.debug('skipping static content %s...', content_path)
                 continue
 
-            if verbose:
-                log.debug('importing static content %s...', content_path)
+            content_paths.append(content_path)
 
-            try:
-                with open(content_path, 'rb') as f:
-                    data = f.read()
-            except IOError:
-                if filename.startswith('._'):
-                    # OS X "companion files". See
-                    # http://www.diigo.com/annotated/0c936fda5da4aa1159c189cea227e174
-                    continue
-                # Not a 'hidden file', then re-raise exception
-                raise
+    import_file = functools.partial(
+        _import_static_file, static_dir, policy, mimetypes_list, static_content_store, target_id, verbose
+    )
+    if pool is None:
+        imported = [import_file(content_path) for content_path in content_paths]
+    else:
+        imported = list(pool.imap_unordered(import_file, content_paths))
 
-            # strip away leading path from the name
-            fullname_with_subpath = content_path.replace(static_dir, '')
-            if fullname_with_subpath.startswith('/'):
-                fullname_with_subpath = fullname_with_subpath[1:]
-            asset_key = StaticContent.compute_location(target_id, fullname_with_subpath)
-
-            policy_ele = policy.get(asset_key.path, {})
-            displayname = policy_ele.get('displayname', filename)
-            locked = policy_ele.get('locked', False)
-            mime_type = policy_ele.get('contentType')
-
-            # Check extracted contentType in list of all valid mimetypes
-            if not mime_type or mime_type not in mimetypes_list:
-                mime_type = mimetypes.guess_type(filename)[0]   # Assign guessed mimetype
-            content = StaticContent(
-                asset_key, displayname, mime_type, data,
-                import_path=fullname_with_subpath, locked=locked
-            )
+    # store the remapping information which will be needed
+    # to subsitute in the module data
+    return dict(remap for remap in imported if remap is not None)
 
-            # first let's save a thumbnail so we can get back a thumbnail location
-            thumbnail_content, thumbnail_location = static_content_store.generate_thumbnail(content)
 
-            if thumbnail_content is not None:
-                content.thumbnail_location = thumbnail_location
+def _import_static_file(static_dir, policy, mimetypes_list, static_content_store, target_id, verbose, content_path):
+    """
+    Import the file at `content_path` and its thumbnail into `static_content_store`.
 
-            # then commit the content
-            try:
-                static_content_store.save(content)
-            except Exception as err:
-                log.exception(u'Error importing {0}, error={1}'.format(
-                    fullname_with_subpath, err
-                ))
+    Returns the file's path relative to `static_dir` and its asset key, or None if it was skipped.
+    """
+    filename = os.path.basename(content_path)
 
-            # store the remapping information which will be needed
-            # to subsitute in the module data
-            remap_dict[fullname_with_subpath] = asset_key
+    if verbose:
+        log.debug('importing static content %s...', content_path)
 
-    return remap_dict
+    try:
+        with open(content_path, 'rb') as f:
+            data = f.read()
+    except IOError:
+        if filename.startswith('._'):
+            # OS X "companion files". See
+            # http://www.diigo.com/annotated/0c936fda5da4aa1159c189cea227e174
+            return None
+        # Not a 'hidden file', then re-raise exception
+        raise
+
+    # strip away leading path from the name
+    fullname_with_subpath = content_path.replace(static_dir, '')
+    if fullname_with_subpath.startswith('/'):
+        fullname_with_subpath = fullname_with_subpath[1:]
+    asset_key = StaticContent.compute_location(target_id, fullname_with_subpath)
+
+    policy_ele = policy.get(asset_key.path, {})
+    displayname = policy_ele.get('displayname', filename)
+    locked = policy_ele.get('locked', False)
+    mime_type = policy_ele.get('contentType')
+
+    # Check extracted contentType in list of all valid mimetypes
+    if not mime_type or mime_type not in mimetypes_list:
+        mime_type = mimetypes.guess_type(filename)[0]   # Assign guessed mimetype
+    content = StaticContent(
+        asset_key, displayname, mime_type, data,
+        import_path=fullname_with_subpath, locked=locked
+    )
+
+    # first let's save a thumbnail so we can get back a thumbnail location
+    thumbnail_content, thumbnail_location = static_content_store.generate_thumbnail(content)
+
+    if thumbnail_content is not None:
+        content.thumbnail_location = thumbnail_location
+
+    # then commit the content
+    try:
+        static_content_store.save(content)
+    except Exception as err:
+        log.exception(u'Error importing {0}, error={1}'.format(
+            fullname_with_subpath, err
+        ))
+
+    return fullname_with_subpath, asset_key
 
 
 class ImportManager(object):
@@ -170,6 +196,9 @@ class ImportManager(object):
         create_if_not_present: If True, then a new courselike is created if it doesn't already exist.
             Otherwise, it throws an InvalidLocationError if the courselike does not exist.
 
+        static_import_threads: If non-zero, the static files are imported by this many threads, in the
+            background while the blocks are imported.
+
         default_class, load_error_modules: are arguments for constructing the XMLModuleStore (see its doc)
     """
     store_class = XMLModuleStore
@@ -180,7 +209,7 @@ class ImportManager(object):
             load_error_modules=True, static_content_store=None,
             target_id=None, verbose=False,
             do_import_static=True, create_if_not_present=False,
-            raise_on_failure=False
+            raise_on_failure=False, static_import_threads=0
     ):
         self.store = store
         self.user_id = user_id
@@ -193,6 +222,7 @@ class ImportManager(object):
         self.do_import_static = do_import_static
         self.create_if_not_present = create_if_not_present
         self.raise_on_failure = raise_on_failure
+        self.static_import_threads = static_import_threads
         self.xml_module_store = self.store_class(
             data_dir,
             default_class=default_class,
@@ -213,15 +243,15 @@ class ImportManager(object):
         if self.target_id:
             assert len(self.xml_module_store.modules) == 1
 
-    def import_static(self, data_path, dest_id):
+    def import_static(self, data_path, dest_id, pool=None):
         """
-        Import all static items into the content store.
+        Import all static items into the content store, using the threads of `pool` if given.
         """
         if self.static_content_store is not None and self.do_import_static:
             # first pass to find everything in /static/
             import_static_content(
                 data_path, self.static_content_store,
-                dest_id, subpath='static', verbose=self.verbose
+                dest_id, subpath='static', verbose=self.verbose, pool=pool
             )
 
         elif self.verbose and not self.do_import_static:
@@ -244,7 +274,7 @@ class ImportManager(object):
         if os.path.exists(data_path / simport):
             import_static_content(
                 data_path, self.static_content_store,
-                dest_id, subpath=simport, verbose=self.verbose
+                dest_id, subpath=simport, verbose=self.verbose, pool=pool
             )
 
     def import_asset_metadata(self, data_dir, course_id):
@@ -432,14 +462,27 @@ class ImportManager(object):
                 # Retrieve the course itself.
                 source_courselike, courselike, data_path = self.get_courselike(courselike_key, runtime, dest_id)
 
-                # Import all static pieces.
-                self.import_static(data_path, dest_id)
+                if self.static_import_threads:
+                    # Import all static pieces in the background while the blocks are imported. One extra
+                    # thread walks the static directories and hands the files to the others.
+                    pool = ThreadPool(self.static_import_threads + 1)
+                    try:
+                        static_import = pool.apply_async(self.import_static, (data_path, dest_id, pool))
+                        self.import_asset_metadata(data_path, dest_id)
+                        self.import_children(source_courselike, courselike, courselike_key, dest_id)
+                        static_import.get()
+                    finally:
+                        pool.close()
+                        pool.join()
+                else:
+                    # Import all static pieces.
+                    self.import_static(data_path, dest_id)
 
-                # Import asset metadata stored in XML.
-                self.import_asset_metadata(data_path, dest_id)
+                    # Import asset metadata stored in XML.
+                    self.import_asset_metadata(data_path, dest_id)
 
-                # Import all children
-                self.import_children(source_courselike, courselike, courselike_key, dest_id)
+                    # Import all children
+                    self.import_children(source_courselike, courselike, courselike_key, dest_id)
 
             # This bulk operation wraps all the operations to populate the draft branch with any items
             # from the /drafts subdirectory.
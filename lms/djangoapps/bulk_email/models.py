@@ -12,6 +12,8 @@ file and check it in at the same time as your model changes. To do that,
 
 """
 import logging
+import re
+import string
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import models, transaction
@@ -228,6 +230,114 @@ class CourseEmailTemplate(models.Model):
         """
         return CourseEmailTemplate._render(self.html_template, htmltext, context)
 
+    def compile_plaintext(self, plaintext, context, recipient_keys):
+        """
+        Return a CompiledEmailTemplate rendering the same plain text messages as
+        ``render_plaintext(plaintext, context)``, for contexts differing only in `recipient_keys`.
+        """
+        return CompiledEmailTemplate(self.plain_template, plaintext, context, recipient_keys)
+
+    def compile_htmltext(self, htmltext, context, recipient_keys):
+        """
+        Return a CompiledEmailTemplate rendering the same HTML messages as
+        ``render_htmltext(htmltext, context)``, for contexts differing only in `recipient_keys`.
+        """
+        return CompiledEmailTemplate(self.html_template, htmltext, context, recipient_keys)
+
+
+class CompiledEmailTemplate(object):
+    """
+    A CourseEmailTemplate and message body, prepared for rendering the message
+    for many recipients whose contexts only differ in a few `recipient_keys`.
+
+    Everything that doesn't depend on the recipient is formatted, and every line
+    which doesn't is wrapped, once. Rendering a message then only formats the
+    recipient's values into the remaining lines, and wraps those. The result is
+    the same as that of ``CourseEmailTemplate._render``.
+    """
+    # Marks the places in the message where a recipient's values go
+    PLACEHOLDER = u'\x00{}\x00'
+    PLACEHOLDER_RE = re.compile(u'\x00(\\d+)\x00')
+
+    def __init__(self, format_string, message_body, context, recipient_keys):
+        self.format_string = format_string
+        self.message_body = message_body
+        self.recipient_keys = frozenset(recipient_keys)
+        # The fields of the template which depend on the recipient, as (field name, format string) pairs.
+        # The last placeholder is that of the message body, if the body depends on the recipient.
+        self.fields = []
+        # The lines of the message: either strings which are already wrapped,
+        # or lists of the pieces (strings and placeholder indices) of lines to render
+        self.lines = None
+        try:
+            self._compile(context)
+        except (ValueError, IndexError):
+            # Leave anything unusual about the template to _render, which will raise as it always did
+            self.lines = None
+
+    def _compile(self, context):
+        """
+        Format everything in the message which doesn't depend on the recipient.
+        """
+        formatter = string.Formatter()
+        skeleton = []
+        for literal, field_name, format_spec, conversion in formatter.parse(self.format_string):
+            skeleton.append(literal)
+            if field_name is None:
+                continue
+            if not field_name or '{' in format_spec:
+                raise ValueError("Unsupported field in email template")
+            field_format = u'{0' + (u'!' + conversion if conversion else u'') + u':' + format_spec + u'}'
+            if re.match(r'[^.\[]*', field_name).group() in self.recipient_keys:
+                skeleton.append(self.PLACEHOLDER.format(len(self.fields)))
+                self.fields.append((field_name, field_format))
+            else:
+                skeleton.append(field_format.format(formatter.get_field(field_name, (), context)[0]))
+        skeleton = u''.join(skeleton)
+
+        self.body_varies = '%%' in self.message_body
+        if self.body_varies:
+            body = self.PLACEHOLDER.format(len(self.fields))
+        else:
+            body = self.message_body
+        skeleton = skeleton.replace(COURSE_EMAIL_MESSAGE_BODY_TAG.format(), body, 1)
+
+        self.lines = []
+        for line in skeleton.split(u'\n'):
+            if self.PLACEHOLDER_RE.search(line):
+                pieces = self.PLACEHOLDER_RE.split(line)
+                # split() puts the captured placeholder indices at the odd positions
+                self.lines.append([int(piece) if index % 2 else piece for index, piece in enumerate(pieces)])
+            else:
+                self.lines.append(wrap_message(line))
+
+    def render(self, context):
+        """
+        Render the message for the recipient described by `context`.
+        """
+        if self.lines is None:
+            return CourseEmailTemplate._render(self.format_string, self.message_body, context)
+
+        formatter = string.Formatter()
+        values = [
+            field_format.format(formatter.get_field(field_name, (), context)[0])
+            for field_name, field_format in self.fields
+        ]
+        if self.body_varies:
+            if 'user_id' in context and 'course_id' in context:
+                values.append(substitute_keywords_with_data(self.message_body, context))
+            else:
+                values.append(self.message_body)
+
+        rendered = []
+        for line in self.lines:
+            if isinstance(line, list):
+                line = wrap_message(u''.join(
+                    values[piece] if isinstance(piece, int) else piece for piece in line
+                ))
+            rendered.append(line)
+        return u'\n'.join(rendered)
+
 
 class CourseAuthorization(models.Model):
     """
@@ -6,8 +6,9 @@ to a course.
 import re
 import random
 import json
+import time
 from time import sleep
-from collections import Counter
+from collections import Counter, OrderedDict
 import logging
 
 import dogstats_wrapper as dog_stats_api
@@ -366,23 +367,51 @@ def send_course_email(entry_id, email_id, to_list, global_email_context, subtask
     return new_subtask_status.to_dict()
 
 
-def _filter_optouts_from_recipients(to_list, course_id):
+# The time at which they were loaded, and the email addresses of the students who
+# opted out of the courses of the emails this process sent most recently, keyed by
+# the email's id and creation time.
+_OPTOUT_EMAILS = OrderedDict()
+_MAX_OPTOUT_EMAIL_SETS = 4
+# Seconds for which the optouts of an email's course are reused
+OPTOUT_EMAILS_TIMEOUT = 60
+
+
+def _get_optout_emails(course_email):
     """
-    Filters a recipient list based on student opt-outs for a given course.
+    Return the set of email addresses of students who opted out of email from
+    the course of `course_email`.
+
+    The set is shared by the subtasks of the email that a process runs within
+    OPTOUT_EMAILS_TIMEOUT seconds of loading it, rather than queried for each
+    subtask, so students who opt out during a long send stop getting its email
+    soon after.
+    """
+    key = (course_email.id, course_email.created)
+    loaded_at, optout_emails = _OPTOUT_EMAILS.get(key, (None, None))
+    if optout_emails is None or time.time() - loaded_at > OPTOUT_EMAILS_TIMEOUT:
+        optout_emails = frozenset(
+            Optout.objects.filter(course_id=course_email.course_id).values_list('user__email', flat=True)
+        )
+        _OPTOUT_EMAILS.pop(key, None)
+        _OPTOUT_EMAILS[key] = (time.time(), optout_emails)
+        while len(_OPTOUT_EMAILS) > _MAX_OPTOUT_EMAIL_SETS:
+            _OPTOUT_EMAILS.popitem(last=False)
+    return optout_emails
+
+
+def _filter_optouts_from_recipients(to_list, course_email):
+    """
+    Filters a recipient list based on student opt-outs for the course of `course_email`.
 
     Returns the filtered recipient list, as well as the number of optouts
     removed from the list.
     """
-    optouts = Optout.objects.filter(
-        course_id=course_id,
-        user__in=[i['pk'] for i in to_list]
-    ).values_list('user__email', flat=True)
-    optouts = set(optouts)
+    optout_emails = _get_optout_emails(course_email)
     # Only count the num_optout for the first time the optouts are calculated.
     # We assume that the number will not change on retries, and so we don't need
     # to calculate it each time.
-    num_optout = len(optouts)
-    to_list = [recipient for recipient in to_list if recipient['email'] not in optouts]
+    num_optout = len(set(recipient['email'] for recipient in to_list if recipient['email'] in optout_emails))
+    to_list = [recipient for recipient in to_list if recipient['email'] not in optout_emails]
     return to_list, num_optout
 
 
@@ -471,7 +500,7 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
     # that existed at that time, and we don't need to keep checking for changes
     # in the Optout list.
     if subtask_status.get_retry_count() == 0:
-        to_list, num_optout = _filter_optouts_from_recipients(to_list, course_email.course_id)
+        to_list, num_optout = _filter_optouts_from_recipients(to_list, course_email)
         subtask_status.increment(skipped=num_optout)
 
     course_title = global_email_context['course_title']
@@ -490,6 +519,17 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         # Define context values to use in all course emails:
         email_context = {'name': '', 'email': ''}
         email_context.update(global_email_context)
+        email_context['course_id'] = course_email.course_id
+
+        # Format everything in the messages which is the same for every recipient once:
+        recipient_keys = ('name', 'email', 'user_id')
+        plaintext_template = course_email_template.compile_plaintext(
+            course_email.text_message, email_context, recipient_keys
+        )
+        htmltext_template = course_email_template.compile_htmltext(
+            course_email.html_message, email_context, recipient_keys
+        )
+        start_time = time.time()
 
         while to_list:
             # Update context with user-specific values from the user at the end of the list.
@@ -503,11 +543,10 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
             email_context['email'] = email
             email_context['name'] = current_recipient['profile__name']
             email_context['user_id'] = current_recipient['pk']
-            email_context['course_id'] = course_email.course_id
 
             # Construct message content using templates and context:
-            plaintext_msg = course_email_template.render_plaintext(course_email.text_message, email_context)
-            html_msg = course_email_template.render_htmltext(course_email.html_message, email_context)
+            plaintext_msg = plaintext_template.render(email_context)
+            html_msg = htmltext_template.render(email_context)
 
             # Create email:
             email_msg = EmailMultiAlternatives(
@@ -616,6 +655,12 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
             recipients_info[email] += 1
             to_list.pop()
 
+        elapsed = time.time() - start_time
+        if recipient_num and elapsed > 0:
+            dog_stats_api.histogram(
+                'course_email.sent_per_second', total_recipients_successful / elapsed, tags=[_statsd_tag(course_title)]
+            )
+
         log.info(
             "BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Total Successful Recipients: %s/%s, \
             Failed Recipients: %s/%s",
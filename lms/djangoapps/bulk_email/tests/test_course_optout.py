@@ -3,6 +3,7 @@
 Unit tests for student optouts from course email
 """
 import json
+import time
 from mock import patch, Mock
 from nose.plugins.attrib import attr
 
@@ -11,6 +12,8 @@ from django.core.management import call_command
 from django.core.urlresolvers import reverse
 from django.conf import settings
 
+from bulk_email import tasks
+from bulk_email.models import CourseEmail, Optout
 from student.tests.factories import UserFactory, AdminFactory, CourseEnrollmentFactory
 from student.models import CourseEnrollment
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
@@ -109,3 +112,16 @@ class TestOptoutCourseEmails(ModuleStoreTestCase):
         self.assertEqual(len(mail.outbox), 1)
         self.assertEqual(len(mail.outbox[0].to), 1)
         self.assertEquals(mail.outbox[0].to[0], self.student.email)
+
+    def test_optouts_reloaded(self):
+        """
+        Make sure optouts made while an email is being sent are seen by its later subtasks.
+        """
+        course_email = CourseEmail.create(self.course.id, self.instructor, 'all', 'subject', 'message')
+        self.assertEqual(tasks._get_optout_emails(course_email), frozenset())  # pylint: disable=protected-access
+        Optout.objects.create(user=self.student, course_id=self.course.id)
+
+        with patch('bulk_email.tasks.time') as mock_time:
+            mock_time.time.return_value = time.time() + tasks.OPTOUT_EMAILS_TIMEOUT + 1
+            optout_emails = tasks._get_optout_emails(course_email)  # pylint: disable=protected-access
+        self.assertEqual(optout_emails, frozenset([self.student.email]))
@@ -137,6 +137,20 @@ class CourseEmailTemplateTest(TestCase):
         context = self._get_sample_plain_context()
         template.render_plaintext("My new plain text.", context)
 
+    def test_compiled_render(self):
+        template = CourseEmailTemplate.get_template()
+        context = self._get_sample_html_context()
+        context.update({'name': '', 'user_id': None, 'course_id': SlashSeparatedCourseKey('edX', '1.23x', 'test')})
+        message = u"Dear %%USER_FULLNAME%%,\nMy new text for {course_title}. " + u"A long line. " * 20
+        recipient_keys = ('name', 'email', 'user_id')
+        compiled_plaintext = template.compile_plaintext(message, context, recipient_keys)
+        compiled_htmltext = template.compile_htmltext(message, context, recipient_keys)
+
+        for user in (UserFactory.create(), UserFactory.create(first_name='A', last_name='Much Longer Name')):
+            context.update({'name': user.profile.name, 'email': user.email, 'user_id': user.id})
+            self.assertEqual(compiled_plaintext.render(context), template.render_plaintext(message, context))
+            self.assertEqual(compiled_htmltext.render(context), template.render_htmltext(message, context))
+
 
 @attr('shard_1')
 class CourseAuthorizationTest(TestCase):
@@ -0,0 +1,67 @@
+"""
+Opt-in cache of the rendered fragments of XBlock views which are the same for every user.
+
+A block opts a view in by listing it in its `user_invariant_views`. The fragment is cached
+as rendered by the LMS runtime, after the static url replacements and the other wrappers
+have been applied, along with its JS and CSS resources. It is keyed by the block's usage
+key, the time it was last edited, the view, the language, and the platform revision (which
+the urls of static files depend on), so an edit or a deployment simply misses the old entry.
+"""
+import hashlib
+
+from django.conf import settings
+from django.utils.translation import get_language
+from xblock.fragment import Fragment
+
+import dogstats_wrapper as dog_stats_api
+from courseware.access import has_access
+from util.cache import cache
+
+
+def fragment_cache_key(block, view_name):
+    """
+    Return the key of the cached `view_name` fragment of `block`, or None if the
+    fragment can't be cached.
+    """
+    if view_name not in getattr(block, 'user_invariant_views', ()):
+        return None
+
+    # Only blocks of modulestores which record edits have a version to key their fragments with
+    get_edited_on = getattr(block.runtime, 'get_edited_on', None)
+    edited_on = get_edited_on(block) if get_edited_on is not None else None
+    if edited_on is None:
+        return None
+
+    key = u'|'.join([
+        unicode(block.location),
+        edited_on.isoformat(),
+        view_name,
+        get_language() or u'',
+        unicode(settings.EDX_PLATFORM_REVISION),
+    ])
+    return u'courseware.fragment.{}'.format(hashlib.md5(key.encode('utf-8')).hexdigest())
+
+
+def render_fragment(user, course, block, view_name):
+    """
+    Render the `view_name` view of `block`, which was bound for `user` by module_render,
+    reusing the fragment rendered for other users if the block opted the view in to caching.
+
+    Course staff get the debug markup added to the views they see, so their fragments are
+    always rendered.
+    """
+    timeout = settings.XBLOCK_FRAGMENT_CACHE_TIMEOUT
+    key = fragment_cache_key(block, view_name) if timeout else None
+    if key is None or has_access(user, 'staff', course):
+        return block.render(view_name)
+
+    tags = [u'view:{}'.format(view_name), u'block_type:{}'.format(block.location.block_type)]
+    pods = cache.get(key)
+    if pods is not None:
+        dog_stats_api.increment('courseware.fragment_cache.hit', tags=tags)
+        return Fragment.from_pods(pods)
+
+    dog_stats_api.increment('courseware.fragment_cache.miss', tags=tags)
+    fragment = block.render(view_name)
+    cache.set(key, fragment.to_pods(), timeout)
+    return fragment
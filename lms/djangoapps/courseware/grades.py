@@ -1,34 +1,40 @@
 # Compute grades using real division, with no integer truncation
 from __future__ import division
 from collections import defaultdict
+from itertools import islice
 import json
 import random
 import logging
 
 from contextlib import contextmanager
+from datetime import datetime
 from django.conf import settings
 from django.db import transaction
 from django.test.client import RequestFactory
+from django.utils.timezone import UTC
 
 import dogstats_wrapper as dog_stats_api
 
 from courseware import courses
-from courseware.model_data import FieldDataCache
+from courseware.model_data import FieldDataCache, FieldDataPrefetch
 from student.models import anonymous_id_for_user
 from util.module_utils import yield_dynamic_descriptor_descendents
 from xmodule import graders
 from xmodule.graders import Score
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
-from .models import StudentModule
+from .models import StudentModule, PersistentSubsectionGrade
 from .module_render import get_module_for_descriptor
 from submissions import api as sub_api  # installed from the edx-submissions repository
 from opaque_keys import InvalidKeyError
-from opaque_keys.edx.keys import CourseKey
+from opaque_keys.edx.keys import CourseKey, UsageKey
 
 
 log = logging.getLogger("edx.courseware")
 
+# Number of students whose StudentModule scores are loaded together by iterate_grades_for
+GRADING_BATCH_SIZE = 100
+
 
 def answer_distributions(course_key):
     """
@@ -122,16 +128,16 @@ def answer_distributions(course_key):
 
 
 @transaction.commit_manually
-def grade(student, request, course, keep_raw_scores=False):
+def grade(student, request, course, keep_raw_scores=False, student_module_cache=None):
     """
     Wraps "_grade" with the manual_transaction context manager just in case
     there are unanticipated errors.
     """
     with manual_transaction():
-        return _grade(student, request, course, keep_raw_scores)
+        return _grade(student, request, course, keep_raw_scores, student_module_cache)
 
 
-def _grade(student, request, course, keep_raw_scores):
+def _grade(student, request, course, keep_raw_scores, student_module_cache=None):
     """
     Unwrapped version of "grade"
 
@@ -150,6 +156,9 @@ def _grade(student, request, course, keep_raw_scores):
     - keep_raw_scores : if True, then value for key 'raw_scores' contains scores
       for every graded module
 
+    If `student_module_cache` is given (see `_student_module_caches_for`), it
+    replaces the per-section and per-problem StudentModule queries.
+
     More information on the format is in the docstring for CourseGrader.
     """
     grading_context = course.grading_context
@@ -162,6 +171,14 @@ def _grade(student, request, course, keep_raw_scores):
         course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id)
     )
 
+    # Scores of subsections that were graded before and have not changed since
+    persisted_grades = _persisted_grades_for(student, course.id)
+
+    # Field data of the modules created below, loaded a section at a time by the
+    # first module created in each section, so sections that are scored without
+    # creating any modules cost no queries
+    field_data_prefetch = FieldDataPrefetch.for_user(course.id, student)
+
     totaled_scores = {}
     # This next complicated loop is just to collect the totaled_scores, which is
     # passed to the grader
@@ -174,20 +191,32 @@ def _grade(student, request, course, keep_raw_scores):
             # some problems have state that is updated independently of interaction
             # with the LMS, so they need to always be scored. (E.g. foldit.,
             # combinedopenended)
-            should_grade_section = any(
+            always_recalculate = any(
                 descriptor.always_recalculate_grades for descriptor in section['xmoduledescriptors']
             )
+            should_grade_section = always_recalculate
+
+            persisted_scores = None
+            if not always_recalculate:
+                persisted_scores = _get_persisted_scores(persisted_grades, section_descriptor)
 
             # If there are no problems that always have to be regraded, check to
             # see if any of our locations are in the scores from the submissions
             # API. If scores exist, we have to calculate grades for this section.
-            if not should_grade_section:
+            if persisted_scores is not None:
+                should_grade_section = True
+            elif not should_grade_section:
                 should_grade_section = any(
                     descriptor.location.to_deprecated_string() in submissions_scores
                     for descriptor in section['xmoduledescriptors']
                 )
 
-            if not should_grade_section:
+            if not should_grade_section and student_module_cache is not None:
+                should_grade_section = any(
+                    descriptor.location in student_module_cache
+                    for descriptor in section['xmoduledescriptors']
+                )
+            elif not should_grade_section:
                 with manual_transaction():
                     should_grade_section = StudentModule.objects.filter(
                         student=student,
@@ -198,21 +227,36 @@ def _grade(student, request, course, keep_raw_scores):
 
             # If we haven't seen a single problem in the section, we don't have
             # to grade it at all! We can assume 0%
-            if should_grade_section:
+            if persisted_scores is not None:
+                scores = persisted_scores
+                _, graded_total = graders.aggregate_scores(scores, section_name)
+                if keep_raw_scores:
+                    raw_scores += scores
+            elif should_grade_section:
                 scores = []
+                section_descriptors = [section_descriptor] + section['xmoduledescriptors']
 
                 def create_module(descriptor):
                     '''creates an XModule instance given a descriptor'''
                     # TODO: We need the request to pass into here. If we could forego that, our arguments
                     # would be simpler
                     with manual_transaction():
-                        field_data_cache = FieldDataCache([descriptor], course.id, student)
+                        if not field_data_prefetch.covers(descriptor, []):
+                            # Load the state of every module in the section at once, rather
+                            # than with several queries for each module created
+                            field_data_prefetch.load(
+                                section_descriptors + [descriptor], []  # pylint: disable=cell-var-from-loop
+                            )
+                        field_data_cache = FieldDataCache(
+                            [descriptor], course.id, student, prefetch=field_data_prefetch
+                        )
                     return get_module_for_descriptor(student, request, descriptor, field_data_cache, course.id)
 
                 for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, create_module):
 
                     (correct, total) = get_score(
-                        course.id, student, module_descriptor, create_module, scores_cache=submissions_scores
+                        course.id, student, module_descriptor, create_module, scores_cache=submissions_scores,
+                        student_module_cache=student_module_cache
                     )
                     if correct is None and total is None:
                         continue
@@ -238,6 +282,9 @@ def _grade(student, request, course, keep_raw_scores):
                         )
                     )
 
+                if not always_recalculate:
+                    _persist_scores(student, course.id, section_descriptor, scores)
+
                 _, graded_total = graders.aggregate_scores(scores, section_name)
                 if keep_raw_scores:
                     raw_scores += scores
@@ -343,6 +390,7 @@ def _progress_summary(student, request, course):
         course_module = getattr(course_module, '_x_module', course_module)
 
     submissions_scores = sub_api.get_scores(course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id))
+    persisted_grades = _persisted_grades_for(student, course.id)
 
     chapters = []
     # Don't include chapters that aren't displayable (e.g. due to error)
@@ -360,27 +408,50 @@ def _progress_summary(student, request, course):
                     continue
 
                 graded = section_module.graded
-                scores = []
-
-                module_creator = section_module.xmodule_runtime.get_module
-
-                for module_descriptor in yield_dynamic_descriptor_descendents(section_module, module_creator):
-                    course_id = course.id
-                    (correct, total) = get_score(
-                        course_id, student, module_descriptor, module_creator, scores_cache=submissions_scores
-                    )
-                    if correct is None and total is None:
-                        continue
-
-                    scores.append(
-                        Score(
-                            correct,
-                            total,
-                            graded,
-                            module_descriptor.display_name_with_default,
-                            module_descriptor.location
+                scores = _get_persisted_scores(persisted_grades, section_module)
+
+                if scores is not None:
+                    # Persisted scores carry their block's own graded flag;
+                    # the summary reports the section's.
+                    scores = [score._replace(graded=graded) for score in scores]
+                else:
+                    scores = []
+                    # The scores as `grade` computes them, to be persisted
+                    section_scores = []
+                    always_recalculate = False
+
+                    module_creator = section_module.xmodule_runtime.get_module
+
+                    for module_descriptor in yield_dynamic_descriptor_descendents(section_module, module_creator):
+                        course_id = course.id
+                        always_recalculate = always_recalculate or module_descriptor.always_recalculate_grades
+                        (correct, total) = get_score(
+                            course_id, student, module_descriptor, module_creator, scores_cache=submissions_scores
+                        )
+                        if correct is None and total is None:
+                            continue
+
+                        scores.append(
+                            Score(
+                                correct,
+                                total,
+                                graded,
+                                module_descriptor.display_name_with_default,
+                                module_descriptor.location
+                            )
+                        )
+                        section_scores.append(
+                            Score(
+                                correct,
+                                total,
+                                module_descriptor.graded and total > 0,
+                                module_descriptor.display_name_with_default,
+                                module_descriptor.location
+                            )
                         )
-                    )
+
+                    if not always_recalculate:
+                        _persist_scores(student, course.id, section_module, section_scores)
 
                 scores.reverse()
                 section_total, _ = graders.aggregate_scores(
@@ -407,7 +478,7 @@ def _progress_summary(student, request, course):
     return chapters
 
 
-def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None):
+def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None, student_module_cache=None):
     """
     Return the score for a user on a problem, as a tuple (correct, total).
     e.g. (5,7) if you got 5 out of 7 points.
@@ -421,6 +492,8 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
            Can return None if user doesn't have access, or if something else went wrong.
     scores_cache: A dict of location names to (earned, possible) point tuples.
            If an entry is found in this cache, it takes precedence.
+    student_module_cache: A dict of usage keys to (grade, max_grade) tuples of the
+           user's StudentModules in the course. If given, StudentModule is not queried.
     """
     scores_cache = scores_cache or {}
 
@@ -447,18 +520,24 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
         # These are not problems, and do not have a score
         return (None, None)
 
-    try:
-        student_module = StudentModule.objects.get(
-            student=user,
-            course_id=course_id,
-            module_state_key=problem_descriptor.location
+    if student_module_cache is not None:
+        student_module_grade, student_module_max_grade = student_module_cache.get(
+            problem_descriptor.location, (None, None)
         )
-    except StudentModule.DoesNotExist:
-        student_module = None
+    else:
+        try:
+            student_module = StudentModule.objects.get(
+                student=user,
+                course_id=course_id,
+                module_state_key=problem_descriptor.location
+            )
+            student_module_grade, student_module_max_grade = student_module.grade, student_module.max_grade
+        except StudentModule.DoesNotExist:
+            student_module_grade, student_module_max_grade = None, None
 
-    if student_module is not None and student_module.max_grade is not None:
-        correct = student_module.grade if student_module.grade is not None else 0
-        total = student_module.max_grade
+    if student_module_max_grade is not None:
+        correct = student_module_grade if student_module_grade is not None else 0
+        total = student_module_max_grade
     else:
         # If the problem was not in the cache, or hasn't been graded yet,
         # we need to instantiate the problem.
@@ -479,7 +558,10 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
     weight = problem_descriptor.weight
     if weight is not None:
         if total == 0:
-            log.exception("Cannot reweight a problem with zero total points. Problem: " + str(student_module))
+            log.exception(
+                "Cannot reweight a problem with zero total points. Problem: %s, user: %s",
+                problem_descriptor.location, user.id
+            )
             return (correct, total)
         correct = correct * weight / total
         total = weight
@@ -487,6 +569,112 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
     return (correct, total)
 
 
+def _persistent_grades_enabled():
+    """
+    Returns whether subsection scores should be read from and written to
+    PersistentSubsectionGrade.
+    """
+    # Randomly generated debugging scores must never be persisted
+    return settings.FEATURES.get('ENABLE_PERSISTENT_GRADES', False) and not settings.GENERATE_PROFILE_SCORES
+
+
+def _subsection_version(section):
+    """
+    Return a string identifying the current content of the subsection
+    `section` (a descriptor or an XModule), or None if the modulestore does
+    not track when the subsection was last edited.
+    """
+    descriptor = getattr(section, 'descriptor', section)
+    get_subtree_edited_on = getattr(descriptor.runtime, 'get_subtree_edited_on', None)
+    if get_subtree_edited_on is None:
+        return None
+    try:
+        edited_on = get_subtree_edited_on(descriptor)
+    except (AttributeError, KeyError):
+        return None
+    return unicode(edited_on) if edited_on is not None else None
+
+
+def _subsection_is_persistable(section):
+    """
+    Return whether the scores of the subsection `section` (a descriptor or an
+    XModule) only change when the student's state or the subsection's content
+    does, so that they can be persisted against `_subsection_version`.
+
+    Which of a subsection's blocks a student can load, and so is scored on, also
+    depends on when its blocks start, on the student's groups if any of them
+    restrict access to groups, and on the children picked for the student by
+    blocks with dynamic children (split_test, library_content). None of those
+    changes the version, so subsections with any of them are not persisted.
+    """
+    now = datetime.now(UTC())
+    stack = [getattr(section, 'descriptor', section)]
+    while stack:
+        descriptor = stack.pop()
+        if descriptor.has_dynamic_children():
+            return False
+        if descriptor.visible_to_staff_only:
+            return False
+        if getattr(descriptor, 'merged_group_access', descriptor.group_access):
+            return False
+        if descriptor.start is not None and descriptor.start > now:
+            return False
+        stack.extend(descriptor.get_children())
+    return True
+
+
+def _persisted_grades_for(student, course_key):
+    """
+    Return a dict of the student's persisted subsection grades in the course,
+    keyed by subsection usage key. This is a single query.
+    """
+    if not _persistent_grades_enabled() or not student.is_authenticated():
+        return {}
+    return PersistentSubsectionGrade.grades_for_user(student, course_key)
+
+
+def _get_persisted_scores(persisted_grades, section):
+    """
+    Return the list of Scores persisted for `section`, or None if there are
+    none, or if they were computed against a different version of the
+    subsection's content.
+    """
+    row = persisted_grades.get(section.location)
+    if row is None:
+        return None
+
+    version = _subsection_version(section)
+    if version is None or version != row.subtree_version:
+        return None
+
+    return [
+        Score(earned, possible, graded, display_name, UsageKey.from_string(location))
+        for earned, possible, graded, display_name, location in json.loads(row.scores)
+    ]
+
+
+def _persist_scores(student, course_key, section, scores):
+    """
+    Persist the list of Scores computed for `section`, so that later calls to
+    `grade` and `progress_summary` do not need to re-score its problems.
+    """
+    if not _persistent_grades_enabled() or not student.is_authenticated():
+        return
+    if not _subsection_is_persistable(section):
+        return
+
+    version = _subsection_version(section)
+    if version is None:
+        return
+
+    serialized_scores = json.dumps([
+        [score.earned, score.possible, score.graded, score.section, unicode(score.module_id)]
+        for score in scores
+    ])
+    with manual_transaction():
+        PersistentSubsectionGrade.save_scores(student, course_key, section.location, version, serialized_scores)
+
+
 @contextmanager
 def manual_transaction():
     """A context manager for managing manual transactions"""
@@ -500,7 +688,43 @@ def manual_transaction():
         transaction.commit()
 
 
-def iterate_grades_for(course_or_id, students, keep_raw_scores=False):
+def _student_module_caches_for(course_key, students):
+    """
+    Return a dict mapping the id of each of `students` to a dict of
+    {usage_key: (grade, max_grade)} for all of that student's StudentModules in
+    the course, suitable as the `student_module_cache` argument of `grade`.
+
+    This issues a single query for all of the students.
+    """
+    caches = {student.id: {} for student in students}
+    rows = StudentModule.objects.filter(
+        course_id=course_key,
+        student__in=caches.keys(),
+    ).values_list('student', 'module_state_key', 'grade', 'max_grade')
+
+    for student_id, module_state_key, module_grade, max_grade in rows:
+        try:
+            usage_key = UsageKey.from_string(module_state_key).map_into_course(course_key)
+        except InvalidKeyError:
+            log.warning(u"Skipping StudentModule with invalid key %s in course %s", module_state_key, course_key)
+            continue
+        caches[student_id][usage_key] = (module_grade, max_grade)
+    return caches
+
+
+def _batches(items, batch_size):
+    """
+    Yields lists of up to `batch_size` values from the iterable `items`,
+    without materializing `items` as a whole.
+    """
+    iterator = iter(items)
+    batch = list(islice(iterator, batch_size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, batch_size))
+
+
+def iterate_grades_for(course_or_id, students, keep_raw_scores=False, batch_size=GRADING_BATCH_SIZE):
     """Given a course_id and an iterable of students (User), yield a tuple of:
 
     (student, gradeset, err_msg) for every student enrolled in the course.
@@ -517,6 +741,11 @@ def iterate_grades_for(course_or_id, students, keep_raw_scores=False):
     - grade_breakdown : A breakdown of the major components that
         make up the final grade. (For display)
     - raw_scores: contains scores for every graded module
+
+    Students are graded in batches of `batch_size`: the StudentModule scores of
+    each batch are loaded with a single query, so no per-student, per-problem
+    queries are made for problems that already have a score. If `batch_size`
+    is None, every student is graded on its own.
     """
     if isinstance(course_or_id, (basestring, CourseKey)):
         course = courses.get_course_by_id(course_or_id)
@@ -528,25 +757,43 @@ def iterate_grades_for(course_or_id, students, keep_raw_scores=False):
     # grading that student.
     request = RequestFactory().get('/')
 
-    for student in students:
-        with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course.id)]):
-            try:
-                request.user = student
-                # Grading calls problem rendering, which calls masquerading,
-                # which checks session vars -- thus the empty session dict below.
-                # It's not pretty, but untangling that is currently beyond the
-                # scope of this feature.
-                request.session = {}
-                gradeset = grade(student, request, course, keep_raw_scores)
-                yield student, gradeset, ""
-            except Exception as exc:  # pylint: disable=broad-except
-                # Keep marching on even if this student couldn't be graded for
-                # some reason, but log it for future reference.
-                log.exception(
-                    'Cannot grade student %s (%s) in course %s because of exception: %s',
-                    student.username,
-                    student.id,
-                    course.id,
-                    exc.message
-                )
-                yield student, {}, exc.message
+    for batch in _batches(students, batch_size or 1):
+        if batch_size:
+            with dog_stats_api.timer('lms.grades.iterate_grades_for.batch', tags=[u'action:{}'.format(course.id)]):
+                student_module_caches = _student_module_caches_for(course.id, batch)
+        else:
+            student_module_caches = {}
+
+        for student in batch:
+            yield _grade_for_iteration(student, request, course, keep_raw_scores, student_module_caches)
+
+
+def _grade_for_iteration(student, request, course, keep_raw_scores, student_module_caches):
+    """
+    Grade a single student for `iterate_grades_for`, returning a
+    (student, gradeset, err_msg) tuple.
+    """
+    with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course.id)]):
+        try:
+            request.user = student
+            # Grading calls problem rendering, which calls masquerading,
+            # which checks session vars -- thus the empty session dict below.
+            # It's not pretty, but untangling that is currently beyond the
+            # scope of this feature.
+            request.session = {}
+            gradeset = grade(
+                student, request, course, keep_raw_scores,
+                student_module_cache=student_module_caches.get(student.id)
+            )
+            return student, gradeset, ""
+        except Exception as exc:  # pylint: disable=broad-except
+            # Keep marching on even if this student couldn't be graded for
+            # some reason, but log it for future reference.
+            log.exception(
+                'Cannot grade student %s (%s) in course %s because of exception: %s',
+                student.username,
+                student.id,
+                course.id,
+                exc.message
+            )
+            return student, {}, exc.message
@@ -0,0 +1,41 @@
+"""
+Management command to report how often the results of capa problems' code are found in the cache.
+"""
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from capa.safe_exec.result_cache import get_stats, LOCAL, SHARED, MISS
+
+
+class Command(BaseCommand):
+    """
+    Report, for each problem or response whose code has run recently, how many of its
+    executions were found in the cache of the process running them, in the shared cache,
+    or not at all. Only the problems and responses whose id starts with one of the given
+    prefixes are reported, if any are given.
+
+    The counts are kept in the cache, and are only an estimate.
+
+    Example:
+
+        ./manage.py lms safe_exec_stats i4x-edX-DemoX-problem
+    """
+    help = __doc__
+
+    args = "<id_prefix id_prefix ...>"
+
+    def handle(self, *args, **options):
+        stats = get_stats(cache)
+        rows = [
+            (slug, counts) for slug, counts in stats.iteritems()
+            if not args or any(slug.startswith(prefix) for prefix in args)
+        ]
+        rows.sort(key=lambda row: sum(row[1].values()), reverse=True)
+
+        self.stdout.write(u"{:<60} {:>10} {:>10} {:>10} {:>8}\n".format(u"id", LOCAL, SHARED, MISS, u"hit rate"))
+        for slug, counts in rows:
+            total = sum(counts.values())
+            hit_rate = float(counts[LOCAL] + counts[SHARED]) / total if total else 0
+            self.stdout.write(u"{:<60} {:>10} {:>10} {:>10} {:>8.1%}\n".format(
+                slug, counts[LOCAL], counts[SHARED], counts[MISS], hit_rate
+            ))
@@ -19,6 +19,9 @@ UserStateSummaryCache: A cache for Scope.user_state_summary
 PreferencesCache: A cache for Scope.preferences
 UserInfoCache: A cache for Scope.user_info
 DjangoOrmFieldCache: A base-class for single-row-per-field caches.
+
+:class:`FieldDataPrefetch`: Field data for a user in a course, bulk loaded for many blocks at
+    once, which FieldDataCaches read from instead of querying the database.
 """
 
 import json
@@ -44,6 +47,7 @@ from xblock.fields import Scope, UserScope
 from xmodule.modulestore.django import modulestore
 from xblock.core import XBlockAside
 from courseware.user_state_client import DjangoXBlockUserStateClient
+from request_cache.middleware import RequestCache
 
 log = logging.getLogger(__name__)
 
@@ -175,7 +179,16 @@ class DjangoOrmFieldCache(object):
             xblocks (list of :class:`XBlock`): XBlocks to cache fields for.
             aside_types (list of str): Aside types to cache fields for.
         """
-        for field_object in self._read_objects(fields, xblocks, aside_types):
+        self.cache_prefetched(self._read_objects(fields, xblocks, aside_types))
+
+    def cache_prefetched(self, field_objects):
+        """
+        Add ``field_objects`` which were loaded by a :class:`FieldDataPrefetch` to this cache.
+
+        Arguments:
+            field_objects (iterable): Django model instances storing fields in this cache's scope
+        """
+        for field_object in field_objects:
             self._cache[self._cache_key_for_field_object(field_object)] = field_object
 
     @contract(kvs_key=DjangoKeyValueStore.Key)
@@ -371,6 +384,17 @@ class UserStateCache(object):
         for usage_key, field_state in block_field_state:
             self._cache[usage_key] = field_state
 
+    def cache_prefetched(self, block_field_state):
+        """
+        Add field state which was loaded by a :class:`FieldDataPrefetch` to this cache.
+
+        Arguments:
+            block_field_state (iterable): (UsageKey, field_state) tuples
+        """
+        for usage_key, field_state in block_field_state:
+            # copied, as this cache modifies its field state in place
+            self._cache[usage_key] = dict(field_state)
+
     @contract(kvs_key=DjangoKeyValueStore.Key)
     def set(self, kvs_key, value):
         """
@@ -697,12 +721,163 @@ class UserInfoCache(DjangoOrmFieldCache):
         return key.field_name
 
 
+class FieldDataPrefetch(object):
+    """
+    All of the Scope.user_state, Scope.user_state_summary, Scope.preferences
+    and Scope.user_info field data of a user for a set of blocks in a course,
+    loaded with a fixed number of queries however many blocks there are.
+
+    A FieldDataCache constructed with a prefetch (or in a request for which
+    :meth:`prefetch` was called for the same user and course) copies the data
+    for any blocks the prefetch covers rather than querying for them again.
+    Writes through a FieldDataCache make the prefetch forget the blocks
+    written to, so that later FieldDataCaches read them afresh.
+    """
+    def __init__(self, course_id, user):
+        self.course_id = course_id
+        self.user = user
+        # The usage keys and block types loaded so far
+        self.usage_keys = set()
+        self.block_types = set()
+        self.user_info_loaded = False
+        self._user_state = {}
+        self._user_state_summary = defaultdict(list)
+        self._preferences = defaultdict(list)
+        self._user_info = []
+
+    @staticmethod
+    def _request_cache_key(course_id, user):
+        """
+        The key of the prefetch for `user` in `course_id` in the request cache.
+        """
+        return ('field_data_prefetch', user.id, course_id)
+
+    @classmethod
+    def for_request(cls, course_id, user):
+        """
+        Return the prefetch made for `user` in `course_id` during the current request, if any.
+        """
+        if RequestCache.get_current_request() is None:
+            return None
+        return RequestCache.get_request_cache().data.get(cls._request_cache_key(course_id, user))
+
+    @classmethod
+    def for_user(cls, course_id, user):
+        """
+        Return the prefetch made for `user` in `course_id` during the current
+        request, or a new, empty one, without loading anything.
+
+        If called while servicing a request, a new prefetch is shared with every
+        FieldDataCache for `user` in `course_id` created later in that request.
+        """
+        prefetch = cls.for_request(course_id, user)
+        if prefetch is None:
+            prefetch = cls(course_id, user)
+            if RequestCache.get_current_request() is not None:
+                RequestCache.get_request_cache().data[cls._request_cache_key(course_id, user)] = prefetch
+        return prefetch
+
+    @classmethod
+    def prefetch(cls, course_id, user, descriptors, asides=None):
+        """
+        Load the field data of `user` for all of `descriptors` (and their `asides`)
+        into the prefetch returned by :meth:`for_user`.
+
+        Returns: the :class:`FieldDataPrefetch`
+        """
+        prefetch = cls.for_user(course_id, user)
+        prefetch.load(descriptors, asides or [])
+        return prefetch
+
+    def load(self, descriptors, aside_types):
+        """
+        Load the field data for any of `descriptors` (and `aside_types`) which isn't loaded yet.
+        """
+        if not self.user.is_authenticated():
+            return
+
+        usage_keys = _all_usage_keys(descriptors, aside_types) - self.usage_keys
+        if usage_keys:
+            client = DjangoXBlockUserStateClient(self.user)
+            for usage_key, field_state in client.get_many(self.user.username, usage_keys):
+                self._user_state[usage_key] = field_state
+            for field_object in XModuleUserStateSummaryField.objects.chunked_filter('usage_id__in', usage_keys):
+                self._user_state_summary[field_object.usage_id.map_into_course(self.course_id)].append(field_object)
+            self.usage_keys.update(usage_keys)
+
+        block_types = _all_block_types(descriptors, aside_types) - self.block_types
+        if block_types:
+            for field_object in XModuleStudentPrefsField.objects.chunked_filter(
+                    'module_type__in', block_types, student=self.user.pk
+            ):
+                self._preferences[field_object.module_type].append(field_object)
+            self.block_types.update(block_types)
+
+        if not self.user_info_loaded:
+            self._user_info = list(XModuleStudentInfoField.objects.filter(student=self.user.pk))
+            self.user_info_loaded = True
+
+    def covers(self, descriptor, aside_types):
+        """
+        Return whether all of the field data for `descriptor` (and `aside_types`) is loaded.
+        """
+        return (
+            self.user_info_loaded and
+            _all_usage_keys([descriptor], aside_types) <= self.usage_keys and
+            _all_block_types([descriptor], aside_types) <= self.block_types
+        )
+
+    def data_for(self, scope, descriptors, aside_types):
+        """
+        Return the data loaded in `scope` for `descriptors` in the form that
+        the cache for that scope accepts in ``cache_prefetched``.
+        """
+        if scope == Scope.user_state:
+            return [
+                (usage_key, self._user_state[usage_key])
+                for usage_key in _all_usage_keys(descriptors, aside_types)
+                if usage_key in self._user_state
+            ]
+        elif scope == Scope.user_state_summary:
+            return [
+                field_object
+                for usage_key in _all_usage_keys(descriptors, aside_types)
+                for field_object in self._user_state_summary.get(usage_key, [])
+            ]
+        elif scope == Scope.preferences:
+            return [
+                field_object
+                for block_type in _all_block_types(descriptors, aside_types)
+                for field_object in self._preferences.get(block_type, [])
+            ]
+        elif scope == Scope.user_info:
+            return self._user_info
+        return []
+
+    @contract(key=DjangoKeyValueStore.Key)
+    def forget(self, key):
+        """
+        Stop covering the data for the block (or block type) of the field `key`, which has been written to.
+        """
+        if key.scope in (Scope.user_state, Scope.user_state_summary):
+            self.usage_keys.discard(key.block_scope_id)
+            self._user_state.pop(key.block_scope_id, None)
+            self._user_state_summary.pop(key.block_scope_id, None)
+        elif key.scope == Scope.preferences:
+            block_type = BlockTypeKeyV1(key.block_family, key.block_scope_id)
+            self.block_types.discard(block_type)
+            self._preferences.pop(block_type, None)
+        elif key.scope == Scope.user_info:
+            self.user_info_loaded = False
+            self._user_info = []
+
+
 class FieldDataCache(object):
     """
     A cache of django model objects needed to supply the data
     for a module and its descendants
     """
-    def __init__(self, descriptors, course_id, user, select_for_update=False, asides=None):
+    def __init__(self, descriptors, course_id, user, select_for_update=False, asides=None, prefetch=None):
         """
         Find any courseware.models objects that are needed by any descriptor
         in descriptors. Attempts to minimize the number of queries to the database.
@@ -715,6 +890,8 @@ class FieldDataCache(object):
         user: The user for which to cache data
         select_for_update: Ignored
         asides: The list of aside types to load, or None to prefetch no asides.
+        prefetch: A FieldDataPrefetch to read data from. Defaults to the prefetch made
+            for this user and course in the current request, if any.
         """
         if asides is None:
             self.asides = []
@@ -725,6 +902,12 @@ class FieldDataCache(object):
         self.course_id = course_id
         self.user = user
 
+        if prefetch is None:
+            prefetch = FieldDataPrefetch.for_request(course_id, user)
+        elif prefetch.course_id != course_id or prefetch.user.id != user.id:
+            prefetch = None
+        self.prefetch = prefetch
+
         self.cache = {
             Scope.user_state: UserStateCache(
                 self.user,
@@ -747,6 +930,19 @@ class FieldDataCache(object):
         Add all `descriptors` to this FieldDataCache.
         """
         if self.user.is_authenticated():
+            if self.prefetch is not None:
+                # Only query for the descriptors whose data wasn't prefetched
+                prefetched, not_prefetched = [], []
+                for descriptor in descriptors:
+                    if self.prefetch.covers(descriptor, self.asides):
+                        prefetched.append(descriptor)
+                    else:
+                        not_prefetched.append(descriptor)
+                descriptors = not_prefetched
+                if prefetched:
+                    for scope, cache in self.cache.items():
+                        cache.cache_prefetched(self.prefetch.data_for(scope, prefetched, self.asides))
+
             for scope, fields in self._fields_to_cache(descriptors).items():
                 if scope not in self.cache:
                     continue
@@ -867,6 +1063,8 @@ class FieldDataCache(object):
                 continue
 
             by_scope[key.scope][key] = value
+            if self.prefetch is not None:
+                self.prefetch.forget(key)
 
         for scope, set_many_data in by_scope.iteritems():
             try:
@@ -897,6 +1095,8 @@ class FieldDataCache(object):
         if key.scope not in self.cache:
             raise KeyError(key.field_name)
 
+        if self.prefetch is not None:
+            self.prefetch.forget(key)
         self.cache[key.scope].delete(key)
 
     @contract(key=DjangoKeyValueStore.Key, returns=bool)
@@ -930,6 +1130,8 @@ class FieldDataCache(object):
         assert not self.user.is_anonymous()
         assert user_id == self.user.id
         assert usage_key.course_key == self.course_id
+        if self.prefetch is not None:
+            self.prefetch.usage_keys.discard(usage_key)
         self.cache[Scope.user_state].set_score(user_id, usage_key, score, max_score)
 
     @contract(key=DjangoKeyValueStore.Key, returns="datetime|None")
@@ -18,13 +18,17 @@ import itertools
 from django.contrib.auth.models import User
 from django.conf import settings
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver, Signal
 
 from model_utils.models import TimeStampedModel
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey, UsageKey
 from student.models import user_by_anonymous_id
 from submissions.models import score_set, score_reset
 
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule_django.models import CourseKeyField, LocationKeyField, BlockTypeKeyField  # pylint: disable=import-error
 
 log = logging.getLogger("edx.courseware")
@@ -281,6 +285,103 @@ class OfflineComputedGradeLog(models.Model):
         return "[OCGLog] %s: %s" % (self.course_id.to_deprecated_string(), self.created)  # pylint: disable=no-member
 
 
+class PersistentSubsectionGrade(models.Model):
+    """
+    Stores the scores a student earned on the problems of a single subsection,
+    so that grading a student does not have to re-walk and re-score every
+    problem in the course.
+
+    A row is only valid for the version of the subsection's content it was
+    computed against (`subtree_version`), and is discarded whenever a score
+    inside the subsection changes (see `invalidate_subsection_grade_handler`).
+    """
+    objects = ChunkingManager()
+
+    class Meta(object):  # pylint: disable=missing-docstring
+        unique_together = (('user', 'course_id', 'usage_key'),)
+
+    user = models.ForeignKey(User, db_index=True)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+
+    # The subsection (a child of a chapter) these scores belong to
+    usage_key = LocationKeyField(max_length=255, db_index=True)
+
+    # Identifies the content of the subsection the scores were computed against
+    subtree_version = models.CharField(max_length=255)
+
+    # JSON list of [earned, possible, graded, display_name, location] entries,
+    # one for each scored block in the subsection.
+    scores = models.TextField(default='[]')
+
+    modified = models.DateTimeField(auto_now=True, db_index=True)
+
+    @classmethod
+    def grades_for_user(cls, user, course_key):
+        """
+        Return a dict mapping subsection usage keys to the persisted grade rows
+        of `user` in the course `course_key`.
+        """
+        return {
+            row.usage_key.map_into_course(course_key): row
+            for row in cls.objects.filter(user=user, course_id=course_key)
+        }
+
+    @classmethod
+    def save_scores(cls, user, course_key, usage_key, subtree_version, scores):
+        """
+        Create or replace the persisted grade of the subsection `usage_key`.
+
+        Arguments:
+            scores (unicode): the JSON serialized scores of the subsection.
+        """
+        row, created = cls.objects.get_or_create(
+            user=user,
+            course_id=course_key,
+            usage_key=usage_key,
+            defaults={'subtree_version': subtree_version, 'scores': scores},
+        )
+        if not created:
+            row.subtree_version = subtree_version
+            row.scores = scores
+            row.save()
+        return row
+
+    @classmethod
+    def invalidate(cls, user_id, course_key, usage_key=None):
+        """
+        Discard the persisted grade of the subsection containing `usage_key`.
+
+        If `usage_key` is None, or its subsection cannot be found, every
+        persisted subsection grade of the user in the course is discarded.
+        """
+        subsection_key = _containing_subsection(usage_key) if usage_key is not None else None
+        queryset = cls.objects.filter(user__id=user_id, course_id=course_key)
+        if subsection_key is not None:
+            queryset = queryset.filter(usage_key=subsection_key)
+        queryset.delete()
+
+    def __unicode__(self):
+        return u"[PersistentSubsectionGrade] {}: {} ({})".format(self.user, self.usage_key, self.subtree_version)
+
+
+def _containing_subsection(usage_key):
+    """
+    Return the usage key of the subsection (the block directly below a
+    chapter) that contains `usage_key`, or None if it cannot be determined.
+    """
+    store = modulestore()
+    location = usage_key
+    try:
+        while location is not None:
+            parent = store.get_parent_location(location)
+            if parent is not None and parent.block_type == 'chapter':
+                return location
+            location = parent
+    except ItemNotFoundError:
+        pass
+    return None
+
+
 class StudentFieldOverride(TimeStampedModel):
     """
     Holds the value of a specific field overriden for a student.  This is used
@@ -394,3 +495,49 @@ def submissions_score_reset_handler(sender, **kwargs):  # pylint: disable=unused
             u"Failed to process score_reset signal from Submissions API. "
             "user: %s, course_id: %s, usage_id: %s", user, course_id, usage_id
         )
+
+
+@receiver(SCORE_CHANGED)
+def invalidate_subsection_grade_handler(sender, **kwargs):  # pylint: disable=unused-argument
+    """
+    Consume the SCORE_CHANGED signal and discard the persisted grade of the
+    subsection that contains the scored block, so that it is recomputed the
+    next time the student is graded.
+
+    See `_invalidate_persisted_grade`.
+    """
+    try:
+        course_key = CourseKey.from_string(kwargs['course_id'])
+        usage_key = UsageKey.from_string(kwargs['usage_id']).map_into_course(course_key)
+    except (KeyError, InvalidKeyError):
+        log.exception(
+            u"Failed to invalidate persisted subsection grade. course_id: %s, usage_id: %s",
+            kwargs.get('course_id', None), kwargs.get('usage_id', None)
+        )
+        return
+
+    _invalidate_persisted_grade(kwargs.get('user_id', None), course_key, usage_key)
+
+
+@receiver(post_delete, sender=StudentModule)
+def student_module_deleted_handler(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Discard the persisted grade of the subsection containing a deleted
+    StudentModule, since deleting a student's state (e.g. when an instructor
+    resets it) changes their score without sending SCORE_CHANGED.
+    """
+    course_key = instance.course_id
+    _invalidate_persisted_grade(instance.student_id, course_key, instance.module_state_key.map_into_course(course_key))
+
+
+def _invalidate_persisted_grade(user_id, course_key, usage_key):
+    """
+    Discard the persisted grade of the subsection containing `usage_key`.
+
+    Nothing is done, not even a query, when persistent grades are disabled, so
+    rows persisted before the feature was disabled go stale; they must be
+    deleted before it is enabled again.
+    """
+    if not settings.FEATURES.get('ENABLE_PERSISTENT_GRADES', False):
+        return
+    PersistentSubsectionGrade.invalidate(user_id, course_key, usage_key)
@@ -8,6 +8,7 @@ import mock
 from nose.plugins.attrib import attr
 
 from django.conf import settings
+from django.core.cache import get_cache
 from django.test.utils import override_settings
 from django.core.urlresolvers import reverse
 from django.test.client import RequestFactory
@@ -18,6 +19,7 @@ from courseware.courses import (
     get_course_info_section, get_course_about_section, get_cms_block_link
 )
 from courseware.module_render import get_module_for_descriptor
+from courseware.tests.factories import StaffFactory
 from courseware.tests.helpers import get_request_for_user
 from courseware.model_data import FieldDataCache
 from student.tests.factories import UserFactory
@@ -185,6 +187,23 @@ class CoursesRenderTest(ModuleStoreTestCase):
             course_info = get_course_info_section(self.request, self.course, 'handouts')
             self.assertIn("this module is temporarily unavailable", course_info)
 
+    @override_settings(XBLOCK_FRAGMENT_CACHE_TIMEOUT=60)
+    @mock.patch('courseware.fragment_cache.cache', get_cache(backend='default', LOCATION='fragment_cache'))
+    def test_get_course_info_section_cached(self):
+        course_info = get_course_info_section(self.request, self.course, 'handouts')
+
+        with mock.patch('xmodule.html_module.HtmlModuleMixin.get_html', side_effect=Exception('Render failed!')):
+            # Other users get the fragment rendered for the first
+            other_request = get_request_for_user(UserFactory.create())
+            self.assertEqual(get_course_info_section(other_request, self.course, 'handouts'), course_info)
+
+            # but course staff always get it rendered for them
+            staff_request = get_request_for_user(StaffFactory.create(course_key=self.course.id))
+            self.assertIn(
+                "this module is temporarily unavailable",
+                get_course_info_section(staff_request, self.course, 'handouts')
+            )
+
     @mock.patch('courseware.courses.get_request_for_thread')
     def test_get_course_about_section_render(self, mock_get_request):
         mock_get_request.return_value = self.request
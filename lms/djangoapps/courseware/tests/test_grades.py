@@ -1,18 +1,26 @@
 """
 Test grade calculation.
 """
+from datetime import datetime, timedelta
+
+import ddt
 from django.http import Http404
+from django.utils.timezone import UTC
+from django.test.client import RequestFactory
 from mock import patch
 from nose.plugins.attrib import attr
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
 from courseware.grades import grade, iterate_grades_for
+from courseware.model_data import FieldDataPrefetch
+from courseware.models import PersistentSubsectionGrade, StudentModule, SCORE_CHANGED, _invalidate_persisted_grade
+from courseware.tests.factories import StudentModuleFactory
 from student.tests.factories import UserFactory
-from xmodule.modulestore.tests.factories import CourseFactory
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 
 
-def _grade_with_errors(student, request, course, keep_raw_scores=False):
+def _grade_with_errors(student, request, course, keep_raw_scores=False, **kwargs):
     """This fake grade method will throw exceptions for student3 and
     student4, but allow any other students to go through normal grading.
 
@@ -23,7 +31,7 @@ def _grade_with_errors(student, request, course, keep_raw_scores=False):
     if student.username in ['student3', 'student4']:
         raise Exception("I don't like {}".format(student.username))
 
-    return grade(student, request, course, keep_raw_scores=keep_raw_scores)
+    return grade(student, request, course, keep_raw_scores=keep_raw_scores, **kwargs)
 
 
 @attr('shard_1')
@@ -106,6 +114,30 @@ class TestGradeIteration(ModuleStoreTestCase):
         self.assertTrue(all_gradesets[student2])
         self.assertTrue(all_gradesets[student5])
 
+    def test_batched_grades_match_unbatched(self):
+        """Grading students in batches preloads their StudentModule scores,
+        but must produce the same gradesets as grading them one by one."""
+        chapter = ItemFactory.create(parent=self.course, category='chapter')
+        sequence = ItemFactory.create(parent=chapter, category='sequential', graded=True, format='Homework')
+        problem = ItemFactory.create(parent=sequence, category='problem')
+        course = self.store.get_course(self.course.id)
+        for earned, student in enumerate(self.students):
+            StudentModuleFactory.create(
+                student=student,
+                course_id=course.id,
+                module_state_key=problem.location,
+                grade=earned,
+                max_grade=len(self.students),
+            )
+
+        batched = list(iterate_grades_for(course, self.students, keep_raw_scores=True, batch_size=2))
+        unbatched = list(iterate_grades_for(course, self.students, keep_raw_scores=True, batch_size=None))
+        self.assertEqual(batched, unbatched)
+        self.assertEqual(
+            [gradeset['raw_scores'][0].earned for _, gradeset, _ in batched],
+            range(len(self.students))
+        )
+
     ################################# Helpers #################################
     def _gradesets_and_errors_for(self, course_id, students):
         """Simple helper method to iterate through student grades and give us
@@ -121,3 +153,120 @@ class TestGradeIteration(ModuleStoreTestCase):
                 students_to_errors[student] = err_msg
 
         return students_to_gradesets, students_to_errors
+
+
+@attr('shard_1')
+@ddt.ddt
+@patch.dict('django.conf.settings.FEATURES', {'ENABLE_PERSISTENT_GRADES': True})
+class TestPersistentSubsectionGrades(ModuleStoreTestCase):
+    """
+    Test that subsection scores are persisted, reused and invalidated.
+    """
+    def setUp(self):
+        super(TestPersistentSubsectionGrades, self).setUp()
+        course = CourseFactory.create()
+        chapter = ItemFactory.create(parent=course, category='chapter')
+        self.sequence = ItemFactory.create(parent=chapter, category='sequential', graded=True, format='Homework')
+        self.problem = ItemFactory.create(parent=self.sequence, category='problem')
+        self.course = self.store.get_course(course.id)
+
+        self.student = UserFactory.create()
+        self.request = RequestFactory().get('/')
+        self.request.user = self.student
+        self.request.session = {}
+        StudentModuleFactory.create(
+            student=self.student,
+            course_id=self.course.id,
+            module_state_key=self.problem.location,
+            grade=1,
+            max_grade=2,
+        )
+
+    def _earned_scores(self):
+        """
+        Grade the student and return the points earned on each problem.
+        """
+        gradeset = grade(self.student, self.request, self.course, keep_raw_scores=True)
+        return [score.earned for score in gradeset['raw_scores']]
+
+    def _set_student_grade(self, value):
+        """
+        Change the stored grade without sending any signal.
+        """
+        StudentModule.objects.filter(student=self.student).update(grade=value)
+
+    def test_scores_are_persisted(self):
+        self.assertEqual(self._earned_scores(), [1])
+        row = PersistentSubsectionGrade.objects.get(user=self.student, course_id=self.course.id)
+        self.assertEqual(row.usage_key.map_into_course(self.course.id), self.sequence.location)
+
+    def test_persisted_scores_are_reused(self):
+        self._earned_scores()
+        with patch('courseware.grades.get_score') as get_score:
+            self.assertEqual(self._earned_scores(), [1])
+        self.assertFalse(get_score.called)
+
+    def test_no_field_data_loaded_without_modules(self):
+        # The problem is scored from its StudentModule, so no module is created
+        with patch.object(FieldDataPrefetch, 'load') as load:
+            self.assertEqual(self._earned_scores(), [1])
+        self.assertFalse(load.called)
+
+    def test_module_deletion_invalidates(self):
+        self._earned_scores()
+        StudentModule.objects.get(student=self.student).delete()
+        self.assertFalse(PersistentSubsectionGrade.objects.filter(user=self.student).exists())
+        self.assertEqual(self._earned_scores(), [0])
+
+    def test_score_change_invalidates(self):
+        self._earned_scores()
+        self._set_student_grade(2)
+        SCORE_CHANGED.send(
+            sender=None,
+            points_possible=2,
+            points_earned=2,
+            user_id=self.student.id,
+            course_id=unicode(self.course.id),
+            usage_id=unicode(self.problem.location),
+        )
+        self.assertFalse(PersistentSubsectionGrade.objects.filter(user=self.student).exists())
+        self.assertEqual(self._earned_scores(), [2])
+
+    def test_no_invalidation_queries_when_disabled(self):
+        self._earned_scores()
+        with patch.dict('django.conf.settings.FEATURES', {'ENABLE_PERSISTENT_GRADES': False}):
+            with self.assertNumQueries(0):
+                _invalidate_persisted_grade(self.student.id, self.course.id, self.problem.location)
+
+    @ddt.data(
+        {'start': datetime.now(UTC()) + timedelta(days=1)},
+        {'group_access': {0: [1]}},
+        {'visible_to_staff_only': True},
+    )
+    def test_access_dependent_sections_not_persisted(self, problem_fields):
+        self.store.update_item(self._updated(self.problem, **problem_fields), self.user.id)
+        self.course = self.store.get_course(self.course.id)
+        self._earned_scores()
+        self.assertFalse(PersistentSubsectionGrade.objects.exists())
+
+    def test_dynamic_children_not_persisted(self):
+        ItemFactory.create(parent=self.sequence, category='split_test')
+        self.course = self.store.get_course(self.course.id)
+        self._earned_scores()
+        self.assertFalse(PersistentSubsectionGrade.objects.exists())
+
+    def _updated(self, block, **fields):
+        """
+        Return `block` loaded from the store, with `fields` set.
+        """
+        block = self.store.get_item(block.location)
+        for name, value in fields.iteritems():
+            setattr(block, name, value)
+        return block
+
+    @patch.dict('django.conf.settings.FEATURES', {'ENABLE_PERSISTENT_GRADES': False})
+    def test_disabled(self):
+        self.assertEqual(self._earned_scores(), [1])
+        self.assertFalse(PersistentSubsectionGrade.objects.exists())
+        self._set_student_grade(2)
+        self.assertEqual(self._earned_scores(), [2])
@@ -7,7 +7,7 @@ from nose.plugins.attrib import attr
 from functools import partial
 
 from courseware.model_data import DjangoKeyValueStore
-from courseware.model_data import InvalidScopeError, FieldDataCache
+from courseware.model_data import InvalidScopeError, FieldDataCache, FieldDataPrefetch
 from courseware.models import StudentModule
 from courseware.models import XModuleStudentInfoField, XModuleStudentPrefsField
 
@@ -416,3 +416,47 @@ class TestStudentInfoStorage(OtherUserFailureTestMixin, StorageTestBase, TestCas
     storage_class = XModuleStudentInfoField
     other_key_factory = partial(DjangoKeyValueStore.Key, Scope.user_info, 2, 'mock_problem')  # user_id=2, not 1
     existing_field_name = "existing_field"
+
+
+@attr('shard_1')
+class TestFieldDataPrefetch(TestCase):
+    """Tests for FieldDataCaches reading from a FieldDataPrefetch"""
+    def setUp(self):
+        super(TestFieldDataPrefetch, self).setUp()
+        student_module = StudentModuleFactory(state=json.dumps({'a_field': 'a_value'}))
+        self.user = student_module.student
+        self.assertEqual(self.user.id, 1)   # check our assumption hard-coded in the key functions above.
+        self.descriptor = mock_descriptor([
+            mock_field(Scope.user_state, 'a_field'),
+            mock_field(Scope.preferences, 'a_pref'),
+        ])
+
+        # One query for each of user_state, user_state_summary, preferences and user_info
+        with self.assertNumQueries(4):
+            self.prefetch = FieldDataPrefetch.prefetch(course_id, self.user, [self.descriptor])
+
+    def test_read_from_prefetch(self):
+        "Test that a FieldDataCache covered by the prefetch doesn't query the database"
+        with self.assertNumQueries(0):
+            field_data_cache = FieldDataCache([self.descriptor], course_id, self.user, prefetch=self.prefetch)
+            kvs = DjangoKeyValueStore(field_data_cache)
+            self.assertEquals('a_value', kvs.get(user_state_key('a_field')))
+            self.assertFalse(kvs.has(prefs_key('a_pref')))
+
+    def test_prefetch_for_other_user_ignored(self):
+        "Test that a prefetch made for another user isn't used"
+        other_user = UserFactory.create()
+        with self.assertNumQueries(2):
+            field_data_cache = FieldDataCache([self.descriptor], course_id, other_user, prefetch=self.prefetch)
+        self.assertIsNone(field_data_cache.prefetch)
+
+    def test_write_forgets_block(self):
+        "Test that writing a field makes later FieldDataCaches read the block from the database"
+        field_data_cache = FieldDataCache([self.descriptor], course_id, self.user, prefetch=self.prefetch)
+        DjangoKeyValueStore(field_data_cache).set(user_state_key('a_field'), 'new_value')
+        self.assertFalse(self.prefetch.covers(self.descriptor, []))
+
+        # The block is read afresh, so the new value is seen
+        with self.assertNumQueries(1):
+            field_data_cache = FieldDataCache([self.descriptor], course_id, self.user, prefetch=self.prefetch)
+        self.assertEquals('new_value', DjangoKeyValueStore(field_data_cache).get(user_state_key('a_field')))
@@ -37,6 +37,7 @@ from courseware.courses import (
     sort_by_announcement,
     sort_by_start_date,
 )
+from courseware.fragment_cache import render_fragment
 from courseware.masquerade import setup_masquerade
 from courseware.model_data import FieldDataCache
 from .module_render import toc_for_course, get_module_for_descriptor, get_module
@@ -1169,7 +1170,7 @@ def get_static_tab_contents(request, course, tab):
     html = ''
     if tab_module is not None:
         try:
-            html = tab_module.render(STUDENT_VIEW).content
+            html = render_fragment(request.user, course, tab_module, STUDENT_VIEW).content
         except Exception:  # pylint: disable=broad-except
             html = render_to_string('courseware/error-message.html', None)
             log.exception(
@@ -22,7 +22,8 @@ from django_comment_client.base.views import (
 )
 from django_comment_client.utils import get_accessible_discussion_modules
 from lms.lib.comment_client.thread import Thread
-from lms.lib.comment_client.utils import CommentClientRequestError
+from lms.lib.comment_client.user import User as CommentClientUser
+from lms.lib.comment_client.utils import CommentClientRequestError, perform_concurrently
 from openedx.core.djangoapps.course_groups.cohorts import get_cohort_id
 from xmodule.tabs import DiscussionTab
 
@@ -116,8 +117,9 @@ def get_thread_list(request, course_key, page, page_size):
     discussion_api.views.ThreadViewSet for more detail.
     """
     course = _get_course_or_404(course_key, request.user)
-    context = get_context(course, request)
-    threads, result_page, num_pages, _ = Thread.search({
+    cc_requester = CommentClientUser.from_django_user(request.user)
+    context = get_context(course, request, cc_requester=cc_requester)
+    query_params = {
         "course_id": unicode(course.id),
         "group_id": (
             None if context["is_requester_privileged"] else
@@ -127,7 +129,12 @@ def get_thread_list(request, course_key, page, page_size):
         "sort_order": "desc",
         "page": page,
         "per_page": page_size,
-    })
+    }
+    # The requester and the page of threads are independent, so fetch them in parallel
+    __, (threads, result_page, num_pages, _) = perform_concurrently(
+        cc_requester.retrieve,
+        lambda: Thread.search(query_params),
+    )
     # The comments service returns the last page of results if the requested
     # page is beyond the last page, but we want be consistent with DRF's general
     # behavior and return a 404 in that case
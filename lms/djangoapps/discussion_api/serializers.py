@@ -23,10 +23,13 @@ from lms.lib.comment_client.utils import CommentClientRequestError
 from openedx.core.djangoapps.course_groups.cohorts import get_cohort_names
 
 
-def get_context(course, request, thread=None, parent_id=None):
+def get_context(course, request, thread=None, parent_id=None, cc_requester=None):
     """
     Returns a context appropriate for use with ThreadSerializer or
     (if thread is provided) CommentSerializer.
+
+    The requester's comments service user is retrieved unless `cc_requester`
+    is given, in which case the caller is responsible for retrieving it.
     """
     # TODO: cache staff_user_ids and ta_user_ids if we need to improve perf
     staff_user_ids = {
@@ -50,7 +53,9 @@ def get_context(course, request, thread=None, parent_id=None):
         "is_requester_privileged": requester.id in staff_user_ids or requester.id in ta_user_ids,
         "staff_user_ids": staff_user_ids,
         "ta_user_ids": ta_user_ids,
-        "cc_requester": CommentClientUser.from_django_user(requester).retrieve(),
+        "cc_requester": (
+            CommentClientUser.from_django_user(requester).retrieve() if cc_requester is None else cc_requester
+        ),
         "thread": thread,
         "parent_id": parent_id,
     }
@@ -9,8 +9,10 @@ from django.utils.timezone import UTC as django_utc
 from django_comment_client.tests.factories import RoleFactory
 from django_comment_client.tests.unicode import UnicodeTestMixin
 import django_comment_client.utils as utils
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.test import TestCase
+from django.test.client import RequestFactory
 from edxmako import add_lookup
 
 from django_comment_client.tests.factories import RoleFactory
@@ -18,6 +20,9 @@ from django_comment_client.tests.unicode import UnicodeTestMixin
 import django_comment_client.utils as utils
 
 from courseware.tests.factories import InstructorFactory
+from lms.lib.comment_client.commentable import Commentable
+from lms.lib.comment_client.utils import perform_request
+from request_cache.middleware import RequestCache
 from openedx.core.djangoapps.course_groups.cohorts import set_course_cohort_settings
 from student.tests.factories import UserFactory, CourseEnrollmentFactory
 from openedx.core.djangoapps.util.testing import ContentGroupTestCase
@@ -951,3 +956,101 @@ class RenderMustacheTests(TestCase):
         """
         add_lookup('main', '', package=__name__)
         self.assertEqual(utils.render_mustache('test.mustache', {}), 'Testing 1 2 3.\n')
+
+
+@attr('shard_1')
+@mock.patch('lms.lib.comment_client.utils.requests.Session.request')
+class CommentClientResponseCacheTestCase(TestCase):
+    """
+    Test the caching of comments service responses by `perform_request`.
+    """
+    URL = 'http://localhost:4567/api/v1/commentables/c1'
+
+    def setUp(self):
+        super(CommentClientResponseCacheTestCase, self).setUp()
+        self.start_request()
+        self.addCleanup(RequestCache().clear_request_cache)
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def start_request(self):
+        """
+        Start a new request, with an empty request cache.
+        """
+        RequestCache().process_request(RequestFactory().get('/'))
+
+    def set_response(self, mock_request, data):
+        """
+        Make the comments service respond with `data`.
+        """
+        mock_request.return_value = mock.Mock(status_code=200, text=json.dumps(data), json=lambda: data)
+
+    def test_get_memoized_within_request(self, mock_request):
+        self.set_response(mock_request, {'id': 'c1'})
+        self.assertEqual(perform_request('get', self.URL, {'page': 1}), {'id': 'c1'})
+        self.assertEqual(perform_request('get', self.URL, {'page': 1}), {'id': 'c1'})
+        self.assertEqual(mock_request.call_count, 1)
+
+        # Different parameters are a different request
+        perform_request('get', self.URL, {'page': 2})
+        self.assertEqual(mock_request.call_count, 2)
+
+        # The memo only lasts for the request
+        self.start_request()
+        perform_request('get', self.URL, {'page': 1})
+        self.assertEqual(mock_request.call_count, 3)
+
+    def test_not_memoized_outside_request(self, mock_request):
+        RequestCache().clear_request_cache()
+        self.set_response(mock_request, {'id': 'c1'})
+        perform_request('get', self.URL)
+        perform_request('get', self.URL)
+        self.assertEqual(mock_request.call_count, 2)
+
+    def test_writes_clear_memo(self, mock_request):
+        self.set_response(mock_request, {'id': 'c1'})
+        for method in ('post', 'put', 'delete'):
+            perform_request('get', self.URL)
+            perform_request(method, self.URL, {})
+            perform_request('get', self.URL)
+        self.assertEqual(mock_request.call_count, 9)
+
+    def test_cached_responses_are_copies(self, mock_request):
+        self.set_response(mock_request, {'id': 'c1', 'children': [{'body': 'original'}]})
+        perform_request('get', self.URL)['children'][0]['body'] = 'changed'
+        response = perform_request('get', self.URL)
+        self.assertEqual(response['children'][0]['body'], 'original')
+        response['children'].append({})
+        self.assertEqual(perform_request('get', self.URL)['children'], [{'body': 'original'}])
+        self.assertEqual(mock_request.call_count, 1)
+
+    def test_shared_cache(self, mock_request):
+        self.set_response(mock_request, {'id': 'c1'})
+        perform_request('get', self.URL, cache_timeout=60)
+        self.start_request()
+        self.assertEqual(perform_request('get', self.URL, cache_timeout=60), {'id': 'c1'})
+        self.assertEqual(mock_request.call_count, 1)
+
+        # Without a timeout, the shared cache is neither read nor written
+        self.start_request()
+        perform_request('get', self.URL)
+        self.start_request()
+        perform_request('get', self.URL + '/other')
+        self.start_request()
+        perform_request('get', self.URL + '/other', cache_timeout=60)
+        self.assertEqual(mock_request.call_count, 4)
+
+    def test_model_changes_invalidate_shared_cache(self, mock_request):
+        self.set_response(mock_request, {'id': 'c1'})
+        for change in (Commentable.save, Commentable.delete):
+            Commentable(id='c1').retrieve()
+            self.start_request()
+            Commentable(id='c1').retrieve()
+            calls = mock_request.call_count
+
+            change(Commentable(id='c1'))
+            self.start_request()
+            Commentable(id='c1').retrieve()
+            # The change, and a new retrieval
+            self.assertEqual(mock_request.call_count, calls + 2)
+            self.start_request()
@@ -218,6 +218,13 @@ class ReportStore(object):
         for row in rows:
             yield [unicode(item).encode('utf-8') for item in row]
 
+    def _get_unicode_decoded_rows(self, csv_file):
+        """
+        Given a file containing utf-8 encoded CSV data, return a list of rows
+        with the values decoded to unicode strings.
+        """
+        return [[item.decode('utf-8') for item in row] for row in csv.reader(csv_file)]
+
 
 class S3ReportStore(ReportStore):
     """
@@ -322,6 +329,23 @@ class S3ReportStore(ReportStore):
 
         self.store(course_id, filename, output_buffer)
 
+    def read_rows(self, course_id, filename):
+        """
+        Return the rows of the CSV file `filename` stored by `store_rows()`, or
+        None if there is no such file.
+        """
+        key = self.key_for(course_id, filename)
+        if not key.exists():
+            return None
+        gzip_file = GzipFile(fileobj=StringIO(key.get_contents_as_string()), mode="rb")
+        return self._get_unicode_decoded_rows(gzip_file)
+
+    def delete(self, course_id, filename):
+        """
+        Delete the file `filename` for the given `course_id`, if it exists.
+        """
+        self.key_for(course_id, filename).delete()
+
     def links_for(self, course_id):
         """
         For a given `course_id`, return a list of `(filename, url)` tuples. `url`
@@ -397,6 +421,25 @@ class LocalFSReportStore(ReportStore):
 
         self.store(course_id, filename, output_buffer)
 
+    def read_rows(self, course_id, filename):
+        """
+        Return the rows of the CSV file `filename` stored by `store_rows()`, or
+        None if there is no such file.
+        """
+        full_path = self.path_to(course_id, filename)
+        if not os.path.exists(full_path):
+            return None
+        with open(full_path, "rb") as f:
+            return self._get_unicode_decoded_rows(f)
+
+    def delete(self, course_id, filename):
+        """
+        Delete the file `filename` for the given `course_id`, if it exists.
+        """
+        full_path = self.path_to(course_id, filename)
+        if os.path.exists(full_path):
+            os.remove(full_path)
+
     def links_for(self, course_id):
         """
         For a given `course_id`, return a list of `(filename, url)` tuples. `url`
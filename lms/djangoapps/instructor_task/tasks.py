@@ -21,12 +21,15 @@ of the query for traversing StudentModule objects.
 """
 import logging
 from functools import partial
+from itertools import count
 
 from django.conf import settings
 from django.utils.translation import ugettext_noop
 
 from celery import task
+from celery.states import FAILURE
 from bulk_email.tasks import perform_delegate_email_batches
+from instructor_task.subtasks import SubtaskStatus, check_subtask_is_valid, update_subtask_status
 from instructor_task.tasks_helper import (
     run_main_task,
     BaseInstructorTask,
@@ -38,7 +41,12 @@ from instructor_task.tasks_helper import (
     upload_problem_grade_report,
     upload_students_csv,
     cohort_students_and_upload,
-    upload_enrollment_report)
+    upload_enrollment_report,
+    use_grade_report_subtasks,
+    queue_grade_report_subtasks,
+    upload_grade_report_partial,
+    upload_grade_report_partial_errors,
+    merge_grade_report_partials)
 
 
 TASK_LOG = logging.getLogger('edx.celery.task')
@@ -152,7 +160,7 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
         xmodule_instance_args.get('task_id'), entry_id, action_name
     )
 
-    task_fn = partial(upload_grades_csv, xmodule_instance_args)
+    task_fn = partial(_upload_or_delegate_grade_report, 'grade_report', upload_grades_csv, xmodule_instance_args)
     return run_main_task(entry_id, task_fn, action_name)
 
 
@@ -169,10 +177,83 @@ def calculate_problem_grade_report(entry_id, xmodule_instance_args):
         xmodule_instance_args.get('task_id'), entry_id, action_name
     )
 
-    task_fn = partial(upload_problem_grade_report, xmodule_instance_args)
+    task_fn = partial(
+        _upload_or_delegate_grade_report, 'problem_grade_report', upload_problem_grade_report, xmodule_instance_args
+    )
     return run_main_task(entry_id, task_fn, action_name)
 
 
+def _upload_or_delegate_grade_report(
+        report_name, upload_fcn, xmodule_instance_args, entry_id, course_id, task_input, action_name
+):  # pylint: disable=too-many-arguments
+    """
+    Generates the grade report `report_name` by calling `upload_fcn` in this
+    task, or, for large courses, by queueing `calculate_grade_report_partial`
+    subtasks that each grade a slice of the enrolled students. The last of
+    these subtasks to finish merges their results into the report.
+    """
+    if not use_grade_report_subtasks(course_id, report_name):
+        return upload_fcn(xmodule_instance_args, entry_id, course_id, task_input, action_name)
+
+    subtask_indexes = count()
+
+    def _create_grade_report_subtask(student_list, initial_subtask_status):
+        """Creates a subtask to grade a given list of students."""
+        return calculate_grade_report_partial.subtask(
+            (
+                entry_id,
+                report_name,
+                next(subtask_indexes),
+                [student['pk'] for student in student_list],
+                initial_subtask_status.to_dict(),
+            ),
+            task_id=initial_subtask_status.task_id,
+            routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+        )
+
+    return queue_grade_report_subtasks(entry_id, course_id, action_name, _create_grade_report_subtask)
+
+
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
+def calculate_grade_report_partial(entry_id, report_name, index, student_ids, subtask_status_dict):
+    """
+    Grades the students `student_ids` for the grade report `report_name` of
+    the InstructorTask `entry_id`, storing their rows as a partial report.
+
+    `index` is the position of this subtask among the subtasks of the report,
+    and determines where its rows appear in the merged report.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+
+    # Raises an exception if this subtask is unknown to the InstructorTask
+    # or has already been run.
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    try:
+        new_subtask_status = upload_grade_report_partial(entry_id, report_name, index, student_ids, subtask_status)
+    except Exception:
+        TASK_LOG.exception(
+            u"Grade report subtask %s of instructor task %s: failed unexpectedly!", current_task_id, entry_id
+        )
+        subtask_status.increment(failed=len(student_ids), state=FAILURE)
+        try:
+            upload_grade_report_partial_errors(
+                entry_id, report_name, index, student_ids, u"Grade report subtask failed"
+            )
+        except Exception:
+            TASK_LOG.exception(
+                u"Grade report subtask %s of instructor task %s: could not store error rows", current_task_id, entry_id
+            )
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        merge_grade_report_partials(entry_id, report_name)
+        raise
+
+    update_subtask_status(entry_id, current_task_id, new_subtask_status)
+    merge_grade_report_partials(entry_id, report_name)
+    return new_subtask_status.to_dict()
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
 def calculate_students_features_csv(entry_id, xmodule_instance_args):
     """
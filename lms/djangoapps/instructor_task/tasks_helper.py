@@ -14,7 +14,9 @@ import logging
 
 from celery import Task, current_task
 from celery.states import SUCCESS, FAILURE
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.files.storage import DefaultStorage
 from django.db import transaction, reset_queries
 import dogstats_wrapper as dog_stats_api
@@ -34,7 +36,8 @@ from courseware.model_data import FieldDataCache
 from courseware.module_render import get_module_for_descriptor_internal
 from instructor_analytics.basic import enrolled_students_features
 from instructor_analytics.csvs import format_dictlist
-from instructor_task.models import ReportStore, InstructorTask, PROGRESS
+from instructor_task.models import ReportStore, InstructorTask, LocalFSReportStore, S3ReportStore, PROGRESS
+from instructor_task.subtasks import queue_subtasks_for_query
 from lms.djangoapps.lms_xblock.runtime import LmsPartitionService
 from openedx.core.djangoapps.course_groups.cohorts import get_cohort
 from openedx.core.djangoapps.course_groups.models import CourseUserGroup
@@ -59,6 +62,10 @@ UPDATE_STATUS_SKIPPED = 'skipped'
 # The setting name used for events when "settings" (account settings, preferences, profile information) change.
 REPORT_REQUESTED_EVENT_NAME = u'edx.instructor.report.requested'
 
+# The merge of a grade report's partial CSVs is locked for long enough that it
+# can only ever happen once.
+GRADE_REPORT_MERGE_LOCK_EXPIRE = 60 * 60 * 24
+
 
 class BaseInstructorTask(Task):
     """
@@ -155,6 +162,14 @@ class UpdateProblemModuleStateError(Exception):
     pass
 
 
+class GradeReportMergeError(Exception):
+    """
+    Error signaling that the partial grade reports of some subtasks are missing,
+    so that the grade report cannot be merged.
+    """
+    pass
+
+
 def _get_current_task():
     """
     Stub to make it easier to test without actually running Celery.
@@ -560,7 +575,7 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name
     tracker.emit(REPORT_REQUESTED_EVENT_NAME, {"report_type": csv_name, })
 
 
-def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):  # pylint: disable=too-many-statements
+def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
     """
     For a given `course_id`, generate a grades CSV file for all students that
     are enrolled, and store using a `ReportStore`. Once created, the files can
@@ -575,7 +590,6 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     """
     start_time = time()
     start_date = datetime.now(UTC)
-    status_interval = 100
     enrolled_students = CourseEnrollment.objects.users_enrolled_in(course_id)
     task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
 
@@ -588,6 +602,35 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     )
     TASK_LOG.info(u'%s, Task type: %s, Starting task execution', task_info_string, action_name)
 
+    rows, err_rows = _grades_csv_rows(course_id, enrolled_students, task_progress, task_info_string, action_name)
+
+    # By this point, we've got the rows we're going to stuff into our CSV files.
+    current_step = {'step': 'Uploading CSVs'}
+    task_progress.update_task_state(extra_meta=current_step)
+    TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
+
+    # Perform the actual upload
+    upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
+
+    # If there are any error rows (don't count the header), write them out as well
+    if len(err_rows) > 1:
+        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
+
+    # One last update before we close out...
+    TASK_LOG.info(u'%s, Task type: %s, Finalizing grade task', task_info_string, action_name)
+    return task_progress.update_task_state(extra_meta=current_step)
+
+
+def _grades_csv_rows(course_id, students, task_progress, task_info_string, action_name):  # pylint: disable=too-many-statements
+    """
+    Grade `students` for the grades CSV of `course_id`, counting them in
+    `task_progress`.
+
+    Returns a `(rows, err_rows)` tuple of the CSV rows for the grade report and
+    for the students that could not be graded. Both start with a header row,
+    but `rows` only has one if at least one student could be graded.
+    """
+    status_interval = 100
     course = get_course_by_id(course_id)
     course_is_cohorted = is_course_cohorted(course.id)
     cohorts_header = ['Cohort Name'] if course_is_cohorted else []
@@ -605,7 +648,7 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     err_rows = [["id", "username", "error_msg"]]
     current_step = {'step': 'Calculating Grades'}
 
-    total_enrolled_students = enrolled_students.count()
+    total_enrolled_students = task_progress.total
     student_counter = 0
     TASK_LOG.info(
         u'%s, Task type: %s, Current step: %s, Starting grade calculation for total students: %s',
@@ -614,7 +657,7 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
         current_step,
         total_enrolled_students
     )
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students):
+    for student, gradeset, err_msg in iterate_grades_for(course, students):
         # Periodically update task status (this is a cache write)
         if task_progress.attempted % status_interval == 0:
             task_progress.update_task_state(extra_meta=current_step)
@@ -696,22 +739,7 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
         student_counter,
         total_enrolled_students
     )
-
-    # By this point, we've got the rows we're going to stuff into our CSV files.
-    current_step = {'step': 'Uploading CSVs'}
-    task_progress.update_task_state(extra_meta=current_step)
-    TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
-
-    # Perform the actual upload
-    upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
-
-    # If there are any error rows (don't count the header), write them out as well
-    if len(err_rows) > 1:
-        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
-
-    # One last update before we close out...
-    TASK_LOG.info(u'%s, Task type: %s, Finalizing grade task', task_info_string, action_name)
-    return task_progress.update_task_state(extra_meta=current_step)
+    return rows, err_rows
 
 
 def _order_problems(blocks):
@@ -771,30 +799,54 @@ def upload_problem_grade_report(_xmodule_instance_args, _entry_id, course_id, _t
     """
     start_time = time()
     start_date = datetime.now(UTC)
-    status_interval = 100
     enrolled_students = CourseEnrollment.objects.users_enrolled_in(course_id)
     task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
 
-    # This struct encapsulates both the display names of each static item in the
-    # header row as values as well as the django User field names of those items
-    # as the keys.  It is structured in this way to keep the values related.
-    header_row = OrderedDict([('id', 'Student ID'), ('email', 'Email'), ('username', 'Username')])
-
     try:
-        course_structure = CourseStructure.objects.get(course_id=course_id)
-        blocks = course_structure.ordered_blocks
-        problems = _order_problems(blocks)
+        rows, error_rows = _problem_grade_report_rows(course_id, enrolled_students, task_progress)
     except CourseStructure.DoesNotExist:
         return task_progress.update_task_state(
             extra_meta={'step': 'Generating course structure. Please refresh and try again.'}
         )
 
+    # Perform the upload if any students have been successfully graded
+    if len(rows) > 1:
+        upload_csv_to_report_store(rows, 'problem_grade_report', course_id, start_date)
+    # If there are any error rows, write them out as well
+    if len(error_rows) > 1:
+        upload_csv_to_report_store(error_rows, 'problem_grade_report_err', course_id, start_date)
+
+    return task_progress.update_task_state(extra_meta={'step': 'Uploading CSV'})
+
+
+def _problem_grade_report_rows(course_id, students, task_progress, *_args):
+    """
+    Grade `students` for the problem grade report of `course_id`, counting
+    them in `task_progress`.
+
+    Returns a `(rows, error_rows)` tuple of the CSV rows for the report and
+    for the students that could not be graded, each starting with a header row.
+
+    Raises CourseStructure.DoesNotExist if the course structure has not been
+    generated yet.
+    """
+    status_interval = 100
+
+    # This struct encapsulates both the display names of each static item in the
+    # header row as values as well as the django User field names of those items
+    # as the keys.  It is structured in this way to keep the values related.
+    header_row = OrderedDict([('id', 'Student ID'), ('email', 'Email'), ('username', 'Username')])
+
+    course_structure = CourseStructure.objects.get(course_id=course_id)
+    blocks = course_structure.ordered_blocks
+    problems = _order_problems(blocks)
+
     # Just generate the static fields for now.
     rows = [list(header_row.values()) + ['Final Grade'] + list(chain.from_iterable(problems.values()))]
     error_rows = [list(header_row.values()) + ['error_msg']]
     current_step = {'step': 'Calculating Grades'}
 
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students, keep_raw_scores=True):
+    for student, gradeset, err_msg in iterate_grades_for(course_id, students, keep_raw_scores=True):
         student_fields = [getattr(student, field_name) for field_name in header_row]
         task_progress.attempted += 1
 
@@ -828,14 +880,247 @@ def upload_problem_grade_report(_xmodule_instance_args, _entry_id, course_id, _t
         if task_progress.attempted % status_interval == 0:
             task_progress.update_task_state(extra_meta=current_step)
 
-    # Perform the upload if any students have been successfully graded
-    if len(rows) > 1:
-        upload_csv_to_report_store(rows, 'problem_grade_report', course_id, start_date)
-    # If there are any error rows, write them out as well
-    if len(error_rows) > 1:
-        upload_csv_to_report_store(error_rows, 'problem_grade_report_err', course_id, start_date)
+    return rows, error_rows
 
-    return task_progress.update_task_state(extra_meta={'step': 'Uploading CSV'})
+
+def use_grade_report_subtasks(course_id, report_name):
+    """
+    Returns whether the grade report `report_name` of `course_id` should be
+    generated by subtasks, each grading a slice of the enrolled students.
+    """
+    if not settings.FEATURES.get('ENABLE_GRADE_REPORT_SUBTASKS', False):
+        return False
+    # Without a course structure, the problem grade report only tells the
+    # instructor to try again later, which is best done by a single task.
+    if report_name == 'problem_grade_report' and not CourseStructure.objects.filter(course_id=course_id).exists():
+        return False
+    return CourseEnrollment.objects.users_enrolled_in(course_id).count() > settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK
+
+
+def queue_grade_report_subtasks(entry_id, course_id, action_name, create_subtask_fcn):
+    """
+    Queues subtasks that each grade up to settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK
+    students enrolled in `course_id`.
+
+    `create_subtask_fcn` is passed to `queue_subtasks_for_query`; the items it
+    receives are dicts holding the 'pk' of each student.
+
+    Returns the task progress as stored in the InstructorTask object.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    # If this task is being run again after its subtasks were queued (e.g.
+    # after a loss of connection to the broker), don't queue them again.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.warning(u"Task %s has already queued its grade report subtasks", entry.task_id)
+        return json.loads(entry.task_output)
+
+    enrolled_students = CourseEnrollment.objects.users_enrolled_in(course_id)
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        create_subtask_fcn,
+        [enrolled_students],
+        [],
+        settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK,
+        enrolled_students.count(),
+    )
+
+
+def _grade_report_partials_store():
+    """
+    Returns the ReportStore holding the partial CSVs of grade report subtasks.
+
+    Unless settings.GRADES_DOWNLOAD_PARTIALS is set, this is a "partials"
+    directory of the GRADES_DOWNLOAD storage, which every worker generating
+    reports can already reach.
+    """
+    if settings.GRADES_DOWNLOAD_PARTIALS:
+        return ReportStore.from_config('GRADES_DOWNLOAD_PARTIALS')
+    config = settings.GRADES_DOWNLOAD
+    root_path = u"{}/partials".format(config['ROOT_PATH'].rstrip('/'))
+    if config['STORAGE_TYPE'].lower() == 's3':
+        return S3ReportStore(config['BUCKET'], root_path)
+    return LocalFSReportStore(root_path)
+
+
+def _grade_report_partial_filename(task_id, report_name, index):
+    """
+    Returns the name of the partial CSV written by subtask number `index` of
+    the InstructorTask `task_id`.
+    """
+    return u"{report_name}_{task_id}_{index}.csv".format(report_name=report_name, task_id=task_id, index=index)
+
+
+# Functions computing the (rows, error_rows) of each grade report that can be
+# generated by subtasks.
+GRADE_REPORT_ROW_FUNCTIONS = {
+    'grade_report': _grades_csv_rows,
+    'problem_grade_report': _problem_grade_report_rows,
+}
+
+# The header of the error report of each grade report that can be generated by
+# subtasks, and the User fields starting each of its rows.
+GRADE_REPORT_ERROR_COLUMNS = {
+    'grade_report': (["id", "username", "error_msg"], ['id', 'username']),
+    'problem_grade_report': (['Student ID', 'Email', 'Username', 'error_msg'], ['id', 'email', 'username']),
+}
+
+# The number of rows, header included, that each grade report that can be
+# generated by subtasks needs to be uploaded, as when it is generated at once.
+# Error reports are only uploaded if they have rows other than the header.
+GRADE_REPORT_MIN_ROWS = {
+    'grade_report': 1,
+    'problem_grade_report': 2,
+}
+
+
+def upload_grade_report_partial(entry_id, report_name, index, student_ids, subtask_status):
+    """
+    Grade the students `student_ids` for the grade report `report_name` of the
+    InstructorTask `entry_id`, and store their rows as partial CSVs, named after
+    the subtask number `index`, in the GRADES_DOWNLOAD_PARTIALS report store.
+
+    Returns `subtask_status`, updated with the number of students that were
+    graded or could not be graded.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    course_id = entry.course_id
+
+    # Keep the students in the order they were queued in
+    students_by_id = User.objects.in_bulk(student_ids)
+    students = [students_by_id[student_id] for student_id in student_ids if student_id in students_by_id]
+    task_progress = TaskProgress(report_name, len(students), time())
+
+    fmt = u'Task: {task_id}, InstructorTask ID: {entry_id}, Course: {course_id}, Subtask: {index}'
+    task_info_string = fmt.format(task_id=entry.task_id, entry_id=entry_id, course_id=course_id, index=index)
+    TASK_LOG.info(u'%s, Task type: %s, Grading %s students', task_info_string, report_name, len(students))
+
+    rows, err_rows = GRADE_REPORT_ROW_FUNCTIONS[report_name](
+        course_id, students, task_progress, task_info_string, report_name
+    )
+
+    report_store = _grade_report_partials_store()
+    report_store.store_rows(course_id, _grade_report_partial_filename(entry.task_id, report_name, index), rows)
+    report_store.store_rows(
+        course_id, _grade_report_partial_filename(entry.task_id, report_name + '_err', index), err_rows
+    )
+
+    subtask_status.increment(
+        succeeded=task_progress.succeeded,
+        failed=task_progress.failed,
+        skipped=len(student_ids) - len(students),
+        state=SUCCESS,
+    )
+    return subtask_status
+
+
+def upload_grade_report_partial_errors(entry_id, report_name, index, student_ids, err_msg):
+    """
+    Store an error row for each of the students `student_ids` as the partial
+    error CSV of the subtask number `index`, in place of any partials it had
+    stored, for a subtask that failed to grade them.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    header, fields = GRADE_REPORT_ERROR_COLUMNS[report_name]
+    students_by_id = User.objects.in_bulk(student_ids)
+    err_rows = [header] + [
+        [getattr(students_by_id[student_id], field) for field in fields] + [err_msg]
+        for student_id in student_ids if student_id in students_by_id
+    ]
+
+    report_store = _grade_report_partials_store()
+    report_store.delete(entry.course_id, _grade_report_partial_filename(entry.task_id, report_name, index))
+    report_store.store_rows(
+        entry.course_id, _grade_report_partial_filename(entry.task_id, report_name + '_err', index), err_rows
+    )
+
+
+def merge_grade_report_partials(entry_id, report_name):
+    """
+    Once all of the subtasks of the InstructorTask `entry_id` are done, merge
+    their partial CSVs into the grade report `report_name` and its error
+    report, and delete the partials.
+
+    Only the first call made after all subtasks are done does the merge.
+    Returns whether this call did it.
+
+    If a subtask stored neither rows nor error rows, its students would be
+    missing from both reports, so the InstructorTask is marked as failed and
+    no report is uploaded.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    subtask_dict = json.loads(entry.subtasks)
+    if subtask_dict['succeeded'] + subtask_dict['failed'] < subtask_dict['total']:
+        return False
+
+    # cache.add fails if the key already exists
+    lock_key = u"grade-report-merge-{}".format(entry.task_id)
+    if not cache.add(lock_key, 'true', GRADE_REPORT_MERGE_LOCK_EXPIRE):
+        return False
+
+    try:
+        return _merge_grade_report_partials(entry, report_name, subtask_dict['total'])
+    except Exception:
+        # Let a later call retry the merge. The lock is kept after a merge
+        # that completed, since the partials it read are deleted.
+        cache.delete(lock_key)
+        raise
+
+
+def _merge_grade_report_partials(entry, report_name, total):
+    """
+    Merge the partial CSVs of the `total` subtasks of the InstructorTask
+    `entry`, as described by `merge_grade_report_partials`, and return True.
+    """
+    entry_id = entry.id
+    course_id = entry.course_id
+    partials_store = _grade_report_partials_store()
+    timestamp = entry.created or datetime.now(UTC)
+
+    csv_names = (report_name, report_name + '_err')
+    filenames = {
+        csv_name: [_grade_report_partial_filename(entry.task_id, csv_name, index) for index in range(total)]
+        for csv_name in csv_names
+    }
+    partials = {
+        csv_name: [partials_store.read_rows(course_id, filename) for filename in filenames[csv_name]]
+        for csv_name in csv_names
+    }
+
+    missing = [
+        index for index in range(total)
+        if all(partials[csv_name][index] is None for csv_name in csv_names)
+    ]
+    if missing:
+        TASK_LOG.error(
+            u'Task: %s, InstructorTask ID: %s, Course: %s, Subtasks %s of %s stored no rows',
+            entry.task_id, entry_id, course_id, missing, report_name
+        )
+        message = u"The students of subtasks {} could not be graded".format(missing)
+        InstructorTask.objects.filter(pk=entry_id).update(
+            task_state=FAILURE,
+            task_output=InstructorTask.create_output_for_failure(GradeReportMergeError(message), None),
+        )
+    else:
+        for csv_name, min_rows in zip(csv_names, (GRADE_REPORT_MIN_ROWS[report_name], 2)):
+            rows = []
+            for partial_rows in partials[csv_name]:
+                if partial_rows:
+                    # Each partial starts with its own header row
+                    rows.extend(partial_rows[1:] if rows else partial_rows)
+            if len(rows) >= min_rows:
+                upload_csv_to_report_store(rows, csv_name, course_id, timestamp)
+        TASK_LOG.info(
+            u'Task: %s, InstructorTask ID: %s, Course: %s, Merged %s partial reports of %s',
+            entry.task_id, entry_id, course_id, total, report_name
+        )
+
+    # Only deleted once the reports are uploaded, so that a failed merge can be retried
+    for csv_name in csv_names:
+        for filename in filenames[csv_name]:
+            partials_store.delete(course_id, filename)
+    return True
 
 
 def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input, action_name):
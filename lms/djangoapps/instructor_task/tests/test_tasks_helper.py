@@ -6,11 +6,18 @@ Unit tests for LMS instructor-initiated background tasks helper functions.
 Tests that CSV grade report generation works with unicode emails.
 
 """
+import json
+import os
+import shutil
+from uuid import uuid4
+
 import ddt
+from celery.states import FAILURE, SUCCESS
 from mock import Mock, patch
 import tempfile
 import unicodecsv
 from django.core.urlresolvers import reverse
+from django.test.utils import override_settings
 
 from capa.tests.response_xml_factory import MultipleChoiceResponseXMLFactory
 from certificates.tests.factories import GeneratedCertificateFactory, CertificateWhitelistFactory
@@ -31,11 +38,15 @@ from student.models import CourseEnrollment
 from verify_student.tests.factories import SoftwareSecurePhotoVerificationFactory
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.partitions.partitions import Group, UserPartition
-from instructor_task.models import ReportStore
+from instructor_task.models import InstructorTask, ReportStore
+from instructor_task.tasks import _upload_or_delegate_grade_report
 from instructor_task.tasks_helper import (
-    cohort_students_and_upload, upload_grades_csv, upload_problem_grade_report, upload_students_csv
+    cohort_students_and_upload, upload_grades_csv, upload_grade_report_partial, upload_problem_grade_report,
+    upload_students_csv, merge_grade_report_partials, _grade_report_partials_store
 )
+from instructor_task.tests.factories import InstructorTaskFactory
 from openedx.core.djangoapps.util.testing import ContentGroupTestCase, TestConditionalContent
+from util.file import course_filename_prefix_generator
 
 
 @ddt.ddt
@@ -271,6 +282,116 @@ class TestInstructorGradeReport(TestReportMixin, InstructorTaskCourseTestCase):
         self.assertDictContainsSubset({'attempted': 1, 'succeeded': 1, 'failed': 0}, result)
 
 
+@patch('instructor_task.tasks_helper._get_current_task')
+@patch.dict('django.conf.settings.FEATURES', {'ENABLE_GRADE_REPORT_SUBTASKS': True})
+@override_settings(GRADES_DOWNLOAD_STUDENTS_PER_TASK=2)
+class TestGradeReportSubtasks(TestReportMixin, InstructorTaskCourseTestCase):
+    """
+    Tests that grade reports of large courses are generated by subtasks.
+    """
+    def setUp(self):
+        super(TestGradeReportSubtasks, self).setUp()
+        self.course = CourseFactory.create()
+        self.students = [self.create_student(u'student{}'.format(index)) for index in range(5)]
+        self.entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_type='grade_course',
+            task_id=str(uuid4()),
+        )
+
+    def tearDown(self):
+        super(TestGradeReportSubtasks, self).tearDown()
+        partials_path = _grade_report_partials_store().root_path
+        if os.path.exists(partials_path):
+            shutil.rmtree(partials_path)
+
+    def _generate_report(self):
+        """
+        Run the grade report task function for the test entry, and return the
+        updated entry.
+        """
+        _upload_or_delegate_grade_report(
+            'grade_report', upload_grades_csv, None, self.entry.id, self.course.id, {}, 'graded'
+        )
+        return InstructorTask.objects.get(pk=self.entry.id)
+
+    def test_report_is_merged(self, _mock_current_task):
+        entry = self._generate_report()
+
+        self.assertEqual(entry.task_state, SUCCESS)
+        self.assertEqual(json.loads(entry.subtasks)['total'], 3)
+        self.assertDictContainsSubset(
+            {'attempted': 5, 'succeeded': 5, 'failed': 0},
+            json.loads(entry.task_output)
+        )
+        self.verify_rows_in_csv(
+            [{'username': student.username} for student in self.students],
+            verify_order=False,
+            ignore_other_columns=True
+        )
+
+        # The partial reports are removed once they have been merged
+        self.assertEqual(_grade_report_partials_store().links_for(self.course.id), [])
+
+    def _usernames_in_report(self, report_name):
+        """
+        Return the usernames in the report `report_name` of the test course.
+        """
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        name = u'{}_{}'.format(course_filename_prefix_generator(self.course.id), report_name)
+        for filename, __ in report_store.links_for(self.course.id):
+            # Report names end with a timestamp, which has no underscores
+            if filename.rsplit(u'_', 1)[0] == name:
+                with open(report_store.path_to(self.course.id, filename)) as csv_file:
+                    return [row['username'] for row in unicodecsv.DictReader(csv_file)]
+        return []
+
+    def test_failed_subtask_reports_errors(self, _mock_current_task):
+        def fail_second_subtask(entry_id, report_name, index, student_ids, subtask_status):
+            """Fail to grade the students of the second subtask."""
+            if index == 1:
+                raise Exception("Grading failed")
+            return upload_grade_report_partial(entry_id, report_name, index, student_ids, subtask_status)
+
+        with patch('instructor_task.tasks.upload_grade_report_partial', side_effect=fail_second_subtask):
+            entry = self._generate_report()
+
+        self.assertEqual(entry.task_state, SUCCESS)
+        graded = self._usernames_in_report('grade_report')
+        failed = self._usernames_in_report('grade_report_err')
+        self.assertEqual((len(graded), len(failed)), (3, 2))
+        self.assertItemsEqual(graded + failed, [student.username for student in self.students])
+
+    def test_missing_partials_fail_report(self, _mock_current_task):
+        with patch('instructor_task.tasks.upload_grade_report_partial_errors', side_effect=Exception):
+            with patch('instructor_task.tasks.upload_grade_report_partial', side_effect=Exception):
+                entry = self._generate_report()
+        self.assertEqual(entry.task_state, FAILURE)
+        self.assertEqual(ReportStore.from_config(config_name='GRADES_DOWNLOAD').links_for(self.course.id), [])
+
+    def test_failed_merge_is_retried(self, _mock_current_task):
+        with patch('instructor_task.tasks_helper.upload_csv_to_report_store', side_effect=Exception):
+            self._generate_report()
+        self.assertEqual(self._usernames_in_report('grade_report'), [])
+
+        # The lock was released and the partials kept, so the merge can be run again
+        self.assertTrue(merge_grade_report_partials(self.entry.id, 'grade_report'))
+        self.assertItemsEqual(
+            self._usernames_in_report('grade_report'), [student.username for student in self.students]
+        )
+
+    @override_settings(GRADES_DOWNLOAD_STUDENTS_PER_TASK=10)
+    def test_small_course_uses_single_task(self, _mock_current_task):
+        entry = self._generate_report()
+
+        self.assertEqual(entry.subtasks, '')
+        self.verify_rows_in_csv(
+            [{'username': student.username} for student in self.students],
+            verify_order=False,
+            ignore_other_columns=True
+        )
+
+
 @ddt.ddt
 @patch.dict('django.conf.settings.FEATURES', {'ENABLE_PAID_COURSE_REGISTRATION': True})
 class TestInstructorDetailedEnrollmentReport(TestReportMixin, InstructorTaskCourseTestCase):
@@ -60,6 +60,14 @@ DISCUSSION_SETTINGS = {
     'MAX_COMMENT_DEPTH': 2,
 }
 
+# Maximum number of keep-alive connections to the comments service kept open by each process
+COMMENTS_SERVICE_POOL_SIZE = 10
+# Number of times a request to the comments service is retried after a connection error.
+# Retries may repeat requests which reached the service, so enable with care.
+COMMENTS_SERVICE_MAX_RETRIES = 0
+# Number of threads in each process making independent comments service requests in parallel
+COMMENTS_SERVICE_MAX_CONCURRENCY = 4
+
 
 # Features
 FEATURES = {
@@ -399,6 +407,14 @@ FEATURES = {
     # How many seconds to show the bumper again, default is 7 days:
     'SHOW_BUMPER_PERIODICITY': 7 * 24 * 3600,
 
+    # Persist per-subsection scores so that grading doesn't re-score every problem.
+    # Persisted scores are not invalidated while this is off, so delete the rows of
+    # PersistentSubsectionGrade before turning it back on.
+    'ENABLE_PERSISTENT_GRADES': False,
+
+    # Split grade reports of large courses across several celery subtasks
+    'ENABLE_GRADE_REPORT_SUBTASKS': False,
+
 }
 
 # Ignore static asset files on import which match this pattern
@@ -442,6 +458,8 @@ NODE_PATH = ':'.join(node_paths)
 # For geolocation ip database
 GEOIP_PATH = REPO_ROOT / "common/static/data/geoip/GeoIP.dat"
 GEOIPV6_PATH = REPO_ROOT / "common/static/data/geoip/GeoIPv6.dat"
+# Number of recent IP address to country lookups kept in each process. 0 disables the cache.
+GEOIP_LOOKUP_CACHE_SIZE = 10000
 
 # Where to look for a status message
 STATUS_MESSAGE_PATH = ENV_ROOT / "status_message.json"
@@ -700,6 +718,10 @@ XBLOCK_MIXINS = (LmsBlockMixin, InheritanceMixin, XModuleMixin)
 # Allow any XBlock in the LMS
 XBLOCK_SELECT_FUNCTION = prefer_xmodules
 
+# Seconds to cache the rendered fragments of the views which blocks declare are the same for
+# every user (see courseware.fragment_cache). 0 disables the cache.
+XBLOCK_FRAGMENT_CACHE_TIMEOUT = 60 * 60
+
 ############# ModuleStore Configuration ##########
 
 MODULESTORE_BRANCH = 'published-only'
@@ -751,6 +773,22 @@ MODULESTORE = {
     }
 }
 
+# Budget, in bytes of compressed data, of the per-process LRU cache of split modulestore course
+# structures. Structures are immutable so the cache never needs invalidating. 0 disables it.
+# Define a 'course_structure_cache' in CACHES to share structures between processes.
+SPLIT_STRUCTURE_CACHE_SIZE = 64 * 1024 * 1024
+# Likewise for the immutable definitions (content fields) of split modulestore blocks.
+SPLIT_DEFINITION_CACHE_SIZE = 64 * 1024 * 1024
+
+# Local on-disk tier used by StaticContentServer for assets too large for memcache, e.g.
+# {'ROOT': '/var/tmp/edx-asset-cache', 'MAX_BYTES': 2 * 1024 ** 3, 'MIN_SIZE': 1024 ** 2}.
+# None disables it, in which case such assets are streamed from the contentstore on every request.
+STATIC_CONTENT_DISK_CACHE = None
+
+# Number of seconds a ConfigurationModel's current entry is cached in each process, on top of the
+# 'configuration' cache. A save is seen at once by the process making it and by others within this time.
+CONFIGURATION_PROCESS_CACHE_TIMEOUT = 5
+
 #################### Python sandbox ############################################
 
 CODE_JAIL = {
@@ -766,6 +804,31 @@ CODE_JAIL = {
     },
 }
 
+# Pool of warm sandboxes kept by each process to run the code of capa problems, instead of
+# starting a new sandbox for every execution. See common/lib/capa/capa/safe_exec/README.rst.
+CODE_JAIL_POOL = {
+    # How many sandbox workers can run at once?  0 disables the pool.
+    'size': 0,
+    # How many executions can a worker run before it is replaced?
+    'max_executions': 100,
+    # How much memory (in bytes) can a worker itself use before it is replaced?  0 means no limit.
+    'max_memory': 200 * 1024 * 1024,
+    # The command starting the Python running the workers, by default that configured for codejail.
+    'worker_cmdline': None,
+    # The user running the code of each execution, if not the user running the workers,
+    # which must then be root.  See common/lib/capa/capa/safe_exec/README.rst.
+    'child_user': None,
+}
+
+# The results of running the code of capa problems are cached in the default cache, and the most
+# recently used are also kept in each process. See common/lib/capa/capa/safe_exec/result_cache.py.
+SAFE_EXEC_RESULT_CACHE = {
+    # How much memory (in bytes of JSON) can the results kept in each process take?  0 disables it.
+    'max_bytes': 32 * 1024 * 1024,
+    # Results larger than this (in bytes of JSON) are stored compressed.
+    'compress_over': 16 * 1024,
+}
+
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
 # of them must match the course id for that course to run unsafe code.
 #
@@ -820,6 +883,8 @@ if not EDX_PLATFORM_REVISION:
 # Static content
 STATIC_URL = '/static/'
 STATIC_ROOT = ENV_ROOT / "staticfiles"
+# Number of resolved static urls of courses kept in each process. 0 disables the cache.
+STATIC_URL_CACHE_SIZE = 10000
 
 STATICFILES_DIRS = [
     COMMON_ROOT / "static",
@@ -2033,6 +2098,16 @@ GRADES_DOWNLOAD = {
     'ROOT_PATH': '/tmp/edx-s3/grades',
 }
 
+# When FEATURES['ENABLE_GRADE_REPORT_SUBTASKS'] is set, grade reports for courses
+# with more enrolled students than this are generated by subtasks that each grade
+# this many students.
+GRADES_DOWNLOAD_STUDENTS_PER_TASK = 1000
+
+# Where grade report subtasks store their partial CSVs until they are merged, in
+# the same format as GRADES_DOWNLOAD. Every worker running the subtasks must be
+# able to reach it. If None, a "partials" directory of GRADES_DOWNLOAD is used.
+GRADES_DOWNLOAD_PARTIALS = None
+
 FINANCIAL_REPORTS = {
     'STORAGE_TYPE': 'localfs',
     'BUCKET': 'edx-financial-reports',
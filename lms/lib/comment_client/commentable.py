@@ -7,3 +7,5 @@ class Commentable(models.Model):
 
     base_url = "{prefix}/commentables".format(prefix=settings.PREFIX)
     type = 'commentable'
+    # Commentable metadata rarely changes
+    retrieve_cache_timeout = 5 * 60
@@ -1,6 +1,8 @@
 import logging
 
-from .utils import extract, perform_request, CommentClientRequestError
+from django.core.cache import cache
+
+from .utils import extract, perform_request, response_cache_key, CommentClientRequestError
 
 
 log = logging.getLogger(__name__)
@@ -14,6 +16,8 @@ class Model(object):
     base_url = None
     default_retrieve_params = {}
     metric_tag_fields = []
+    # Number of seconds retrieved instances are kept in the shared cache, or None not to cache them
+    retrieve_cache_timeout = None
 
     DEFAULT_ACTIONS_WITH_ID = ['get', 'put', 'delete']
     DEFAULT_ACTIONS_WITHOUT_ID = ['get_all', 'post']
@@ -73,10 +77,19 @@ class Model(object):
             url,
             self.default_retrieve_params,
             metric_tags=self._metric_tags,
-            metric_action='model.retrieve'
+            metric_action='model.retrieve',
+            cache_timeout=self.retrieve_cache_timeout,
         )
         self._update_from_response(response)
 
+    def _invalidate_retrieve_cache(self):
+        """
+        Remove this instance from the shared cache, if instances are cached.
+        """
+        if self.retrieve_cache_timeout and self.id is not None:
+            url = self.url(action='get', params=self.attributes)
+            cache.delete(response_cache_key(url, self.default_retrieve_params))
+
     @property
     def _metric_tags(self):
         """
@@ -146,6 +159,7 @@ class Model(object):
             )
         self.retrieved = True
         self._update_from_response(response)
+        self._invalidate_retrieve_cache()
         self.after_save(self)
 
     def delete(self):
@@ -153,6 +167,7 @@ class Model(object):
         response = perform_request('delete', url, metric_tags=self._metric_tags, metric_action='model.delete')
         self.retrieved = True
         self._update_from_response(response)
+        self._invalidate_retrieve_cache()
 
     @classmethod
     def url_with_id(cls, params={}):
@@ -1,14 +1,33 @@
 from contextlib import contextmanager
+import copy
 import dogstats_wrapper as dog_stats_api
+import hashlib
 import logging
+import os
+import threading
 import requests
+from multiprocessing.pool import ThreadPool
 from django.conf import settings
+from django.core.cache import cache
 from time import time
 from uuid import uuid4
+from django.utils import translation
 from django.utils.translation import get_language
+from request_cache.middleware import RequestCache
 
 log = logging.getLogger(__name__)
 
+# Connection pools are shared by all the threads of a process, while each thread
+# has its own Session (and so its own cookies and headers) mounting them.
+_adapter = None
+_adapter_pid = None
+_adapter_lock = threading.Lock()
+_sessions = threading.local()
+
+_thread_pool = None
+_thread_pool_pid = None
+_thread_pool_lock = threading.Lock()
+
 
 def strip_none(dic):
     return dict([(k, v) for k, v in dic.iteritems() if v is not None])
@@ -50,9 +69,150 @@ def request_timer(request_id, method, url, tags=None):
     )
 
 
+def _get_adapter():
+    """
+    Return this process's adapter pooling keep-alive connections to the comments service.
+    Pools are created afresh after a fork, as connections can't be shared between processes.
+    """
+    global _adapter, _adapter_pid  # pylint: disable=global-statement
+    if _adapter_pid != os.getpid():
+        with _adapter_lock:
+            if _adapter_pid != os.getpid():
+                _adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=getattr(settings, 'COMMENTS_SERVICE_POOL_SIZE', 10),
+                    max_retries=getattr(settings, 'COMMENTS_SERVICE_MAX_RETRIES', 0),
+                )
+                _adapter_pid = os.getpid()
+    return _adapter
+
+
+def get_session():
+    """
+    Return the Session with which the current thread makes requests to the comments service.
+    """
+    adapter = _get_adapter()
+    session = getattr(_sessions, 'session', None)
+    if session is None or session.adapters.get('http://') is not adapter:
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _sessions.session = session
+    return session
+
+
+def _get_thread_pool():
+    """
+    Return this process's pool of threads for making comments service requests concurrently.
+    """
+    global _thread_pool, _thread_pool_pid  # pylint: disable=global-statement
+    if _thread_pool_pid != os.getpid():
+        with _thread_pool_lock:
+            if _thread_pool_pid != os.getpid():
+                _thread_pool = ThreadPool(getattr(settings, 'COMMENTS_SERVICE_MAX_CONCURRENCY', 4))
+                _thread_pool_pid = os.getpid()
+    return _thread_pool
+
+
+def _call_in_language(call, language):
+    """
+    Return the result of `call()` made with `language` active, as translation is per thread.
+    """
+    translation.activate(language)
+    try:
+        return call()
+    finally:
+        translation.deactivate()
+
+
+def perform_concurrently(*calls):
+    """
+    Make independent comments service requests in parallel, and wait for them all.
+
+    Each of `calls` is a callable taking no arguments which makes requests to the
+    comments service, e.g. ``lambda: cc.Thread.search(query_params)``. The calls
+    run in a shared pool of COMMENTS_SERVICE_MAX_CONCURRENCY threads, so they must
+    not use the database or other per-thread state of the request.
+
+    Returns the calls' results, in the order of `calls`. If any call raises an
+    exception, the first such exception (in the order of `calls`) is re-raised
+    once all of the calls have finished.
+    """
+    if len(calls) < 2 or getattr(settings, 'COMMENTS_SERVICE_MAX_CONCURRENCY', 4) < 2:
+        return [call() for call in calls]
+
+    language = get_language()
+    pool = _get_thread_pool()
+    pending = [pool.apply_async(_call_in_language, (call, language)) for call in calls]
+    results = []
+    error = None
+    for result in pending:
+        try:
+            results.append(result.get())
+        except Exception as exception:  # pylint: disable=broad-except
+            results.append(None)
+            if error is None:
+                error = exception
+    if error is not None:
+        raise error  # pylint: disable=raising-bad-type
+    return results
+
+
+def _request_memo():
+    """
+    Return the dict memoizing comments service responses for the current request, or None outside of a request.
+    """
+    request_cache = RequestCache.get_request_cache()
+    if getattr(request_cache, 'request', None) is None:
+        return None
+    return request_cache.data.setdefault('comment_client.responses', {})
+
+
+def response_cache_key(url, params, raw=False):
+    """
+    Return the key under which the response to a GET of `url` with `params` is cached.
+    """
+    params = sorted((params or {}).items())
+    return u'comment_client.response.{}'.format(hashlib.md5(repr((url, params, raw))).hexdigest())
+
+
 def perform_request(method, url, data_or_params=None, raw=False,
-                    metric_action=None, metric_tags=None, paged_results=False):
+                    metric_action=None, metric_tags=None, paged_results=False, cache_timeout=None):
+    """
+    Make a request to the comments service and return its (decoded) response.
+
+    The responses to GET requests are memoized for the rest of the current request
+    and, if `cache_timeout` is given, kept in the shared cache for that many seconds.
+    Any other request empties the memo, as it may change what the service returns.
+    Cached responses are copied, so callers are free to modify them.
+    """
+    memo = _request_memo()
+    if method != 'get':
+        if memo is not None:
+            memo.clear()
+        return _perform_request(method, url, data_or_params, raw, metric_action, metric_tags, paged_results)
+
+    key = response_cache_key(url, data_or_params, raw)
+    if memo is not None and key in memo:
+        dog_stats_api.increment('comment_client.request.cache_hit', tags=[u'tier:request'])
+        return copy.deepcopy(memo[key])
+    result = cache.get(key) if cache_timeout else None
+    if result is not None:
+        dog_stats_api.increment('comment_client.request.cache_hit', tags=[u'tier:shared'])
+    else:
+        result = _perform_request(method, url, data_or_params, raw, metric_action, metric_tags, paged_results)
+        if cache_timeout:
+            cache.set(key, result, cache_timeout)
+
+    if memo is not None:
+        memo[key] = copy.deepcopy(result)
+    return result
+
 
+def _perform_request(method, url, data_or_params, raw, metric_action, metric_tags, paged_results):
+    """
+    Make a request to the comments service, bypassing any cache.
+    """
     if metric_tags is None:
         metric_tags = []
 
@@ -76,7 +236,7 @@ def perform_request(method, url, data_or_params=None, raw=False,
         data = None
         params = merge_dict(data_or_params, request_id_dict)
     with request_timer(request_id, method, url, metric_tags):
-        response = requests.request(
+        response = get_session().request(
             method,
             url,
             data=data,
@@ -14,6 +14,7 @@ import edxmako
 import logging
 from monkey_patch import django_utils_translation
 import analytics
+from capa.safe_exec import configure_pool, configure_result_cache
 
 
 log = logging.getLogger(__name__)
@@ -29,6 +30,9 @@ def run():
 
     add_mimetypes()
 
+    configure_pool(**settings.CODE_JAIL_POOL)
+    configure_result_cache(**settings.SAFE_EXEC_RESULT_CACHE)
+
     if settings.FEATURES.get('USE_CUSTOM_THEME', False):
         enable_theme()
 